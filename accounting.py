@@ -0,0 +1,268 @@
+"""
+Accounting Module
+
+This module records the token usage, latency and call count of every LLM
+request made through the gateway. Each call is attributed to the pipeline node,
+research topic, prompt template and model that produced it, so a run can be
+summarized per dimension and exported as JSON next to its report.
+
+Attribution labels live in context variables: nodes and topics set them with
+`usage_labels`, and `ContextThreadPoolExecutor` carries them into worker threads.
+Asyncio tasks inherit them automatically.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+# USD per one million tokens (input, output)
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "o3-mini": (1.10, 4.40),
+    "o4-mini": (1.10, 4.40),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+UNLABELED = "unlabeled"
+
+_labels: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("usage_labels", default={})
+
+
+@contextmanager
+def usage_labels(**labels: str) -> Iterator[None]:
+    """
+    Attribute LLM calls made inside the block to the given labels.
+
+    Labels nest: inner blocks override only the keys they set.
+
+    Args:
+        **labels: Label values, e.g. node="search_node" or topic="Solar power"
+    """
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def current_labels() -> Dict[str, str]:
+    """Return the labels active in the current context."""
+    return dict(_labels.get())
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """
+    Estimate the USD cost of a call from the pricing table.
+
+    Dated model snapshots (e.g. "gpt-4o-2024-08-06") are priced as their base model.
+
+    Args:
+        model: Model name
+        input_tokens: Number of input tokens
+        output_tokens: Number of output tokens
+
+    Returns:
+        Cost in USD, or None if the model is not in the pricing table
+    """
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        # Longest matching prefix, so "gpt-4o-mini-..." is not priced as "gpt-4o"
+        matches = [name for name in MODEL_PRICING if model.startswith(name + "-")]
+        if not matches:
+            return None
+        pricing = MODEL_PRICING[max(matches, key=len)]
+    input_price, output_price = pricing
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """A ThreadPoolExecutor whose tasks run in a copy of the submitting thread's context."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "cached_calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "latency_seconds": 0.0,
+        "cost_usd": 0.0,
+    }
+
+
+class UsageTracker:
+    """
+    Thread-safe aggregation of LLM usage per node, topic, prompt, model and run.
+
+    Calls served from the response cache are counted separately and cost nothing.
+    """
+
+    DIMENSIONS = ("node", "topic", "prompt", "model", "run")
+
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        with self._lock:
+            self._totals = _empty_stats()
+            self._by_dimension = {dimension: {} for dimension in self.DIMENSIONS}
+            self._unpriced_models = set()
+
+    def record(
+        self,
+        model: str,
+        usage: Any,
+        latency: float,
+        prompt: Optional[str] = None,
+        cached: bool = False
+    ) -> None:
+        """
+        Record one LLM call under the labels of the current context.
+
+        Args:
+            model: Model the call was made with
+            usage: The `usage` object of the response, or None if unavailable
+            latency: Wall-clock duration of the call in seconds
+            prompt: Name of the prompt template used
+            cached: Whether the response came from the response cache
+        """
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+        cost = 0.0 if cached else estimate_cost(model, input_tokens, output_tokens)
+
+        labels = _labels.get()
+        keys = {
+            "node": labels.get("node", UNLABELED),
+            "topic": labels.get("topic", UNLABELED),
+            "prompt": prompt or labels.get("prompt", UNLABELED),
+            "model": model or UNLABELED,
+            "run": labels.get("run", UNLABELED),
+        }
+
+        with self._lock:
+            if cost is None:
+                self._unpriced_models.add(model)
+            buckets = [self._totals] + [
+                self._by_dimension[dimension].setdefault(keys[dimension], _empty_stats())
+                for dimension in self.DIMENSIONS
+            ]
+            for stats in buckets:
+                stats["calls"] += 1
+                stats["cached_calls"] += int(cached)
+                stats["input_tokens"] += input_tokens
+                stats["output_tokens"] += output_tokens
+                stats["total_tokens"] += input_tokens + output_tokens
+                stats["latency_seconds"] += latency
+                stats["cost_usd"] += cost or 0.0
+
+    def totals(self) -> Dict[str, Any]:
+        """Return a copy of the run-wide totals."""
+        with self._lock:
+            return dict(self._totals)
+
+    def stats_for(self, dimension: str, name: str) -> Dict[str, Any]:
+        """
+        Return a copy of the stats recorded under one label value.
+
+        Args:
+            dimension: One of "node", "topic", "prompt", "model" or "run"
+            name: Label value, e.g. a topic name
+
+        Returns:
+            The stats for that label, all zero if nothing was recorded
+        """
+        with self._lock:
+            return dict(self._by_dimension[dimension].get(name) or _empty_stats())
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Build a JSON-serializable summary of the run.
+
+        Returns:
+            Totals plus per-node, per-topic, per-prompt, per-model and per-run breakdowns,
+            each sorted by total tokens in descending order
+        """
+        with self._lock:
+            summary = {"totals": dict(self._totals)}
+            for dimension in self.DIMENSIONS:
+                entries = sorted(
+                    self._by_dimension[dimension].items(),
+                    key=lambda item: item[1]["total_tokens"],
+                    reverse=True
+                )
+                summary[f"by_{dimension}"] = {name: dict(stats) for name, stats in entries}
+            summary["unpriced_models"] = sorted(self._unpriced_models)
+        return summary
+
+    def export(self, report_filename: str) -> str:
+        """
+        Write the summary as JSON next to a report.
+
+        Args:
+            report_filename: Path of the report, e.g. "research_report_20240101_120000.md"
+
+        Returns:
+            Path of the written file, e.g. "research_report_20240101_120000_usage.json"
+        """
+        path = os.path.splitext(report_filename)[0] + "_usage.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+
+_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """
+    Return the process-wide usage tracker.
+
+    Returns:
+        The shared UsageTracker instance
+    """
+    return _tracker
+
+
+def labeled_node(name: str, node: Callable) -> Callable:
+    """
+    Wrap a graph node so the LLM calls it makes are attributed to it.
+
+    Args:
+        name: Node name used as the "node" label
+        node: Sync or async node function taking the pipeline state
+
+    Returns:
+        A node function of the same kind that runs under usage_labels(node=name)
+    """
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            with usage_labels(node=name):
+                return await node(state)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        with usage_labels(node=name):
+            return node(state)
+    return wrapper
@@ -7,6 +7,19 @@ providing a clean separation of concerns and better maintainability.
 
 import argparse
 from typing import Dict, Any
+from llm_gateway import CACHE_MODES, DEFAULT_CACHE_PATH, DEFAULT_EMBEDDING_MODEL
+from article_ranker import DEFAULT_RELEVANCE_THRESHOLD
+from concurrency import DEFAULT_MAX_CONCURRENCY
+from clients import DEFAULT_MAX_CONNECTIONS
+from scheduler import DEFAULT_MAX_RETRIES
+from checkpoint import DEFAULT_CHECKPOINT_DIR
+from event_log import DEFAULT_BLOB_DIR, DEFAULT_MAX_EVENTS
+
+# Graph nodes a checkpointed run can be re-run from
+PIPELINE_NODES = [
+    "extract_topics", "generate_subqs", "follow_up_generator", "search_node",
+    "iteration_controller", "article_synthesis_with_expansion", "topic_pipeline", "generate_report"
+]
 
 
 def create_argument_parser() -> argparse.ArgumentParser:
@@ -33,14 +46,34 @@ Examples:
   python main.py --query "Future of electric vehicles" --max-expansions 4 --detail high --legend
   python main.py --query "Quantum computing advances" --max-workers 8 --max-expansions 3 --legend
   python main.py --query "AI in healthcare" --max-workers 6 --breadth 3 --max-expansions 4 --legend
+  python main.py --query "Battery storage economics" --synthesis-mode tree --max-workers 8
+  python main.py --query "Global semiconductor supply" --detail high --breadth 2 --pipeline-mode pipelined
+  python main.py --query "Ocean acidification" --detail high --subquestion-mode batched
+  python main.py --query "Carbon capture" --formatting-mode local
+  python main.py --query "Offshore wind supply chains" --rank-articles --relevance-threshold 0.3
+  python main.py --query "Semiconductor export controls" --no-dedup
+  python main.py --query "Grid-scale storage" --search-cache-ttl 24
+  python main.py --query "Lithium supply chains" --search-content highlights
+  python main.py --query "Hydrogen economy" --detail high --search-concurrency 12 --search-rps 10
+  python main.py --query "Hydrogen economy" --async --llm-rpm 500 --max-retries 6
+  python main.py --query "Grid-scale storage" --llm-cache replay --legend
+  python main.py --query "Perovskite solar cells" --stream-report
+  python main.py --query "Small modular reactors" --breadth 3 --max-cost 0.50 --max-seconds 300
+  python main.py --batch queries.jsonl --batch-parallel 8 --batch-manifest manifest.jsonl
+  python main.py --batch queries.jsonl --async --max-concurrency 128 --search-rps 10
+  python main.py --resume 20250101_120000
+  python main.py --query "Direct air capture" --breadth 4 --max-events 200 --blob-dir /tmp/research-blobs
+  python main.py --resume 20250101_120000 --rerun-from article_synthesis_with_expansion --synthesis-mode tree
+  python main.py --query "Fusion energy outlook" --async --max-concurrency 128 --detail high --breadth 5
+  python main.py --query "Fusion energy outlook" --async --max-concurrency 128 --max-connections 128 --http2
+  python main.py --query "Fusion energy outlook" --backend mock --mock-config mock.json --async --max-concurrency 256
         """
     )
     
     # Required arguments
     parser.add_argument(
         "--query", 
-        required=True,
-        help="Research question to investigate"
+        help="Research question to investigate (required unless --resume is given)"
     )
     
     # Model configuration
@@ -85,12 +118,265 @@ Examples:
         help="Number of parallel workers for article expansion (1-10, default: 4)"
     )
     
+    parser.add_argument(
+        "--subquestion-mode", 
+        choices=["parallel", "batched"],
+        default="parallel",
+        help="How subquestions are generated: parallel (one concurrent call per topic) or batched (one structured call for all topics) (default: parallel)"
+    )
+    
+    parser.add_argument(
+        "--pipeline-mode", 
+        choices=["staged", "pipelined"],
+        default="staged",
+        help="staged: each research stage finishes for all topics before the next starts; pipelined: each topic runs from subquestions through synthesis on its own (default: staged)"
+    )
+    
+    parser.add_argument(
+        "--synthesis-mode", 
+        choices=["linear", "tree"],
+        default="linear",
+        help="How articles are integrated into a topic section: linear (one after another) or tree (parallel map/reduce merge) (default: linear)"
+    )
+    
+    parser.add_argument(
+        "--formatting-mode", 
+        choices=["per-merge", "final", "local"],
+        default="per-merge",
+        help="When academic formatting is cleaned: per-merge (LLM pass after every integration), final (one LLM pass per topic) or local (rule-based, no LLM call) (default: per-merge)"
+    )
+    
+    parser.add_argument(
+        "--no-dedup", 
+        dest="dedup",
+        action="store_false",
+        help="Keep articles whose text near-duplicates an article already found under another URL (deduplication is on by default)"
+    )
+    
+    parser.add_argument(
+        "--rank-articles", 
+        action="store_true",
+        help="Rank each topic's articles by embedding similarity to the topic and subquestion, dropping irrelevant ones and near-duplicates before synthesis"
+    )
+    
+    parser.add_argument(
+        "--relevance-threshold", 
+        type=float,
+        default=DEFAULT_RELEVANCE_THRESHOLD,
+        help=f"Minimum relevance score (cosine similarity) an article needs with --rank-articles (default: {DEFAULT_RELEVANCE_THRESHOLD})"
+    )
+    
+    parser.add_argument(
+        "--embedding-model", 
+        default=DEFAULT_EMBEDDING_MODEL,
+        help=f"OpenAI embedding model used by --rank-articles (default: {DEFAULT_EMBEDDING_MODEL})"
+    )
+    
+    # Execution configuration
+    parser.add_argument(
+        "--async", 
+        dest="use_async",
+        action="store_true",
+        help="Run the pipeline on asyncio (AsyncOpenAI and async search clients) instead of thread pools"
+    )
+    
+    parser.add_argument(
+        "--max-concurrency", 
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Maximum in-flight LLM and search requests in --async mode (default: {DEFAULT_MAX_CONCURRENCY})"
+    )
+    
+    parser.add_argument(
+        "--max-connections", 
+        type=int,
+        default=DEFAULT_MAX_CONNECTIONS,
+        help=f"Connection pool size of each shared HTTP client (default: {DEFAULT_MAX_CONNECTIONS})"
+    )
+    
+    parser.add_argument(
+        "--http2", 
+        action="store_true",
+        help="Use HTTP/2 for OpenAI and async search requests (requires the h2 package: pip install 'httpx[http2]')"
+    )
+    
+    # Budget configuration
+    parser.add_argument(
+        "--max-tokens", 
+        type=int,
+        default=None,
+        help="Token budget for the whole run; research, then synthesis, stop early as it runs out (default: no limit)"
+    )
+    
+    parser.add_argument(
+        "--max-cost", 
+        type=float,
+        default=None,
+        help="Estimated LLM cost budget in USD for the whole run (default: no limit)"
+    )
+    
+    parser.add_argument(
+        "--max-seconds", 
+        type=float,
+        default=None,
+        help="Wall-clock budget in seconds for the whole run (default: no limit)"
+    )
+    
+    parser.add_argument(
+        "--max-topic-tokens", 
+        type=int,
+        default=None,
+        help="Token budget for synthesizing a single topic (default: no limit)"
+    )
+    
+    parser.add_argument(
+        "--max-topic-seconds", 
+        type=float,
+        default=None,
+        help="Wall-clock budget in seconds for synthesizing a single topic (default: no limit)"
+    )
+    
     # Search configuration
     parser.add_argument(
         "--search-provider", 
-        choices=["exa", "tavily"],
+        choices=["exa", "tavily", "mock"],
         default="exa",
-        help="Search provider to use: exa or tavily (default: exa)"
+        help="Search provider to use: exa, tavily or mock (a local corpus, see --backend) (default: exa)"
+    )
+    
+    parser.add_argument(
+        "--search-concurrency", 
+        type=int,
+        default=8,
+        help="Maximum concurrent searches per research iteration (default: 8)"
+    )
+    
+    parser.add_argument(
+        "--search-content", 
+        choices=["text", "highlights"],
+        default="text",
+        help="Article content fetched per search result: text (page text cut to what the prompts use) or highlights (Exa passages most relevant to the query) (default: text)"
+    )
+    
+    parser.add_argument(
+        "--search-rps", 
+        type=float,
+        default=5,
+        help="Maximum search requests per second sent to the provider, 0 for no limit (default: 5)"
+    )
+    
+    parser.add_argument(
+        "--llm-rpm", 
+        type=float,
+        default=0,
+        help="Maximum LLM requests per minute sent for each model, 0 for no limit (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--max-retries", 
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries of a throttled, timed out or server-failed LLM or search request, with jittered exponential backoff (default: {DEFAULT_MAX_RETRIES})"
+    )
+    
+    parser.add_argument(
+        "--search-cache-ttl", 
+        type=float,
+        default=168,
+        help="Hours to keep cached search results on disk before refetching (default: 168)"
+    )
+    
+    parser.add_argument(
+        "--no-search-cache", 
+        action="store_true",
+        help="Disable the on-disk search result cache"
+    )
+    
+    # LLM cache configuration
+    parser.add_argument(
+        "--llm-cache", 
+        choices=CACHE_MODES,
+        default="readwrite",
+        help="LLM response cache: readwrite (serve and store), replay (serve only, fail on miss) or off (default: readwrite)"
+    )
+    
+    parser.add_argument(
+        "--llm-cache-path", 
+        default=DEFAULT_CACHE_PATH,
+        help=f"SQLite file for cached LLM responses (default: {DEFAULT_CACHE_PATH})"
+    )
+    
+    # Batch configuration
+    parser.add_argument(
+        "--batch", 
+        metavar="FILE",
+        help="Run every query in a JSONL file (one {\"query\": ...} object per line, with optional id, detail, breadth, max_expansions, topic_model, summary_model and search_provider overrides)"
+    )
+    
+    parser.add_argument(
+        "--batch-parallel", 
+        type=int,
+        default=4,
+        help="Number of batch queries run at the same time (default: 4)"
+    )
+    
+    parser.add_argument(
+        "--batch-manifest", 
+        metavar="FILE",
+        help="JSONL file recording the report, timing, usage and error of each batch query (default: batch_manifest_<timestamp>.jsonl)"
+    )
+    
+    # Checkpoint configuration
+    parser.add_argument(
+        "--resume", 
+        metavar="RUN_ID",
+        help="Resume a checkpointed run, skipping the nodes and topics it already finished"
+    )
+    
+    parser.add_argument(
+        "--rerun-from", 
+        choices=PIPELINE_NODES,
+        help="With --resume, run the pipeline again from this node (e.g. generate_report to re-render the report)"
+    )
+    
+    parser.add_argument(
+        "--checkpoint-dir", 
+        default=DEFAULT_CHECKPOINT_DIR,
+        help=f"Directory for run checkpoints (default: {DEFAULT_CHECKPOINT_DIR})"
+    )
+    
+    parser.add_argument(
+        "--no-checkpoint", 
+        action="store_true",
+        help="Do not checkpoint the run"
+    )
+    
+    # Backend configuration
+    parser.add_argument(
+        "--backend", 
+        choices=["live", "mock"],
+        default="live",
+        help="live: call the OpenAI and search APIs; mock: answer LLM calls and searches offline with deterministic fake backends, e.g. to benchmark the pipeline (default: live)"
+    )
+    
+    parser.add_argument(
+        "--mock-config", 
+        metavar="FILE",
+        help="JSON file configuring the mock backends' latency distributions, error rates, canned outputs and search corpus"
+    )
+    
+    # Event log configuration
+    parser.add_argument(
+        "--blob-dir", 
+        default=DEFAULT_BLOB_DIR,
+        help=f"Directory where the event log stores search results, addressed by content (default: {DEFAULT_BLOB_DIR})"
+    )
+    
+    parser.add_argument(
+        "--max-events", 
+        type=int,
+        default=DEFAULT_MAX_EVENTS,
+        help=f"Number of most recent pipeline events kept in the run state (default: {DEFAULT_MAX_EVENTS})"
     )
     
     # Output configuration
@@ -100,6 +386,12 @@ Examples:
         help="Add a table of contents (legend) to the report"
     )
     
+    parser.add_argument(
+        "--stream-report", 
+        action="store_true",
+        help="Write the report file incrementally, streaming the introduction and conclusion as they are generated"
+    )
+    
     parser.add_argument(
         "--verbose", 
         "-v", 
@@ -120,6 +412,27 @@ def parse_arguments() -> Dict[str, Any]:
     parser = create_argument_parser()
     args = parser.parse_args()
     
+    if not args.query and not args.resume and not args.batch:
+        parser.error("--query is required unless --resume or --batch is given")
+    if args.batch and (args.query or args.resume):
+        parser.error("--batch cannot be combined with --query or --resume")
+    if args.max_retries < 0:
+        parser.error("--max-retries cannot be negative")
+    if args.max_connections < 1:
+        parser.error("--max-connections must be at least 1")
+    if args.mock_config and args.backend != "mock":
+        parser.error("--mock-config requires --backend mock")
+    if args.backend == "mock":
+        args.search_provider = "mock"
+    if args.max_events < 1:
+        parser.error("--max-events must be at least 1")
+    if args.batch_parallel < 1:
+        parser.error("--batch-parallel must be at least 1")
+    if args.rerun_from and not args.resume:
+        parser.error("--rerun-from requires --resume")
+    if args.resume and args.no_checkpoint:
+        parser.error("--resume cannot be combined with --no-checkpoint")
+    
     return {
         "query": args.query,
         "topic_model": args.topic_model,
@@ -128,7 +441,45 @@ def parse_arguments() -> Dict[str, Any]:
         "breadth": args.breadth,
         "max_expansions": args.max_expansions,
         "max_workers": args.max_workers,
+        "subquestion_mode": args.subquestion_mode,
+        "pipeline_mode": args.pipeline_mode,
+        "synthesis_mode": args.synthesis_mode,
+        "formatting_mode": args.formatting_mode,
+        "dedup": args.dedup,
+        "rank_articles": args.rank_articles,
+        "relevance_threshold": args.relevance_threshold,
+        "embedding_model": args.embedding_model,
+        "use_async": args.use_async,
+        "max_concurrency": args.max_concurrency,
+        "max_connections": args.max_connections,
+        "http2": args.http2,
+        "max_tokens": args.max_tokens,
+        "max_cost": args.max_cost,
+        "max_seconds": args.max_seconds,
+        "max_topic_tokens": args.max_topic_tokens,
+        "max_topic_seconds": args.max_topic_seconds,
         "search_provider": args.search_provider,
+        "search_concurrency": args.search_concurrency,
+        "search_content": args.search_content,
+        "search_rps": args.search_rps,
+        "llm_rpm": args.llm_rpm,
+        "max_retries": args.max_retries,
+        "search_cache": not args.no_search_cache,
+        "search_cache_ttl": args.search_cache_ttl,
+        "llm_cache": args.llm_cache,
+        "llm_cache_path": args.llm_cache_path,
+        "batch": args.batch,
+        "batch_parallel": args.batch_parallel,
+        "batch_manifest": args.batch_manifest,
+        "resume": args.resume,
+        "rerun_from": args.rerun_from,
+        "checkpoint_dir": args.checkpoint_dir,
+        "checkpoint": not args.no_checkpoint,
+        "backend": args.backend,
+        "mock_config": args.mock_config,
+        "blob_dir": args.blob_dir,
+        "max_events": args.max_events,
         "legend": args.legend,
+        "stream_report": args.stream_report,
         "verbose": args.verbose
     }
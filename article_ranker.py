@@ -0,0 +1,159 @@
+"""
+Article Ranker Module
+
+This module scores the articles found for each topic by embedding similarity to
+the topic and to the subquestion that retrieved them. Articles below a relevance
+threshold and near-duplicates of better articles are dropped, and the rest are
+ordered best first, so synthesis spends its integration calls on fewer, more
+relevant articles.
+"""
+
+import asyncio
+import threading
+from typing import Dict, List
+import numpy as np
+from llm_gateway import get_llm_client, DEFAULT_EMBEDDING_MODEL
+from models import Article
+
+
+DEFAULT_RELEVANCE_THRESHOLD = 0.25
+# Characters of article text embedded per article
+DEFAULT_EMBEDDING_CHARACTERS = 8000
+# Cosine similarity above which two articles are treated as the same content
+DUPLICATE_SIMILARITY = 0.95
+
+
+class ArticleRanker:
+    """
+    Ranks and prunes topic articles with cosine similarity over embeddings.
+
+    Embeddings are requested in batches and cached per article URL and per
+    query text, so re-ranking the same articles (e.g. across topics that share
+    a subquestion) never embeds them twice.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        threshold: float = DEFAULT_RELEVANCE_THRESHOLD,
+        batch_size: int = 64,
+        max_characters: int = DEFAULT_EMBEDDING_CHARACTERS
+    ):
+        """
+        Initialize the ranker.
+
+        Args:
+            model: Embedding model name
+            threshold: Minimum relevance score an article needs to be kept
+            batch_size: Number of texts sent per embeddings request
+            max_characters: Characters of article text used for its embedding
+        """
+        self.client = get_llm_client()
+        self.model = model
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.max_characters = max_characters
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def rank_topics(self, topic_articles: Dict[str, List[Article]]) -> Dict[str, List[Article]]:
+        """
+        Rank and prune the articles of every topic.
+
+        Args:
+            topic_articles: Mapping from topic to its articles
+
+        Returns:
+            Mapping from topic to its kept articles, best first, each with its relevance set
+        """
+        pending = self._pending_inputs(topic_articles)
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            self._store_vectors(batch, self.client.embed([text for _, text in batch], model=self.model))
+        return {topic: self._rank(topic, articles) for topic, articles in topic_articles.items()}
+
+    async def arank_topics(self, topic_articles: Dict[str, List[Article]]) -> Dict[str, List[Article]]:
+        """
+        Async variant of rank_topics that sends all embedding batches concurrently.
+
+        Args:
+            topic_articles: Mapping from topic to its articles
+
+        Returns:
+            Mapping from topic to its kept articles, best first, each with its relevance set
+        """
+        pending = self._pending_inputs(topic_articles)
+        batches = [pending[start:start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        results = await asyncio.gather(*(
+            self.client.aembed([text for _, text in batch], model=self.model)
+            for batch in batches
+        ))
+        for batch, vectors in zip(batches, results):
+            self._store_vectors(batch, vectors)
+        return {topic: self._rank(topic, articles) for topic, articles in topic_articles.items()}
+
+    def _pending_inputs(self, topic_articles: Dict[str, List[Article]]) -> List[tuple]:
+        """Collect the (cache key, text) pairs that still need an embedding."""
+        inputs = {}
+        for topic, articles in topic_articles.items():
+            inputs[_query_key(topic)] = topic
+            for article in articles:
+                inputs[_article_key(article)] = f"{article.title}\n\n{article.text[:self.max_characters]}"
+                if article.subquestion:
+                    inputs[_query_key(article.subquestion)] = article.subquestion
+
+        with self._lock:
+            return [(key, text) for key, text in inputs.items() if key not in self._vectors and text.strip()]
+
+    def _store_vectors(self, batch: List[tuple], vectors: List[List[float]]) -> None:
+        """Normalize embeddings to unit length and cache them."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            for (key, _), vector in zip(batch, matrix):
+                self._vectors[key] = vector
+
+    def _rank(self, topic: str, articles: List[Article]) -> List[Article]:
+        """
+        Score one topic's articles, drop irrelevant ones and near-duplicates, and sort the rest.
+
+        An article's score is the mean of its cosine similarity to the topic and to
+        its subquestion. The best article is always kept, so no topic ends up empty.
+        """
+        with self._lock:
+            vectors = self._vectors
+            topic_vector = vectors.get(_query_key(topic))
+            usable = [article for article in articles if _article_key(article) in vectors]
+            if topic_vector is None or not usable:
+                return articles
+            article_matrix = np.stack([vectors[_article_key(article)] for article in usable])
+            subquestion_matrix = np.stack([
+                vectors.get(_query_key(article.subquestion or ""), topic_vector)
+                for article in usable
+            ])
+
+        scores = 0.5 * (article_matrix @ topic_vector) + 0.5 * np.einsum("ij,ij->i", article_matrix, subquestion_matrix)
+        similarity = article_matrix @ article_matrix.T
+
+        kept = []
+        for index in np.argsort(-scores, kind="stable"):
+            if kept and scores[index] < self.threshold:
+                break
+            if kept and similarity[index, kept].max() >= DUPLICATE_SIMILARITY:
+                continue
+            kept.append(index)
+
+        print(f"   🎯 Ranked {len(articles)} articles for {topic}: kept {len(kept)}, dropped {len(articles) - len(kept)}")
+        ranked = []
+        for index in kept:
+            usable[index].relevance = float(scores[index])
+            ranked.append(usable[index])
+        return ranked
+
+
+def _article_key(article: Article) -> str:
+    return f"url:{article.url}"
+
+
+def _query_key(text: str) -> str:
+    return f"query:{text}"
@@ -0,0 +1,148 @@
+"""
+Batch Module
+
+This module reads the query files run by `main.py --batch` and writes the
+manifest recording the outcome of every query. A query file is JSONL: each
+line is an object with a "query", an optional "id" and optional per-query
+overrides of the command-line options listed in BATCH_OVERRIDES, e.g.
+
+    {"id": "storage", "query": "Grid-scale storage economics", "breadth": 2, "detail": "high"}
+
+The manifest is JSONL as well, with one line appended as each query finishes.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List
+
+
+# Options a query line may override, with the type each value must have
+BATCH_OVERRIDES = {
+    "detail": str,
+    "breadth": int,
+    "max_expansions": int,
+    "topic_model": str,
+    "summary_model": str,
+    "search_provider": str,
+}
+_CHOICES = {
+    "detail": ("low", "medium", "high"),
+    "search_provider": ("exa", "tavily", "mock"),
+}
+_ID_RE = re.compile(r"[^\w.-]+")
+
+
+def _parse_query_line(data: Any, line_number: int) -> Dict[str, Any]:
+    """Validate one query line and split it into id, query and overrides."""
+    if not isinstance(data, dict):
+        raise ValueError(f"line {line_number}: expected a JSON object")
+    query = data.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError(f"line {line_number}: \"query\" must be a non-empty string")
+
+    overrides = {}
+    for key, value in data.items():
+        if key in ("id", "query"):
+            continue
+        expected = BATCH_OVERRIDES.get(key)
+        if expected is None:
+            raise ValueError(f"line {line_number}: unknown option \"{key}\" (allowed: {', '.join(BATCH_OVERRIDES)})")
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError(f"line {line_number}: \"{key}\" must be of type {expected.__name__}")
+        if key in _CHOICES and value not in _CHOICES[key]:
+            raise ValueError(f"line {line_number}: \"{key}\" must be one of {', '.join(_CHOICES[key])}")
+        if expected is int and value < 1:
+            raise ValueError(f"line {line_number}: \"{key}\" must be at least 1")
+        overrides[key] = value
+
+    # Ids end up in report filenames, so keep them filesystem-safe
+    query_id = _ID_RE.sub("_", str(data.get("id") or f"q{line_number}")).strip("_") or f"q{line_number}"
+    return {"id": query_id, "query": query.strip(), "overrides": overrides}
+
+
+def load_batch_queries(path: str) -> List[Dict[str, Any]]:
+    """
+    Read and validate a JSONL query file.
+
+    Blank lines and lines starting with "#" are skipped. Queries without an
+    "id" are named after their line number.
+
+    Args:
+        path: Path of the query file
+
+    Returns:
+        List of {"id", "query", "overrides"} dictionaries in file order
+
+    Raises:
+        ValueError: If a line is not valid JSON, has an invalid option, or
+            repeats an id
+    """
+    queries = []
+    seen_ids = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_number}: invalid JSON ({e.msg})") from e
+            query = _parse_query_line(data, line_number)
+            if query["id"] in seen_ids:
+                raise ValueError(f"line {line_number}: duplicate id \"{query['id']}\"")
+            seen_ids.add(query["id"])
+            queries.append(query)
+    if not queries:
+        raise ValueError(f"no queries found in {path}")
+    return queries
+
+
+class BatchManifest:
+    """
+    A thread-safe JSONL log of finished batch queries.
+
+    Entries are flushed as they are recorded, so the manifest of an interrupted
+    batch still lists every query that completed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Create (or truncate) the manifest file.
+
+        Args:
+            path: Path of the manifest file
+        """
+        self.path = path
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+
+    def __enter__(self) -> "BatchManifest":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """
+        Append the outcome of one query.
+
+        Args:
+            entry: JSON-serializable outcome, including a "status" of "ok" or "error"
+        """
+        with self._lock:
+            self.entries.append(entry)
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def failures(self) -> List[Dict[str, Any]]:
+        """Return the entries of queries that failed."""
+        with self._lock:
+            return [entry for entry in self.entries if entry.get("status") != "ok"]
+
+    def close(self) -> None:
+        """Close the manifest file."""
+        with self._lock:
+            self._file.close()
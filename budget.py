@@ -0,0 +1,318 @@
+"""
+Budget Module
+
+This module provides hard token, cost and wall-clock budgets for a research
+run. The LLM gateway reserves an estimate of every live call against the budget
+before sending it, so calls that would overrun a limit are refused with
+BudgetExceeded and concurrent calls cannot all pass the check together, and
+then records the call's actual usage. Each query of a batch has a budget of its
+own, selected by the "run" usage label of the calls. The pipeline also consults the budget at its loop
+boundaries and degrades gracefully instead of failing: research iterations stop
+first, then topics skip their remaining articles and expansion rounds, and a
+reserve is kept so the report can always be written.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from accounting import current_labels, estimate_cost
+
+
+# Share of the run budget the research iterations may use before synthesis must start
+RESEARCH_SHARE = 0.4
+# Share of the run budget kept back for generating the report
+REPORT_RESERVE = 0.1
+# Graph node whose LLM calls may spend the report reserve
+REPORT_NODE = "generate_report"
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised instead of making an LLM call that the budget cannot cover."""
+
+
+class BudgetController:
+    """
+    Run-wide and per-topic limits on LLM tokens, dollars and wall-clock time.
+
+    Every limit is optional; a controller without limits never asks the
+    pipeline to stop. Checks return a human-readable reason when a limit is
+    reached and None otherwise.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+        max_topic_tokens: Optional[int] = None,
+        max_topic_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            max_tokens: Maximum LLM tokens (input + output) for the whole run
+            max_cost: Maximum estimated LLM cost in USD for the whole run
+            max_seconds: Maximum wall-clock seconds for the whole run
+            max_topic_tokens: Maximum LLM tokens spent synthesizing a single topic
+            max_topic_seconds: Maximum wall-clock seconds spent synthesizing a single topic
+        """
+        self.max_tokens = max_tokens or None
+        self.max_cost = max_cost or None
+        self.max_seconds = max_seconds or None
+        self.max_topic_tokens = max_topic_tokens or None
+        self.max_topic_seconds = max_topic_seconds or None
+        self._started_at = time.monotonic()
+        self._topic_started_at: Dict[str, float] = {}
+        # Usage recorded so far, run-wide and per topic
+        self._tokens = 0
+        self._cost = 0.0
+        self._topic_tokens: Dict[str, int] = {}
+        # Estimates of the calls in flight, run-wide and per topic
+        self._reserved_tokens = 0
+        self._reserved_cost = 0.0
+        self._topic_reserved_tokens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def limited(self) -> bool:
+        """Whether any limit is configured."""
+        return any(limit is not None for limit in (
+            self.max_tokens, self.max_cost, self.max_seconds,
+            self.max_topic_tokens, self.max_topic_seconds
+        ))
+
+    def start(self) -> None:
+        """Start the run clock."""
+        with self._lock:
+            self._started_at = time.monotonic()
+            self._topic_started_at.clear()
+
+    def start_topic(self, topic: str) -> None:
+        """
+        Start the clock of one topic's synthesis.
+
+        Args:
+            topic: Topic name, matching the "topic" usage label
+        """
+        with self._lock:
+            self._topic_started_at.setdefault(topic, time.monotonic())
+
+    def elapsed(self) -> float:
+        """Return the seconds since the run started."""
+        return time.monotonic() - self._started_at
+
+    def spent_fraction(self, tokens: int = 0, cost: float = 0.0) -> float:
+        """
+        Return the largest fraction of any run-wide limit spent so far.
+
+        Args:
+            tokens: Tokens to count on top of the recorded spending
+            cost: Cost in USD to count on top of the recorded spending
+
+        Returns:
+            0.0 without run-wide limits, 1.0 or more once a limit is reached
+        """
+        fractions = [0.0]
+        if self.max_tokens is not None:
+            fractions.append((self._tokens + tokens) / self.max_tokens)
+        if self.max_cost is not None:
+            fractions.append((self._cost + cost) / self.max_cost)
+        if self.max_seconds is not None:
+            fractions.append(self.elapsed() / self.max_seconds)
+        return max(fractions)
+
+    def research_exhausted(self) -> Optional[str]:
+        """
+        Check whether further research iterations would eat into the synthesis budget.
+
+        Returns:
+            Reason to stop iterating, or None
+        """
+        spent = self.spent_fraction()
+        if spent >= RESEARCH_SHARE:
+            return f"{spent:.0%} of the run budget spent during research"
+        return None
+
+    def topic_exhausted(self, topic: Optional[str] = None) -> Optional[str]:
+        """
+        Check whether synthesis work (for a topic) should stop.
+
+        Synthesis stops when the run, counting the calls in flight, reaches its
+        limits minus the report reserve, or when the topic reaches its own limits.
+
+        Args:
+            topic: Topic name, or None to check only the run-wide limits
+
+        Returns:
+            Reason to stop, or None
+        """
+        with self._lock:
+            return self._refusal(topic, 0, 0.0, 1.0 - REPORT_RESERVE)
+
+    @contextmanager
+    def reserve(self, model: str, input_tokens: int, output_tokens: int) -> Iterator[None]:
+        """
+        Hold the estimated cost of an LLM call against the budget while it runs.
+
+        The call is attributed to the "topic" usage label of the current context.
+        Calls made by the report node may spend the report reserve; all others
+        must leave it untouched. The caller records the call's actual usage with
+        record before leaving the block.
+
+        Args:
+            model: Model the call is made with
+            input_tokens: Estimated input tokens
+            output_tokens: Estimated output tokens
+
+        Raises:
+            BudgetExceeded: If the call would overrun a limit
+        """
+        if not self.limited:
+            yield
+            return
+
+        labels = current_labels()
+        topic = labels.get("topic")
+        share = 1.0 if labels.get("node") == REPORT_NODE else 1.0 - REPORT_RESERVE
+        tokens = input_tokens + output_tokens
+        cost = estimate_cost(model, input_tokens, output_tokens) or 0.0
+        with self._lock:
+            reason = self._refusal(topic, tokens, cost, share)
+            if reason:
+                raise BudgetExceeded(reason)
+            self._reserved_tokens += tokens
+            self._reserved_cost += cost
+            if topic is not None:
+                self._topic_reserved_tokens[topic] = self._topic_reserved_tokens.get(topic, 0) + tokens
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._reserved_tokens -= tokens
+                self._reserved_cost -= cost
+                if topic is not None:
+                    self._topic_reserved_tokens[topic] -= tokens
+
+    def record(self, model: str, usage: Any) -> None:
+        """
+        Count the usage of a live call, under the "topic" usage label of the current context.
+
+        Args:
+            model: Model the call was made with
+            usage: The `usage` object of the response, or None if unavailable
+        """
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+        cost = estimate_cost(model, input_tokens, output_tokens) or 0.0
+        topic = current_labels().get("topic")
+        with self._lock:
+            self._tokens += input_tokens + output_tokens
+            self._cost += cost
+            if topic is not None:
+                self._topic_tokens[topic] = self._topic_tokens.get(topic, 0) + input_tokens + output_tokens
+
+    def _refusal(self, topic: Optional[str], tokens: int, cost: float, share: float) -> Optional[str]:
+        """
+        Return why spending, calls in flight and a new call would overrun a limit. Caller holds the lock.
+
+        Args:
+            topic: Topic of the new call, or None to check only the run-wide limits
+            tokens: Estimated tokens of the new call
+            cost: Estimated cost in USD of the new call
+            share: Fraction of the run-wide limits the call may reach
+
+        Returns:
+            Reason to stop, or None
+        """
+        spent = self.spent_fraction(self._reserved_tokens + tokens, self._reserved_cost + cost)
+        if spent >= share:
+            return f"{spent:.0%} of the run budget committed"
+        if topic is None:
+            return None
+
+        if self.max_topic_tokens is not None:
+            topic_tokens = self._topic_tokens.get(topic, 0) + self._topic_reserved_tokens.get(topic, 0) + tokens
+            if topic_tokens >= self.max_topic_tokens:
+                return f"{topic_tokens} tokens committed to topic, limit {self.max_topic_tokens}"
+        if self.max_topic_seconds is not None:
+            started_at = self._topic_started_at.get(topic)
+            if started_at is not None and time.monotonic() - started_at >= self.max_topic_seconds:
+                return f"topic time limit of {self.max_topic_seconds:.0f}s reached"
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Summarize spending against the configured limits.
+
+        Returns:
+            Dictionary of limits, spending and elapsed time
+        """
+        return {
+            "max_tokens": self.max_tokens,
+            "max_cost": self.max_cost,
+            "max_seconds": self.max_seconds,
+            "max_topic_tokens": self.max_topic_tokens,
+            "max_topic_seconds": self.max_topic_seconds,
+            "tokens": self._tokens,
+            "cost_usd": self._cost,
+            "elapsed_seconds": self.elapsed(),
+            "spent_fraction": self.spent_fraction(),
+        }
+
+
+_budget = BudgetController()
+_run_budgets: Dict[str, BudgetController] = {}
+_run_budgets_lock = threading.Lock()
+
+
+def get_budget() -> BudgetController:
+    """
+    Return the budget of the current run.
+
+    Returns:
+        The BudgetController configured for the "run" usage label of the
+        current context, or the process-wide one
+    """
+    run = current_labels().get("run")
+    if run is not None:
+        with _run_budgets_lock:
+            budget = _run_budgets.get(run)
+        if budget is not None:
+            return budget
+    return _budget
+
+
+def configure_budget(
+    max_tokens: Optional[int] = None,
+    max_cost: Optional[float] = None,
+    max_seconds: Optional[float] = None,
+    max_topic_tokens: Optional[int] = None,
+    max_topic_seconds: Optional[float] = None,
+    run: Optional[str] = None
+) -> BudgetController:
+    """
+    Replace the process-wide budget, or the budget of one run, and start its clock.
+
+    Args:
+        max_tokens: Maximum LLM tokens (input + output) for the whole run
+        max_cost: Maximum estimated LLM cost in USD for the whole run
+        max_seconds: Maximum wall-clock seconds for the whole run
+        max_topic_tokens: Maximum LLM tokens spent synthesizing a single topic
+        max_topic_seconds: Maximum wall-clock seconds spent synthesizing a single topic
+        run: Value of the "run" usage label, e.g. a batch query id, whose calls
+            the budget applies to; None for the process-wide budget
+
+    Returns:
+        The new BudgetController instance
+    """
+    global _budget
+    budget = BudgetController(max_tokens, max_cost, max_seconds, max_topic_tokens, max_topic_seconds)
+    budget.start()
+    if run is None:
+        _budget = budget
+    else:
+        with _run_budgets_lock:
+            _run_budgets[run] = budget
+    return budget
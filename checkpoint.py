@@ -0,0 +1,238 @@
+"""
+Checkpoint Module
+
+This module persists pipeline progress to local storage so long runs can be
+resumed after a crash. The full state is pickled after every graph node, and
+each finished topic synthesis is saved as soon as it completes, so a resumed
+run skips extraction, search and every topic that was already written. Saved
+steps also allow re-running the pipeline from any earlier node, e.g. to
+re-render a report without searching again.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from source_registry import SourceRegistry
+
+
+DEFAULT_CHECKPOINT_DIR = ".checkpoints"
+START_STEP = "start"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file via a temporary file and rename, so readers never see partial data."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    """
+    On-disk checkpoints of one pipeline run.
+
+    Layout under `<directory>/<run_id>/`:
+        manifest.json               ordered list of completed steps
+        steps/NNN_<node>.pkl        pipeline state after each step
+        topics/<hash>.pkl           finished topic syntheses
+        topics/sources.pkl          source registry of the finished topics
+    """
+
+    def __init__(self, run_id: str, directory: str = DEFAULT_CHECKPOINT_DIR):
+        """
+        Initialize the store, loading the manifest of an existing run if present.
+
+        Args:
+            run_id: Identifier of the run
+            directory: Root directory for all checkpoints
+        """
+        self.run_id = run_id
+        self.path = os.path.join(directory, run_id)
+        self._steps_dir = os.path.join(self.path, "steps")
+        self._topics_dir = os.path.join(self.path, "topics")
+        self._manifest_path = os.path.join(self.path, "manifest.json")
+        self._lock = threading.Lock()
+        self.steps: List[Dict[str, str]] = []
+
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                self.steps = json.load(f)["steps"]
+
+    def exists(self) -> bool:
+        """Whether any step of this run has been checkpointed."""
+        return bool(self.steps)
+
+    def _write_manifest(self) -> None:
+        """Persist the step list. Caller holds the lock."""
+        manifest = {"run_id": self.run_id, "updated_at": time.time(), "steps": self.steps}
+        _write_atomic(self._manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    def save_step(self, node: str, state: Dict[str, Any]) -> None:
+        """
+        Record that a node completed, together with the state it produced.
+
+        Args:
+            node: Graph node name, or START_STEP for the initial state
+            state: Pipeline state after the node ran
+        """
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            os.makedirs(self._steps_dir, exist_ok=True)
+            filename = f"{len(self.steps):03d}_{node}.pkl"
+            _write_atomic(os.path.join(self._steps_dir, filename), data)
+            self.steps.append({"node": node, "file": filename})
+            self._write_manifest()
+
+    def _load_step(self, index: int) -> Dict[str, Any]:
+        """Unpickle the state saved for a step."""
+        with open(os.path.join(self._steps_dir, self.steps[index]["file"]), "rb") as f:
+            return pickle.load(f)
+
+    def latest(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Return the most recently completed step.
+
+        Returns:
+            (node name, state after it), or None if nothing was checkpointed
+        """
+        with self._lock:
+            if not self.steps:
+                return None
+            return self.steps[-1]["node"], self._load_step(len(self.steps) - 1)
+
+    def rewind_to(self, node: str) -> Dict[str, Any]:
+        """
+        Discard the last run of a node and everything after it.
+
+        Args:
+            node: Graph node to re-run
+
+        Returns:
+            The state the node originally started from
+
+        Raises:
+            ValueError: If the node never completed in this run
+        """
+        with self._lock:
+            indices = [i for i, step in enumerate(self.steps) if step["node"] == node]
+            if not indices or indices[-1] == 0:
+                raise ValueError(f"Node '{node}' has no checkpoint in run {self.run_id}")
+            state = self._load_step(indices[-1] - 1)
+            self.steps = self.steps[:indices[-1]]
+            self._write_manifest()
+        return state
+
+    def _topic_path(self, topic: str) -> str:
+        digest = hashlib.sha1(topic.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._topics_dir, f"{digest}.pkl")
+
+    def save_topic(self, topic: str, result: Dict[str, Any], source_registry: SourceRegistry) -> None:
+        """
+        Save a finished topic synthesis and the source numbers known at that point.
+
+        Args:
+            topic: Topic name
+            result: Synthesis result for the topic
+            source_registry: Registry of the citation numbers shared by all topics
+        """
+        data = pickle.dumps({"topic": topic, "result": result}, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            os.makedirs(self._topics_dir, exist_ok=True)
+            _write_atomic(self._topic_path(topic), data)
+            # The registry only grows, so the latest snapshot covers every saved topic
+            _write_atomic(
+                os.path.join(self._topics_dir, "sources.pkl"),
+                pickle.dumps(source_registry, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+
+    def load_topic(self, topic: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the saved synthesis of a topic.
+
+        Args:
+            topic: Topic name
+
+        Returns:
+            The synthesis result, or None if the topic was not finished
+        """
+        path = self._topic_path(topic)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+        return saved["result"] if saved["topic"] == topic else None
+
+    def load_source_registry(self) -> Optional[SourceRegistry]:
+        """Return the source registry saved with the finished topics, if any."""
+        path = os.path.join(self._topics_dir, "sources.pkl")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def clear_topics(self) -> None:
+        """Forget all finished topic syntheses, so synthesis starts from scratch."""
+        with self._lock:
+            if not os.path.isdir(self._topics_dir):
+                return
+            for filename in os.listdir(self._topics_dir):
+                os.remove(os.path.join(self._topics_dir, filename))
+
+
+_stores: Dict[Tuple[str, str], CheckpointStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_checkpoint_store(state: Dict[str, Any]) -> Optional[CheckpointStore]:
+    """
+    Return the checkpoint store of the run described by the pipeline state.
+
+    Args:
+        state: Pipeline state containing "run_id" and optionally "checkpoint_dir"
+
+    Returns:
+        The run's CheckpointStore, or None if checkpointing is disabled
+    """
+    run_id = state.get("run_id")
+    if not run_id:
+        return None
+    key = (state.get("checkpoint_dir", DEFAULT_CHECKPOINT_DIR), run_id)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = CheckpointStore(run_id, key[0])
+        return _stores[key]
+
+
+def checkpointed_node(name: str, node: Callable) -> Callable:
+    """
+    Wrap a graph node so the state it returns is checkpointed.
+
+    Args:
+        name: Node name recorded in the manifest
+        node: Sync or async node function taking the pipeline state
+
+    Returns:
+        A node function of the same kind that saves its result before returning
+    """
+    def save(result: Dict[str, Any]) -> Dict[str, Any]:
+        store = get_checkpoint_store(result)
+        if store is not None:
+            store.save_step(name, result)
+        return result
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+            return save(await node(state))
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        return save(node(state))
+    return wrapper
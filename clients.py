@@ -0,0 +1,150 @@
+"""
+Clients Module
+
+This module owns the HTTP clients shared by every LLM and search call in the
+process. The OpenAI clients and the async search client are created once, with
+connection pool limits sized for the pipeline's concurrency and long-lived
+keep-alive connections, so a run (or a batch of runs) pays for connection setup
+and TLS handshakes once per host instead of once per node or agent. HTTP/2 is
+used when requested and the optional `h2` package is installed. The OpenAI
+clients do not retry on their own; scheduler.py retries every request.
+"""
+
+import importlib.util
+import threading
+from typing import Any, Dict, Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 40
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+
+def http2_supported() -> bool:
+    """Return whether the `h2` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class ClientRegistry:
+    """
+    Lazily created, process-wide HTTP clients with shared pool settings.
+
+    Clients are created on first use, so commands that never reach the network
+    (e.g. replaying cached responses) do not need API keys.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            max_connections: Maximum open connections per client
+            max_keepalive_connections: Maximum idle connections kept open per client
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Use HTTP/2 where the server supports it; ignored if `h2` is not installed
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_keepalive_connections, max_connections),
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and http2_supported()
+        self._openai: Optional[OpenAI] = None
+        self._async_openai: Optional[AsyncOpenAI] = None
+        self._async_http: Dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    def openai(self) -> OpenAI:
+        """Return the shared OpenAI client."""
+        with self._lock:
+            if self._openai is None:
+                self._openai = OpenAI(max_retries=0, http_client=DefaultHttpxClient(limits=self.limits, http2=self.http2))
+            return self._openai
+
+    def async_openai(self) -> AsyncOpenAI:
+        """Return the shared AsyncOpenAI client."""
+        with self._lock:
+            if self._async_openai is None:
+                self._async_openai = AsyncOpenAI(max_retries=0, http_client=DefaultAsyncHttpxClient(limits=self.limits, http2=self.http2))
+            return self._async_openai
+
+    def use_clients(self, openai_client: Any, async_openai_client: Any) -> None:
+        """
+        Hand out the given clients instead of creating OpenAI ones, e.g. the mock backends.
+
+        Args:
+            openai_client: Client returned by openai()
+            async_openai_client: Client returned by async_openai()
+        """
+        with self._lock:
+            self._openai = openai_client
+            self._async_openai = async_openai_client
+
+    def async_http(self, name: str, timeout: float = 600) -> httpx.AsyncClient:
+        """
+        Return the shared async HTTP client for a service.
+
+        Args:
+            name: Service the client is for, e.g. "exa"
+            timeout: Request timeout in seconds, used when the client is created
+
+        Returns:
+            The service's httpx.AsyncClient
+        """
+        with self._lock:
+            if name not in self._async_http:
+                self._async_http[name] = httpx.AsyncClient(limits=self.limits, http2=self.http2, timeout=timeout)
+            return self._async_http[name]
+
+
+_registry = ClientRegistry()
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """
+    Return the process-wide client registry.
+
+    Returns:
+        The shared ClientRegistry instance
+    """
+    with _registry_lock:
+        return _registry
+
+
+def configure_clients(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    http2: bool = False
+) -> ClientRegistry:
+    """
+    Replace the process-wide client registry with new pool settings.
+
+    Call this before the first request; clients handed out by the previous
+    registry keep their old settings.
+
+    Args:
+        max_connections: Maximum open connections per client
+        max_keepalive_connections: Maximum idle connections kept open per client
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Use HTTP/2 where the server supports it
+
+    Returns:
+        The new shared ClientRegistry instance
+    """
+    global _registry
+    if http2 and not http2_supported():
+        print("⚠️  HTTP/2 requested but the h2 package is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+    registry = ClientRegistry(max_connections, max_keepalive_connections, keepalive_expiry, http2)
+    with _registry_lock:
+        _registry = registry
+    return registry
@@ -0,0 +1,206 @@
+"""
+Concurrency Module
+
+This module provides the single, process-wide concurrency budget used by the
+asyncio execution path. Every async LLM and search request acquires a slot from
+the same budget, so the number of in-flight network calls is bounded in one
+place instead of by nested thread pools.
+
+It also provides the runners that let the sync and async pipelines share their
+control flow. Pipeline steps are written once as coroutines that make their LLM
+and search calls and fan out through a runner: the blocking runner makes plain
+calls on thread pools, the async runner awaits the async clients.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional
+from accounting import ContextThreadPoolExecutor
+
+
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class ConcurrencyBudget:
+    """
+    An asyncio semaphore shared by all network calls of the async pipeline.
+
+    The underlying semaphore is created lazily for the running event loop, so
+    the same budget object can be reused across separate `asyncio.run` calls.
+    """
+
+    def __init__(self, limit: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize the budget.
+
+        Args:
+            limit: Maximum number of concurrent in-flight requests
+        """
+        self.limit = limit
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore for the running loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
+
+    async def __aenter__(self) -> "ConcurrencyBudget":
+        await self._get_semaphore().acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._get_semaphore().release()
+
+
+_budget = ConcurrencyBudget()
+
+
+def get_concurrency_budget() -> ConcurrencyBudget:
+    """
+    Return the process-wide concurrency budget.
+
+    Returns:
+        The shared ConcurrencyBudget instance
+    """
+    return _budget
+
+
+def configure_concurrency(limit: int) -> ConcurrencyBudget:
+    """
+    Replace the process-wide concurrency budget with a new limit.
+
+    Args:
+        limit: Maximum number of concurrent in-flight requests
+
+    Returns:
+        The new shared ConcurrencyBudget instance
+    """
+    global _budget
+    _budget = ConcurrencyBudget(limit)
+    return _budget
+
+
+def run_blocking(coroutine: Coroutine) -> Any:
+    """
+    Run a coroutine that never suspends to completion, without an event loop.
+
+    Args:
+        coroutine: Coroutine whose awaits all go through the blocking runner
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        RuntimeError: If the coroutine awaits something that suspends
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("Coroutine suspended while run by the blocking runner")
+
+
+class BlockingRunner:
+    """
+    Runs shared pipeline coroutines with blocking calls and thread pools.
+
+    Nothing awaited through this runner suspends, so a coroutine built on it
+    finishes in a single step (see run_blocking).
+    """
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """Run a pipeline coroutine and return its result."""
+        return run_blocking(coroutine)
+
+    async def call(self, function: Callable[..., Any], async_function: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Call the blocking variant of an operation."""
+        return function(*args, **kwargs)
+
+    async def gather(
+        self,
+        coroutines: List[Coroutine],
+        max_workers: Optional[int] = None,
+        limit: Optional[int] = None,
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Run coroutines concurrently on a thread pool.
+
+        Args:
+            coroutines: Coroutines to run
+            max_workers: Threads to run them on (default: one per coroutine)
+            limit: Concurrency limit that also holds on the async path; takes
+                precedence over max_workers
+            return_exceptions: Return exceptions in place of results instead of raising
+
+        Returns:
+            Results in the order of the coroutines
+        """
+        if not coroutines:
+            return []
+        workers = max(1, min(limit or max_workers or len(coroutines), len(coroutines)))
+        with ContextThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_blocking, coroutine) for coroutine in coroutines]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+        return results
+
+
+class AsyncRunner:
+    """
+    Runs shared pipeline coroutines on the event loop.
+
+    Fan-out is bounded by the shared concurrency budget that every live call
+    acquires, so thread counts (max_workers) do not apply.
+    """
+
+    def run(self, coroutine: Coroutine) -> Coroutine:
+        """Return a pipeline coroutine for the caller to await."""
+        return coroutine
+
+    async def call(self, function: Callable[..., Any], async_function: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Await the async variant of an operation."""
+        return await async_function(*args, **kwargs)
+
+    async def gather(
+        self,
+        coroutines: List[Coroutine],
+        max_workers: Optional[int] = None,
+        limit: Optional[int] = None,
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Run coroutines concurrently as tasks.
+
+        Args:
+            coroutines: Coroutines to run
+            max_workers: Ignored; see the class docstring
+            limit: Maximum number of coroutines running at once
+            return_exceptions: Return exceptions in place of results instead of raising
+
+        Returns:
+            Results in the order of the coroutines
+        """
+        if limit:
+            semaphore = asyncio.Semaphore(max(1, limit))
+
+            async def bounded(coroutine: Coroutine) -> Any:
+                async with semaphore:
+                    return await coroutine
+
+            coroutines = [bounded(coroutine) for coroutine in coroutines]
+        return list(await asyncio.gather(*coroutines, return_exceptions=return_exceptions))
+
+
+blocking_runner = BlockingRunner()
+async_runner = AsyncRunner()
@@ -0,0 +1,163 @@
+"""
+Dedup Module
+
+This module detects near-duplicate articles, such as the same story syndicated
+under different URLs, with word shingling and MinHash locality-sensitive
+hashing. Articles are indexed as search results arrive, so duplicates are
+skipped before they cost an LLM integration call or a citation number.
+"""
+
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set
+import numpy as np
+
+
+# Mersenne prime used as the modulus of the MinHash permutations
+_PRIME = np.uint64((1 << 31) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+class NearDuplicateIndex:
+    """
+    A thread-safe MinHash LSH index over article text.
+
+    Each article is reduced to a signature of `num_perm` MinHash values, split
+    into `bands` bands. Articles sharing any band are candidates, and a
+    candidate is a duplicate when the fraction of equal signature values (an
+    estimate of the Jaccard similarity of their shingle sets) reaches
+    `threshold`.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 32, shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold: Estimated Jaccard similarity at which two texts are duplicates
+            num_perm: Number of MinHash permutations per signature
+            bands: Number of LSH bands; must divide num_perm
+            shingle_size: Number of consecutive words per shingle
+            seed: Seed for the permutation coefficients
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        self._signatures: Dict[str, Optional[np.ndarray]] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def _shingles(self, text: str) -> Set[int]:
+        """Hash the overlapping word n-grams of a text."""
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return set()
+        if len(words) < self.shingle_size:
+            return {zlib.crc32(" ".join(words).encode("utf-8"))}
+        return {
+            zlib.crc32(" ".join(words[i:i + self.shingle_size]).encode("utf-8"))
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Article text
+
+        Returns:
+            Array of num_perm MinHash values, or None if the text has no words
+        """
+        shingles = self._shingles(text)
+        if not shingles:
+            return None
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)) % _PRIME
+        # (a * x + b) mod p for every permutation and shingle; a, x < 2^31 keeps this within uint64
+        hashed = (self._a[:, None] * values[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _find(self, signature: np.ndarray, band_keys: List[bytes]) -> Optional[str]:
+        """Return an indexed key whose signature matches closely enough. Caller holds the lock."""
+        checked = set()
+        for band, band_key in enumerate(band_keys):
+            for candidate in self._buckets[band].get(band_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= self.threshold:
+                    return candidate
+        return None
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        """
+        Index a text unless it is already present or duplicates an indexed one.
+
+        Args:
+            key: Identity of the text, typically the article URL
+            text: Article text
+
+        Returns:
+            None if the text was new and has been indexed; otherwise the key it
+            duplicates (the key itself if it was already indexed)
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature) if signature is not None else []
+
+        with self._lock:
+            if key in self._signatures:
+                return key
+            if signature is not None:
+                duplicate = self._find(signature, band_keys)
+                if duplicate is not None:
+                    return duplicate
+                for band, band_key in enumerate(band_keys):
+                    self._buckets[band].setdefault(band_key, []).append(key)
+            self._signatures[key] = signature
+        return None
+
+
+def drop_duplicate_articles(articles: Iterable[Any], dedup_index: NearDuplicateIndex, seen_urls: Set[str]) -> List[Any]:
+    """
+    Keep the articles that are new to one topic.
+
+    An article is dropped when its URL was already seen in the topic, or when
+    its content duplicates an indexed article under another URL. Finding an
+    indexed URL again is not a duplicate, so one source may serve several topics.
+
+    Args:
+        articles: Articles with `url` and `text` attributes, e.g. models.Article
+        dedup_index: Index shared by all topics of the run; kept articles are added to it
+        seen_urls: URLs the topic already has; kept URLs are added to it
+
+    Returns:
+        The kept articles, in their original order
+    """
+    kept = []
+    for article in articles:
+        duplicate_of = dedup_index.add(article.url, article.text or "")
+        if article.url in seen_urls or duplicate_of not in (None, article.url):
+            continue
+        seen_urls.add(article.url)
+        kept.append(article)
+    return kept
@@ -0,0 +1,295 @@
+"""
+Event Log Module
+
+This module records what happened during a run without keeping its payloads in
+the pipeline state. Every node appends a small, structured event to a bounded
+log; search events refer to their question and results by id, and the results
+themselves are written to a content-addressed blob store on disk, from which
+they are only read back when someone asks for them. The state that LangGraph
+passes between nodes and that checkpoints pickle therefore stays small however
+many questions and iterations a run has.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from models import SearchResult
+
+
+DEFAULT_BLOB_DIR = os.path.join(".cache", "blobs")
+DEFAULT_MAX_EVENTS = 1000
+
+
+def question_id(question: str) -> str:
+    """Return the stable id of a question used in events."""
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()[:12]
+
+
+class BlobStore:
+    """
+    A file-backed store of immutable text blobs addressed by their SHA-256.
+
+    Storing the same content twice writes it once, so results returned for
+    several questions, iterations or runs share a file.
+    """
+
+    def __init__(self, directory: str = DEFAULT_BLOB_DIR):
+        """
+        Initialize the blob store.
+
+        Args:
+            directory: Directory where blobs are stored
+        """
+        self.directory = directory
+
+    def put(self, data: str) -> str:
+        """
+        Store a blob unless it already exists.
+
+        Args:
+            data: Content to store
+
+        Returns:
+            The blob id (hex SHA-256 of the content)
+        """
+        encoded = data.encode("utf-8")
+        blob_id = hashlib.sha256(encoded).hexdigest()
+        path = self._path_for(blob_id)
+        if os.path.exists(path):
+            return blob_id
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write atomically so concurrent readers never see a partial blob
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Blob store write error: {e}")
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[str]:
+        """
+        Read a blob.
+
+        Args:
+            blob_id: Id returned by put
+
+        Returns:
+            The blob's content, or None if it is not stored
+        """
+        try:
+            with open(self._path_for(blob_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def loader(self, blob_id: str) -> Callable[[], str]:
+        """
+        Return a function that reads a blob when called, e.g. for Article.text_loader.
+
+        Args:
+            blob_id: Id returned by put
+
+        Returns:
+            Function returning the blob's content, or "" if it is missing
+        """
+        return lambda: self.get(blob_id) or ""
+
+    def _path_for(self, blob_id: str) -> str:
+        """Return the file path for a blob, sharded by its first two characters."""
+        return os.path.join(self.directory, blob_id[:2], blob_id)
+
+
+_stores: Dict[str, BlobStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_blob_store(directory: str = DEFAULT_BLOB_DIR) -> BlobStore:
+    """
+    Return the shared blob store for a directory, creating it if needed.
+
+    Args:
+        directory: Directory where blobs are stored
+
+    Returns:
+        The shared BlobStore instance
+    """
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = BlobStore(directory)
+        return _stores[key]
+
+
+class EventLog:
+    """
+    A bounded log of structured pipeline events.
+
+    Each event is a small dictionary with a "kind" and kind-specific fields.
+    Once `max_events` events are stored the oldest are dropped and counted in
+    `dropped`. Question texts are kept once per question in `questions`, so
+    events can refer to them by id.
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Initialize the event log.
+
+        Args:
+            max_events: Number of most recent events kept
+        """
+        self.events: deque = deque(maxlen=max(1, max_events))
+        self.questions: Dict[str, str] = {}
+        self.dropped = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.events)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def record(self, kind: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Append an event.
+
+        Args:
+            kind: Event kind, e.g. "search" or "report"
+            **fields: JSON-serializable event fields
+
+        Returns:
+            The recorded event
+        """
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        event = {"kind": kind, **fields}
+        self.events.append(event)
+        return event
+
+    def question(self, question: str) -> str:
+        """Remember a question's text and return its id."""
+        qid = question_id(question)
+        self.questions.setdefault(qid, question)
+        return qid
+
+    def of_kind(self, kind: str) -> List[Dict[str, Any]]:
+        """Return the stored events of one kind, oldest first."""
+        return [event for event in self.events if event["kind"] == kind]
+
+    def extend(self, other: "EventLog") -> None:
+        """
+        Append the events of another log, e.g. one kept by a per-topic pipeline.
+
+        Args:
+            other: Log whose events and questions are added to this one
+        """
+        self.questions.update(other.questions)
+        self.dropped += other.dropped
+        for event in other.events:
+            self.record(**event)
+
+
+def get_event_log(state: Dict[str, Any]) -> EventLog:
+    """
+    Return the event log of a run, creating it for states saved without one.
+
+    Args:
+        state: Pipeline state
+
+    Returns:
+        The run's EventLog
+    """
+    if not isinstance(state.get("events"), EventLog):
+        state["events"] = EventLog(state.get("max_events", DEFAULT_MAX_EVENTS))
+    return state["events"]
+
+
+def _blob_store(state: Dict[str, Any]) -> BlobStore:
+    return get_blob_store(state.get("blob_dir", DEFAULT_BLOB_DIR))
+
+
+def log_event(state: Dict[str, Any], kind: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Append an event to the run's log.
+
+    Args:
+        state: Pipeline state
+        kind: Event kind
+        **fields: JSON-serializable event fields
+
+    Returns:
+        The recorded event
+    """
+    return get_event_log(state).record(kind, **fields)
+
+
+def log_search(state: Dict[str, Any], question: str, results: Any) -> Dict[str, Any]:
+    """
+    Record a search, spilling its results to the blob store.
+
+    Args:
+        state: Pipeline state
+        question: The question that was searched
+        results: SearchResults returned for the question
+
+    Returns:
+        The recorded event, referring to the question and results by id
+    """
+    events = get_event_log(state)
+    blobs = _blob_store(state)
+    result_ids = [
+        blobs.put(json.dumps(result.to_dict(), ensure_ascii=False))
+        for result in (results.results if results else [])
+    ]
+    return events.record(
+        "search",
+        iteration=state.get("current_iteration", 1),
+        question_id=events.question(question),
+        result_ids=result_ids
+    )
+
+
+def log_search_error(state: Dict[str, Any], question: str, error: Exception) -> Dict[str, Any]:
+    """
+    Record a failed search.
+
+    Args:
+        state: Pipeline state
+        question: The question that was searched
+        error: The exception raised by the search
+
+    Returns:
+        The recorded event
+    """
+    events = get_event_log(state)
+    return events.record(
+        "search_error",
+        iteration=state.get("current_iteration", 1),
+        question_id=events.question(question),
+        provider=state.get("search_provider", "exa"),
+        error=str(error)
+    )
+
+
+def load_search_results(state: Dict[str, Any], event: Dict[str, Any]) -> List[SearchResult]:
+    """
+    Read the results of a search event back from the blob store.
+
+    Args:
+        state: Pipeline state whose blob directory holds the results
+        event: A "search" event
+
+    Returns:
+        The event's results still present in the store, in their original order
+    """
+    blobs = _blob_store(state)
+    results = []
+    for result_id in event.get("result_ids", []):
+        data = blobs.get(result_id)
+        if data is not None:
+            results.append(SearchResult.from_dict(json.loads(data)))
+    return results
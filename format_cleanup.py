@@ -0,0 +1,94 @@
+"""
+Format Cleanup Module
+
+This module provides a rule-based, local alternative to the
+CLEAN_ACADEMIC_FORMATTING_PROMPT pass. It strips academic structure (labelled
+sections, numbered headings, bold titles, reference lists) and normalizes
+headings, bullets and citation syntax without an LLM call.
+"""
+
+import re
+
+
+# Section labels that should never appear inside a topic section
+_ACADEMIC_LABELS = (
+    "abstract", "introduction", "background", "method", "methods", "methodology",
+    "results", "discussion", "conclusion", "conclusions", "summary", "overview",
+)
+_REFERENCE_LABELS = ("references", "citations", "sources", "bibliography", "works cited")
+
+_LABEL_PATTERN = "|".join(re.escape(label) for label in _ACADEMIC_LABELS)
+_REFERENCE_PATTERN = "|".join(re.escape(label) for label in _REFERENCE_LABELS)
+
+# "## References", "**Sources:**", "Citations:" on a line of their own
+_REFERENCE_HEADER_RE = re.compile(
+    rf"^\s*(?:#+\s*)?(?:\*\*|__)?\s*(?:{_REFERENCE_PATTERN})\s*:?\s*(?:\*\*|__)?\s*:?\s*$",
+    re.IGNORECASE
+)
+# "Introduction:", "## 2. Methods", "**Conclusion**" on a line of their own
+_ACADEMIC_HEADER_RE = re.compile(
+    rf"^\s*(?:#+\s*)?(?:\*\*|__)?\s*(?:\d+(?:\.\d+)*\.?\s+)?(?:{_LABEL_PATTERN})\s*:?\s*(?:\*\*|__)?\s*:?\s*$",
+    re.IGNORECASE
+)
+# "Introduction: text..." - a label prefixing running text
+_ACADEMIC_PREFIX_RE = re.compile(
+    rf"^(\s*)(?:\*\*|__)?(?:{_LABEL_PATTERN})\s*:\s*(?:\*\*|__)?\s*(?=\S)",
+    re.IGNORECASE
+)
+# A bold title standing alone on its line, e.g. "**Market Overview**"
+_BOLD_TITLE_RE = re.compile(r"^\s*(?:\*\*|__)([^*_\n]{1,120})(?:\*\*|__)\s*:?\s*$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET_RE = re.compile(r"^(\s*)[•*+]\s+")
+_MULTI_CITATION_RE = re.compile(r"\[\s*(\d+(?:\s*[,;]\s*\d+)+)\s*\]")
+_SPACED_CITATION_RE = re.compile(r"\[\s+(\d+)\s*\]|\[\s*(\d+)\s+\]")
+_SOURCE_CITATION_RE = re.compile(r"[\[(]\s*(?:source|ref\.?)\s*#?\s*(\d+)\s*[\])]", re.IGNORECASE)
+
+
+def _normalize_citations(line: str) -> str:
+    """Rewrite citation variants such as "[1, 2]" or "(Source 3)" to the "[n]" form."""
+    line = _SOURCE_CITATION_RE.sub(lambda m: f"[{m.group(1)}]", line)
+    line = _SPACED_CITATION_RE.sub(lambda m: f"[{m.group(1) or m.group(2)}]", line)
+    line = _MULTI_CITATION_RE.sub(
+        lambda m: "".join(f"[{n}]" for n in re.split(r"\s*[,;]\s*", m.group(1))),
+        line
+    )
+    return line
+
+
+def clean_academic_formatting_local(content: str) -> str:
+    """
+    Remove academic formatting from a topic section using local rules.
+
+    This mirrors the requirements of CLEAN_ACADEMIC_FORMATTING_PROMPT: labelled
+    sections, numbered section headings, stand-alone bold titles and trailing
+    reference lists are removed, while in-text citations are kept (normalized
+    to "[n]"). Topic-specific markdown headings are kept but demoted to "###"
+    so they nest under the report's "##" topic headings.
+
+    Args:
+        content: Section text to clean
+
+    Returns:
+        The cleaned section text
+    """
+    cleaned_lines = []
+    for line in content.splitlines():
+        # Everything after a reference list header is the list itself
+        if _REFERENCE_HEADER_RE.match(line):
+            break
+        if _ACADEMIC_HEADER_RE.match(line) or _BOLD_TITLE_RE.match(line):
+            continue
+
+        line = _ACADEMIC_PREFIX_RE.sub(r"\1", line)
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            line = f"### {heading.group(2).strip()}"
+
+        line = _BULLET_RE.sub(r"\1- ", line)
+        line = _normalize_citations(line)
+        cleaned_lines.append(line.rstrip())
+
+    cleaned = "\n".join(cleaned_lines)
+    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
+    return cleaned.strip()
@@ -0,0 +1,666 @@
+"""
+LLM Gateway Module
+
+This module routes every OpenAI Responses API call in the pipeline through a
+single shared gateway. Requests are hashed deterministically and their outputs
+memoized in a local SQLite store, so re-running a report after a crash or a
+formatting-only change does not pay for identical calls again. A read-only
+replay mode serves exclusively from the store for reproducible benchmark runs.
+Live calls are paced, concurrency-limited and retried per model by the request
+scheduler in scheduler.py. Before a live call is sent, its estimated cost is
+reserved against the run budget in budget.py, which refuses calls it cannot
+cover. Every call, live or cached, is recorded by the usage tracker in
+accounting.py.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Type
+from openai import OpenAI, AsyncOpenAI
+from pydantic import BaseModel
+from scheduler import get_scheduler
+from accounting import get_usage_tracker
+from budget import get_budget
+from clients import get_client_registry
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+CACHE_MODES = ("readwrite", "replay", "off")
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+# Rough characters per token, used to estimate a call before it is sent
+CHARS_PER_TOKEN = 4
+# Output tokens assumed for a call without max_output_tokens, at least and relative to its input
+MIN_OUTPUT_TOKENS = 256
+OUTPUT_TOKENS_PER_INPUT_TOKEN = 0.5
+
+
+def _scheduler_key(kwargs: Dict[str, Any]) -> str:
+    """Return the request scheduler key of a Responses API call: one per model."""
+    return f"openai:{kwargs.get('model', '')}"
+
+
+def _estimate_tokens(kwargs: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Estimate the input and output tokens of a Responses API call for the budget.
+
+    Integration and cleanup prompts rewrite the content they are given, so the
+    output is assumed to be a fixed share of the input unless max_output_tokens caps it.
+    """
+    text = kwargs.get("input", "")
+    if not isinstance(text, str):
+        text = json.dumps(text, default=str)
+    input_tokens = len(text) // CHARS_PER_TOKEN + 1
+    output_tokens = kwargs.get("max_output_tokens") or max(MIN_OUTPUT_TOKENS, int(input_tokens * OUTPUT_TOKENS_PER_INPUT_TOKEN))
+    return input_tokens, output_tokens
+
+
+def _embedding_usage(response: Any) -> Any:
+    """Express embeddings usage (prompt tokens only) in the Responses API shape."""
+    usage = getattr(response, "usage", None)
+    return SimpleNamespace(input_tokens=getattr(usage, "prompt_tokens", 0) or 0, output_tokens=0)
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a request has no cached response."""
+
+
+class CachedResponse:
+    """Minimal stand-in for an OpenAI response that was served from the cache."""
+
+    def __init__(self, output_text: str, output_parsed: Optional[BaseModel] = None):
+        self.output_text = output_text
+        self.output_parsed = output_parsed
+        self.usage = None
+
+
+class LLMResponseCache:
+    """
+    A SQLite-backed store of LLM outputs keyed by request hash.
+
+    Entries record their last access time, and once the store grows past
+    max_entries the least recently used rows are deleted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 20000):
+        """
+        Initialize the response cache, creating the database if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            max_entries: Maximum number of responses kept in the store
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, output_text TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached output.
+
+        Args:
+            key: Request hash
+
+        Returns:
+            The cached output text, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output_text FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return row[0]
+
+    def set(self, key: str, output_text: str) -> None:
+        """
+        Store an output, evicting least recently used rows when over capacity.
+
+        Args:
+            key: Request hash
+            output_text: Output text to store
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, output_text, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, output_text, now, now)
+            )
+            self._writes_since_eviction += 1
+            # Counting rows on every write is wasteful, so only check periodically
+            if self._writes_since_eviction >= 100:
+                self._writes_since_eviction = 0
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Delete the least recently used rows beyond max_entries. Caller holds the lock."""
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+
+
+class _Responses:
+    """Exposes the gateway with the same `responses.create/parse` shape as the OpenAI client."""
+
+    def __init__(self, gateway: "LLMGateway"):
+        self._gateway = gateway
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._gateway.create(**kwargs)
+
+    def parse(self, **kwargs: Any) -> Any:
+        return self._gateway.parse(**kwargs)
+
+    def stream(self, **kwargs: Any) -> Iterator[str]:
+        return self._gateway.stream(**kwargs)
+
+
+class _AsyncResponses:
+    """Exposes the gateway with the same `responses.create/parse` shape as the AsyncOpenAI client."""
+
+    def __init__(self, gateway: "LLMGateway"):
+        self._gateway = gateway
+
+    async def create(self, **kwargs: Any) -> Any:
+        return await self._gateway.acreate(**kwargs)
+
+    async def parse(self, **kwargs: Any) -> Any:
+        return await self._gateway.aparse(**kwargs)
+
+    def stream(self, **kwargs: Any) -> AsyncIterator[str]:
+        return self._gateway.astream(**kwargs)
+
+
+class LLMGateway:
+    """
+    Shared entry point for all LLM calls in the pipeline.
+
+    The gateway is a drop-in replacement for an OpenAI client as far as the
+    pipeline is concerned: callers use `gateway.responses.create(...)` and
+    `gateway.responses.parse(...)`, or `gateway.aresponses` for the asyncio
+    path, which bounds live calls by the shared concurrency budget. Unlike the
+    OpenAI client, `responses.stream(...)` directly iterates output text
+    deltas rather than returning a stream manager. Callers may
+    pass `prompt_name` to attribute the call's usage to a prompt template; it is
+    not sent to the API. Depending on the cache mode, responses are
+    served from and written to the local store ("readwrite"), served only from
+    the store ("replay"), or always fetched live ("off").
+    """
+
+    def __init__(
+        self,
+        client: Optional[OpenAI] = None,
+        mode: str = "readwrite",
+        cache_path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = 20000
+    ):
+        """
+        Initialize the gateway.
+
+        Args:
+            client: OpenAI client to use for live calls; taken from the shared
+                client registry on first use if omitted
+            mode: Cache mode, one of "readwrite", "replay" or "off"
+            cache_path: Path to the SQLite response store
+            max_entries: Maximum number of cached responses
+        """
+        self._client = client
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._client_lock = threading.Lock()
+        self._cache = None
+        self.mode = "off"
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.responses = _Responses(self)
+        self.aresponses = _AsyncResponses(self)
+        self.configure(mode=mode)
+
+    @property
+    def client(self) -> OpenAI:
+        """The live OpenAI client, created on first use so replay mode works offline."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = get_client_registry().openai()
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """The live AsyncOpenAI client, created on first use."""
+        if self._async_client is None:
+            with self._client_lock:
+                if self._async_client is None:
+                    self._async_client = get_client_registry().async_openai()
+        return self._async_client
+
+    def configure(
+        self,
+        mode: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        max_entries: Optional[int] = None
+    ) -> None:
+        """
+        Change the cache configuration of the gateway.
+
+        Args:
+            mode: Cache mode, one of "readwrite", "replay" or "off"
+            cache_path: Path to the SQLite response store
+            max_entries: Maximum number of cached responses
+
+        Raises:
+            ValueError: If the cache mode is not supported
+        """
+        mode = mode or self.mode
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported LLM cache mode: {mode}")
+
+        if cache_path is not None and cache_path != self.cache_path:
+            # Reopen the store lazily at the new location
+            self._cache = None
+        self.cache_path = cache_path or self.cache_path
+        self.max_entries = max_entries or self.max_entries
+        self.mode = mode
+        if self._cache is not None:
+            self._cache.max_entries = self.max_entries
+
+    def _get_cache(self) -> Optional[LLMResponseCache]:
+        """Return the response store, opening it on first use; None when caching is off."""
+        if self.mode == "off":
+            return None
+        if self._cache is None:
+            with self._client_lock:
+                if self._cache is None:
+                    self._cache = LLMResponseCache(self.cache_path, self.max_entries)
+        return self._cache
+
+    def make_key(self, kind: str, kwargs: Dict[str, Any], text_format: Optional[Type[BaseModel]] = None) -> str:
+        """
+        Hash a request into a deterministic cache key.
+
+        Args:
+            kind: Either "create" or "parse"
+            kwargs: Keyword arguments of the Responses API call
+            text_format: Pydantic model used for structured output, if any
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = {
+            "kind": kind,
+            "request": kwargs,
+            "schema": text_format.model_json_schema() if text_format is not None else None,
+        }
+        serialized = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def create(self, **kwargs: Any) -> Any:
+        """
+        Call `responses.create`, serving from the cache when possible.
+
+        Args:
+            **kwargs: Arguments for the Responses API (model, input, ...) and an optional prompt_name
+
+        Returns:
+            The OpenAI response, or a CachedResponse on a cache hit
+
+        Raises:
+            LLMCacheMiss: In replay mode, when the request is not cached
+            BudgetExceeded: When the run budget cannot cover a live call
+        """
+        prompt_name = kwargs.pop("prompt_name", None)
+        key = self.make_key("create", kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            self._record(kwargs.get("model", ""), None, 0.0, prompt_name, cached=True)
+            return CachedResponse(cached)
+
+        with get_budget().reserve(kwargs.get("model", ""), *_estimate_tokens(kwargs)):
+            started = time.perf_counter()
+            response = get_scheduler().call(_scheduler_key(kwargs), lambda: self.client.responses.create(**kwargs))
+            self._record(kwargs.get("model", ""), getattr(response, "usage", None), time.perf_counter() - started, prompt_name)
+        self._store(key, response.output_text)
+        return response
+
+    def parse(self, text_format: Type[BaseModel], **kwargs: Any) -> Any:
+        """
+        Call `responses.parse`, serving from the cache when possible.
+
+        Args:
+            text_format: Pydantic model describing the structured output
+            **kwargs: Arguments for the Responses API (model, input, ...) and an optional prompt_name
+
+        Returns:
+            The OpenAI response, or a CachedResponse on a cache hit
+
+        Raises:
+            LLMCacheMiss: In replay mode, when the request is not cached
+            BudgetExceeded: When the run budget cannot cover a live call
+        """
+        prompt_name = kwargs.pop("prompt_name", None)
+        key = self.make_key("parse", kwargs, text_format)
+        cached = self._lookup(key)
+        if cached is not None:
+            self._record(kwargs.get("model", ""), None, 0.0, prompt_name, cached=True)
+            return CachedResponse(cached, text_format.model_validate_json(cached))
+
+        with get_budget().reserve(kwargs.get("model", ""), *_estimate_tokens(kwargs)):
+            started = time.perf_counter()
+            response = get_scheduler().call(
+                _scheduler_key(kwargs),
+                lambda: self.client.responses.parse(text_format=text_format, **kwargs)
+            )
+            self._record(kwargs.get("model", ""), getattr(response, "usage", None), time.perf_counter() - started, prompt_name)
+        if response.output_parsed is not None:
+            self._store(key, response.output_parsed.model_dump_json())
+        return response
+
+    async def acreate(self, **kwargs: Any) -> Any:
+        """
+        Async variant of create, bounded by the shared concurrency budget.
+
+        Args:
+            **kwargs: Arguments for the Responses API (model, input, ...) and an optional prompt_name
+
+        Returns:
+            The OpenAI response, or a CachedResponse on a cache hit
+
+        Raises:
+            LLMCacheMiss: In replay mode, when the request is not cached
+            BudgetExceeded: When the run budget cannot cover a live call
+        """
+        prompt_name = kwargs.pop("prompt_name", None)
+        key = self.make_key("create", kwargs)
+        cached = await self._alookup(key)
+        if cached is not None:
+            self._record(kwargs.get("model", ""), None, 0.0, prompt_name, cached=True)
+            return CachedResponse(cached)
+
+        with get_budget().reserve(kwargs.get("model", ""), *_estimate_tokens(kwargs)):
+            started = time.perf_counter()
+            response = await get_scheduler().acall(_scheduler_key(kwargs), lambda: self.async_client.responses.create(**kwargs))
+            self._record(kwargs.get("model", ""), getattr(response, "usage", None), time.perf_counter() - started, prompt_name)
+        await self._astore(key, response.output_text)
+        return response
+
+    async def aparse(self, text_format: Type[BaseModel], **kwargs: Any) -> Any:
+        """
+        Async variant of parse, bounded by the shared concurrency budget.
+
+        Args:
+            text_format: Pydantic model describing the structured output
+            **kwargs: Arguments for the Responses API (model, input, ...) and an optional prompt_name
+
+        Returns:
+            The OpenAI response, or a CachedResponse on a cache hit
+
+        Raises:
+            LLMCacheMiss: In replay mode, when the request is not cached
+            BudgetExceeded: When the run budget cannot cover a live call
+        """
+        prompt_name = kwargs.pop("prompt_name", None)
+        key = self.make_key("parse", kwargs, text_format)
+        cached = await self._alookup(key)
+        if cached is not None:
+            self._record(kwargs.get("model", ""), None, 0.0, prompt_name, cached=True)
+            return CachedResponse(cached, text_format.model_validate_json(cached))
+
+        with get_budget().reserve(kwargs.get("model", ""), *_estimate_tokens(kwargs)):
+            started = time.perf_counter()
+            response = await get_scheduler().acall(
+                _scheduler_key(kwargs),
+                lambda: self.async_client.responses.parse(text_format=text_format, **kwargs)
+            )
+            self._record(kwargs.get("model", ""), getattr(response, "usage", None), time.perf_counter() - started, prompt_name)
+        if response.output_parsed is not None:
+            await self._astore(key, response.output_parsed.model_dump_json())
+        return response
+
+    def stream(self, **kwargs: Any) -> Iterator[str]:
+        """
+        Call `responses.stream`, yielding output text as it is generated.
+
+        Streamed and non-streamed calls with the same arguments share a cache
+        entry; a cache hit yields the whole cached text at once.
+
+        Args:
+            **kwargs: Arguments for the Responses API (model, input, ...) and an optional prompt_name
+
+        Yields:
+            Output text deltas
+
+        Raises:
+            LLMCacheMiss: In replay mode, when the request is not cached
+            BudgetExceeded: When the run budget cannot cover a live call
+        """
+        prompt_name = kwargs.pop("prompt_name", None)
+        key = self.make_key("create", kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            self._record(kwargs.get("model", ""), None, 0.0, prompt_name, cached=True)
+            yield cached
+            return
+
+        scheduler = get_scheduler()
+        scheduler_key = _scheduler_key(kwargs)
+        with get_budget().reserve(kwargs.get("model", ""), *_estimate_tokens(kwargs)):
+            started = time.perf_counter()
+            chunks = []
+            attempt = 0
+            while True:
+                try:
+                    with scheduler.slot(scheduler_key):
+                        with self.client.responses.stream(**kwargs) as stream:
+                            for event in stream:
+                                if event.type == "response.output_text.delta":
+                                    chunks.append(event.delta)
+                                    yield event.delta
+                            response = stream.get_final_response()
+                    break
+                except Exception as e:
+                    # Text already handed to the caller cannot be taken back, so only retry before the first delta
+                    delay = None if chunks else scheduler.retry_delay(scheduler_key, e, attempt)
+                    if delay is None:
+                        raise
+                time.sleep(delay)
+                attempt += 1
+            self._record(kwargs.get("model", ""), getattr(response, "usage", None), time.perf_counter() - started, prompt_name)
+        self._store(key, "".join(chunks))
+
+    async def astream(self, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Async variant of stream, holding a concurrency slot until the stream ends.
+
+        Args:
+            **kwargs: Arguments for the Responses API (model, input, ...) and an optional prompt_name
+
+        Yields:
+            Output text deltas
+
+        Raises:
+            LLMCacheMiss: In replay mode, when the request is not cached
+            BudgetExceeded: When the run budget cannot cover a live call
+        """
+        prompt_name = kwargs.pop("prompt_name", None)
+        key = self.make_key("create", kwargs)
+        cached = await self._alookup(key)
+        if cached is not None:
+            self._record(kwargs.get("model", ""), None, 0.0, prompt_name, cached=True)
+            yield cached
+            return
+
+        scheduler = get_scheduler()
+        scheduler_key = _scheduler_key(kwargs)
+        with get_budget().reserve(kwargs.get("model", ""), *_estimate_tokens(kwargs)):
+            started = time.perf_counter()
+            chunks = []
+            attempt = 0
+            while True:
+                try:
+                    async with scheduler.aslot(scheduler_key):
+                        async with self.async_client.responses.stream(**kwargs) as stream:
+                            async for event in stream:
+                                if event.type == "response.output_text.delta":
+                                    chunks.append(event.delta)
+                                    yield event.delta
+                            response = await stream.get_final_response()
+                    break
+                except Exception as e:
+                    delay = None if chunks else scheduler.retry_delay(scheduler_key, e, attempt)
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            self._record(kwargs.get("model", ""), getattr(response, "usage", None), time.perf_counter() - started, prompt_name)
+        await self._astore(key, "".join(chunks))
+
+    def embed(self, texts: List[str], model: str = DEFAULT_EMBEDDING_MODEL) -> List[List[float]]:
+        """
+        Embed a batch of texts with the embeddings API.
+        
+        Embeddings are not stored in the response cache; callers cache them by
+        the identity of what they embed (see article_ranker.py).
+        
+        Args:
+            texts: Texts to embed
+            model: Embedding model name
+            
+        Returns:
+            One embedding vector per text, in input order
+        """
+        with get_budget().reserve(model, sum(len(text) for text in texts) // CHARS_PER_TOKEN + 1, 0):
+            started = time.perf_counter()
+            response = get_scheduler().call(f"openai:{model}", lambda: self.client.embeddings.create(model=model, input=texts))
+            self._record(model, _embedding_usage(response), time.perf_counter() - started, "EMBEDDINGS")
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def aembed(self, texts: List[str], model: str = DEFAULT_EMBEDDING_MODEL) -> List[List[float]]:
+        """
+        Async variant of embed, bounded by the shared concurrency budget.
+        
+        Args:
+            texts: Texts to embed
+            model: Embedding model name
+            
+        Returns:
+            One embedding vector per text, in input order
+        """
+        with get_budget().reserve(model, sum(len(text) for text in texts) // CHARS_PER_TOKEN + 1, 0):
+            started = time.perf_counter()
+            response = await get_scheduler().acall(f"openai:{model}", lambda: self.async_client.embeddings.create(model=model, input=texts))
+            self._record(model, _embedding_usage(response), time.perf_counter() - started, "EMBEDDINGS")
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _record(
+        self,
+        model: str,
+        usage: Any,
+        latency: float,
+        prompt_name: Optional[str],
+        cached: bool = False
+    ) -> None:
+        """Report a call's token usage and latency to the usage tracker, and a live call's usage to the run budget."""
+        get_usage_tracker().record(
+            model=model,
+            usage=usage,
+            latency=latency,
+            prompt=prompt_name,
+            cached=cached
+        )
+        if not cached:
+            get_budget().record(model, usage)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Return a cached output, raising in replay mode when it is missing."""
+        cache = self._get_cache()
+        if cache is None:
+            return None
+        cached = cache.get(key)
+        if cached is None and self.mode == "replay":
+            raise LLMCacheMiss(f"No cached LLM response for request {key[:12]} (replay mode)")
+        return cached
+
+    def _store(self, key: str, output_text: str) -> None:
+        """Write an output to the cache unless caching is off or read-only."""
+        cache = self._get_cache()
+        if cache is not None and self.mode == "readwrite":
+            cache.set(key, output_text)
+
+    async def _alookup(self, key: str) -> Optional[str]:
+        """Async variant of _lookup, reading the SQLite cache off the event loop."""
+        if self.mode == "off":
+            return None
+        return await asyncio.to_thread(self._lookup, key)
+
+    async def _astore(self, key: str, output_text: str) -> None:
+        """Async variant of _store, writing the SQLite cache off the event loop."""
+        if self.mode == "readwrite":
+            await asyncio.to_thread(self._store, key, output_text)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMGateway:
+    """
+    Return the process-wide LLM gateway, creating it on first use.
+
+    Returns:
+        The shared LLMGateway instance
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def configure_llm_cache(
+    mode: str = "readwrite",
+    cache_path: str = DEFAULT_CACHE_PATH,
+    max_entries: Optional[int] = None
+) -> LLMGateway:
+    """
+    Configure the cache of the process-wide LLM gateway.
+
+    Args:
+        mode: Cache mode, one of "readwrite", "replay" or "off"
+        cache_path: Path to the SQLite response store
+        max_entries: Maximum number of cached responses
+
+    Returns:
+        The configured shared LLMGateway instance
+    """
+    gateway = get_llm_client()
+    gateway.configure(mode=mode, cache_path=cache_path, max_entries=max_entries)
+    return gateway
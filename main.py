@@ -1,24 +1,46 @@
-from openai import OpenAI
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from langgraph.graph import StateGraph
 from langchain_exa import ExaSearchResults
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import asyncio
+import time
+from concurrent.futures import as_completed
 from prompts import (
     TOPIC_EXTRACTION_SYSTEM, TOPIC_EXTRACTION_PROMPT,
-    SUBQUESTION_PROMPT,
+    SUBQUESTION_PROMPT, BATCH_SUBQUESTION_PROMPT,
     FOLLOW_UP_GENERATION_PROMPT
 )
-from report_generator import generate_report
-from search_provider import SearchProvider
-from research_agent import ResearchAgent
+from report_generator import generate_report, agenerate_report
+from search_provider import ContentBudget, get_search_provider
+from search_cache import SearchCache, get_search_cache
+from research_agent import ResearchAgent, AsyncResearchAgent, ARTICLE_CONTENT_CHARS
+from article_ranker import ArticleRanker, DEFAULT_RELEVANCE_THRESHOLD, DEFAULT_EMBEDDING_CHARACTERS
+from dedup import NearDuplicateIndex, drop_duplicate_articles
+from passage_selector import SELECTION_POOL_FACTOR, select_passages
+from source_registry import SourceRegistry
+from models import Article
+from event_log import DEFAULT_MAX_EVENTS, EventLog, get_event_log, log_event, log_search, log_search_error
 from arg_parser import parse_arguments
+from batch import BatchManifest, load_batch_queries
+from llm_gateway import get_llm_client, configure_llm_cache, DEFAULT_EMBEDDING_MODEL
+from concurrency import async_runner, blocking_runner, configure_concurrency
+from clients import configure_clients
+from mock_backends import configure_mock_backends
+from rate_limiter import configure_rate_limit
+from scheduler import configure_scheduler
+from accounting import ContextThreadPoolExecutor, get_usage_tracker, labeled_node, usage_labels
+from budget import configure_budget, get_budget
+from checkpoint import START_STEP, checkpointed_node, get_checkpoint_store
 
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI()
+# Shared LLM gateway (OpenAI client with response caching)
+client = get_llm_client()
+
+# Characters of each search result embedded in the follow-up generation prompt
+FOLLOW_UP_ARTICLE_CHARS = 1000
 
 
 class ResearchTopics(BaseModel):
@@ -31,99 +53,214 @@ class Subquestions(BaseModel):
     subquestions: List[str]
 
 
-def create_initial_state(user_query: str) -> Dict[str, Any]:
+class TopicSubquestions(BaseModel):
+    """Pydantic model for the subquestions of one topic in a batched call."""
+    topic: str
+    subquestions: List[str]
+
+
+class BatchedSubquestions(BaseModel):
+    """Pydantic model for structured subquestion generation across all topics."""
+    topics: List[TopicSubquestions]
+
+
+def create_initial_state(user_query: str, max_events: int = DEFAULT_MAX_EVENTS) -> Dict[str, Any]:
     """
     Create initial state with user query and default values.
     
     Args:
         user_query: The research question to investigate
+        max_events: Number of most recent events kept in the event log
         
     Returns:
         Dictionary containing the initial state with user query, empty topics,
-        subquestions, and initial message history
+        subquestions, and an event log recording the query
     """
+    events = EventLog(max_events)
+    events.record("query", content=user_query)
     return {
         "user_query": user_query,
         "topics": [],
         "subquestions": [],
         "subq_map": {},
-        "messages": [
-            {
-                "role": "user",
-                "content": user_query
-            }
-        ]
+        "search_results": {},
+        "question_lineage": {},
+        "events": events
     }
 
+def create_search_cache(state: Dict[str, Any]) -> Optional[SearchCache]:
+    """
+    Return the shared on-disk search cache configured for this run.
+    
+    Args:
+        state: Current pipeline state containing cache configuration
+        
+    Returns:
+        The shared SearchCache instance, or None if caching is disabled
+    """
+    if not state.get("search_cache", True):
+        return None
+    return get_search_cache(ttl_hours=state.get("search_cache_ttl", 168))
+
+def create_search_budget(state: Dict[str, Any]) -> ContentBudget:
+    """
+    Return the content that research searches need per result.
+    
+    Results of the research iterations feed the follow-up prompts, the
+    integration prompts and, when ranking is on, the article embeddings, so
+    they are fetched up to the largest of those budgets, with room for the
+    passage selector to choose from.
+    
+    Args:
+        state: Current pipeline state containing search configuration
+        
+    Returns:
+        The ContentBudget for search_node
+    """
+    max_characters = max(FOLLOW_UP_ARTICLE_CHARS, ARTICLE_CONTENT_CHARS) * SELECTION_POOL_FACTOR
+    if state.get("rank_articles"):
+        max_characters = max(max_characters, DEFAULT_EMBEDDING_CHARACTERS)
+    return ContentBudget(max_characters, mode=state.get("search_content", "text"))
+
 def search_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Search for information using the specified search provider.
     
-    This node performs web searches for each question in the current iteration,
-    storing results in the state for later processing.
+    This node performs web searches for each question in the current iteration
+    concurrently (up to the configured search concurrency, paced by the
+    provider's rate limiter), storing results in the state for later processing.
     
     Args:
         state: Current pipeline state containing questions and configuration
         
+    Returns:
+        Updated state with search results for each question
+    """
+    return blocking_runner.run(_search(state, blocking_runner))
+
+async def _search(state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Search every question of the current iteration, for search_node and async_search_node.
+    
+    Args:
+        state: Current pipeline state containing questions and configuration
+        runner: Runner making the LLM and search calls (see concurrency.py)
+        
     Returns:
         Updated state with search results for each question
     """
     search_provider_name = state.get("search_provider", "exa")
-    search_provider = SearchProvider(search_provider_name)
+    search_provider = get_search_provider(search_provider_name, cache=create_search_cache(state))
+    search_budget = create_search_budget(state)
     search_results = {}
     current_iteration = state.get("current_iteration", 1)
     max_breadth = state.get("breadth", 1)
 
     print(f"\n🔍 Searching with {search_provider_name.upper()} (Iteration {current_iteration}/{max_breadth})...")
 
-    # Get questions for this iteration
-    questions = state.get("current_questions", state["subquestions"])
+    # Get questions for this iteration, skipping any already answered in an earlier one
+    questions = _questions_to_fetch(state, state.get("current_questions", state["subquestions"]))
     
-    for question in questions:
-        try:
-            results = search_provider.search(question, num_results=5)
-            search_results[question] = results
+    # Fan the questions out; the provider's rate limiter paces the actual requests
+    outcomes = await runner.gather(
+        [
+            runner.call(search_provider.search, search_provider.asearch, question, num_results=5, budget=search_budget)
+            for question in questions
+        ],
+        limit=state.get("search_concurrency", 8),
+        return_exceptions=True
+    )
+    
+    # Record in question order so results and events keep their ordering
+    for question, outcome in zip(questions, outcomes):
+        if isinstance(outcome, Exception):
+            _record_search_error(state, search_results, question, outcome)
+        else:
+            _record_search_result(state, search_results, question, outcome)
+    
+    return _store_search_results(state, search_results)
 
-            # Store raw result log in messages
-            state["messages"].append({
-                "role": "tool",
-                "content": results
-            })
+def _questions_to_fetch(state: Dict[str, Any], questions: List[str]) -> List[str]:
+    """
+    Drop questions whose results are already stored from an earlier iteration.
+    
+    Args:
+        state: Current pipeline state with accumulated search results
+        questions: Questions planned for this iteration
+        
+    Returns:
+        Unique questions that still need to be searched, in their original order
+    """
+    stored = state.get("search_results", {})
+    unique_questions = list(dict.fromkeys(questions))
+    pending = [question for question in unique_questions if not stored.get(question)]
+    if len(pending) < len(unique_questions):
+        print(f"Skipping {len(unique_questions) - len(pending)} questions with results from earlier iterations")
+    return pending
 
-        except Exception as e:
-            print(f"Search error on '{question}' with {search_provider_name}: {e}")
-            search_results[question] = []
-            state["messages"].append({
-                "role": "tool",
-                "content": f"[{search_provider_name.upper()}Search] Error on '{question}': {e}"
-            })
+def _record_search_result(state: Dict[str, Any], search_results: Dict[str, Any], question: str, results: Any) -> None:
+    """
+    Record the results of one question's search.
+    
+    Args:
+        state: Current pipeline state
+        search_results: Results collected in this iteration, keyed by question
+        question: The question that was searched
+        results: Search results for the question
+    """
+    search_results[question] = results
+    log_search(state, question, results)
+
+def _record_search_error(state: Dict[str, Any], search_results: Dict[str, Any], question: str, error: Exception) -> None:
+    """
+    Record a failed search for one question.
+    
+    Args:
+        state: Current pipeline state
+        search_results: Results collected in this iteration, keyed by question
+        question: The question that was searched
+        error: The exception raised by the search
+    """
+    search_provider_name = state.get("search_provider", "exa")
+    print(f"Search error on '{question}' with {search_provider_name}: {error}")
+    search_results[question] = []
+    log_search_error(state, question, error)
+
+def _store_search_results(state: Dict[str, Any], search_results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add the results of this iteration's searches to the accumulated results.
     
+    Results from earlier iterations are kept, so every search that was paid for
+    is available to synthesis.
+    
+    Args:
+        state: Current pipeline state
+        search_results: Results collected in this iteration, keyed by question
+        
+    Returns:
+        Updated state with search results for each question
+    """
+    current_iteration = state.get("current_iteration", 1)
+
     print(f"Found results for {len(search_results)} questions")
-    state["search_results"] = search_results
+    state.setdefault("search_results", {}).update(search_results)
     state["current_iteration"] = current_iteration
-    state["messages"].append({
-        "role": "assistant",
-        "content": f"Stored raw {search_provider_name.upper()} results for iteration {current_iteration}/{max_breadth}"
-    })
+    log_event(state, "search_iteration", iteration=current_iteration, questions=len(search_results))
 
     return state
 
 
-def topic_extractor_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def _topic_extraction_input(state: Dict[str, Any]) -> List[Dict[str, str]]:
     """
-    Extract main topics from the user query.
-    
-    This node uses AI to break down the research question into 2-4 main topics
-    that can be investigated independently.
+    Build the structured topic extraction input for the configured detail level.
     
     Args:
         state: Current pipeline state containing the user query
         
     Returns:
-        Updated state with extracted topics
+        Input messages for the topic extraction call
     """
     user_query = state["user_query"]
-    model = state.get("topic_model", "gpt-4o")
     detail = state.get("detail", "medium")
     
     # Map detail levels to topic ranges
@@ -134,85 +271,240 @@ def topic_extractor_node(state: Dict[str, Any]) -> Dict[str, Any]:
     }
     topic_range = detail_ranges.get(detail, "2-3")
 
-    response = client.responses.parse(
+    return [
+        {
+            "role": "system",
+            "content": TOPIC_EXTRACTION_SYSTEM.format(topic_range=topic_range)
+        },
+        {
+            "role": "user",
+            "content": TOPIC_EXTRACTION_PROMPT.format(
+                user_query=user_query,
+                topic_range=topic_range
+            )
+        },
+    ]
+
+def topic_extractor_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract main topics from the user query.
+    
+    This node uses AI to break down the research question into 2-4 main topics
+    that can be investigated independently.
+    
+    Args:
+        state: Current pipeline state containing the user query
+        
+    Returns:
+        Updated state with extracted topics
+    """
+    return blocking_runner.run(_extract_topics(state, blocking_runner))
+
+async def _extract_topics(state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Extract the topics of the user query, for topic_extractor_node and async_topic_extractor_node.
+    
+    Args:
+        state: Current pipeline state containing the user query
+        runner: Runner making the LLM and search calls (see concurrency.py)
+        
+    Returns:
+        Updated state with extracted topics
+    """
+    model = state.get("topic_model", "gpt-4o")
+
+    response = await runner.call(
+        client.responses.parse,
+        client.aresponses.parse,
         model=model,
-        input=[
-            {
-                "role": "system",
-                "content": TOPIC_EXTRACTION_SYSTEM.format(topic_range=topic_range)
-            },
-            {
-                "role": "user",
-                "content": TOPIC_EXTRACTION_PROMPT.format(
-                    user_query=user_query,
-                    topic_range=topic_range
-                )
-            },
-        ],
+        input=_topic_extraction_input(state),
         text_format=ResearchTopics,
+        prompt_name="TOPIC_EXTRACTION_PROMPT",
     )
     topics = response.output_parsed.topics
     state["topics"] = topics
-    state["messages"].append({
-        "role": "assistant",
-        "content": f"Extracted topics: {topics}"
-    })
+    log_event(state, "topics", topics=list(topics))
     return state
 
+def _subquestion_range(detail: str) -> str:
+    """
+    Map a detail level to the number of subquestions to generate per topic.
+    
+    Args:
+        detail: Detail level (low, medium or high)
+        
+    Returns:
+        Subquestion range such as "2-3"
+    """
+    detail_ranges = {
+        "low": "1-2",
+        "medium": "2-3", 
+        "high": "4-5"
+    }
+    return detail_ranges.get(detail, "2-3")
+
+def _subquestion_input(state: Dict[str, Any], topic: str, subq_range: str) -> List[Dict[str, str]]:
+    """
+    Build the structured subquestion generation input for a topic.
+    
+    Args:
+        state: Current pipeline state containing the user query
+        topic: Topic to generate subquestions for
+        subq_range: Number of subquestions to ask for
+        
+    Returns:
+        Input messages for the subquestion generation call
+    """
+    return [
+        {
+            "role": "user",
+            "content": SUBQUESTION_PROMPT.format(
+                topic=topic, 
+                user_query=state['user_query'],
+                subq_range=subq_range
+            )
+        }
+    ]
+
 def subquestion_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Generate specific subquestions for each topic.
     
     This node creates detailed, researchable questions for each extracted topic,
-    mapping them back to the original user query.
+    mapping them back to the original user query. Topics are independent, so
+    they are generated concurrently, or with one batched structured call when
+    the subquestion mode is "batched".
+    
+    Args:
+        state: Current pipeline state containing topics
+        
+    Returns:
+        Updated state with subquestions and topic mapping
+    """
+    return blocking_runner.run(_generate_subquestions(state, blocking_runner))
+
+async def _generate_subquestions(state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Generate the subquestions of every topic, for subquestion_generator_node and async_subquestion_generator_node.
     
     Args:
         state: Current pipeline state containing topics
+        runner: Runner making the LLM and search calls (see concurrency.py)
         
     Returns:
         Updated state with subquestions and topic mapping
     """
     model = state.get("topic_model", "gpt-4o")
     detail = state.get("detail", "medium")
-    subq_map = {}
-    all_subqs = []
-
-    # Map detail levels to subquestion ranges
-    detail_ranges = {
-        "low": "1-2",
-        "medium": "2-3", 
-        "high": "4-5"
-    }
-    subq_range = detail_ranges.get(detail, "2-3")
+    subquestion_mode = state.get("subquestion_mode", "parallel")
+    max_workers = state.get("max_workers", 4)
+    subq_range = _subquestion_range(detail)
+    topics = state["topics"]
 
     print(f"\n🔍 Generating subquestions with detail level: {detail} ({subq_range} per topic)")
 
-    for topic in state["topics"]:
-        response = client.responses.parse(
-            model=model,
-            input=[
-                {
-                    "role": "user",
-                    "content": SUBQUESTION_PROMPT.format(
-                        topic=topic, 
-                        user_query=state['user_query'],
-                        subq_range=subq_range
-                    )
-                }
-            ],
-            text_format=Subquestions
-        )
+    async def generate_for_topic(topic: str) -> List[str]:
+        """Generate the subquestions for a single topic"""
+        with usage_labels(topic=topic):
+            response = await runner.call(
+                client.responses.parse,
+                client.aresponses.parse,
+                model=model,
+                input=_subquestion_input(state, topic, subq_range),
+                text_format=Subquestions,
+                prompt_name="SUBQUESTION_PROMPT"
+            )
+        return response.output_parsed.subquestions
 
-        subqs = response.output_parsed.subquestions
+    generated = {}
+    if subquestion_mode == "batched" and topics:
+        try:
+            response = await runner.call(
+                client.responses.parse,
+                client.aresponses.parse,
+                model=model,
+                input=_batched_subquestion_input(state, topics, subq_range),
+                text_format=BatchedSubquestions,
+                prompt_name="BATCH_SUBQUESTION_PROMPT"
+            )
+            generated = _match_batched_subquestions(response.output_parsed, topics)
+        except Exception as e:
+            print(f"Batched subquestion generation failed, falling back to per-topic calls: {e}")
+
+    # Topics are independent, so any not covered by a batched call run concurrently
+    missing_topics = [topic for topic in topics if topic not in generated]
+    results = await runner.gather([generate_for_topic(topic) for topic in missing_topics], max_workers=max_workers)
+    generated.update(zip(missing_topics, results))
+
+    return _store_subquestions(state, generated)
+
+def _batched_subquestion_input(state: Dict[str, Any], topics: List[str], subq_range: str) -> List[Dict[str, str]]:
+    """
+    Build the structured input that generates subquestions for all topics at once.
+    
+    Args:
+        state: Current pipeline state containing the user query
+        topics: Topics to generate subquestions for
+        subq_range: Number of subquestions to ask for per topic
+        
+    Returns:
+        Input messages for the batched subquestion generation call
+    """
+    return [
+        {
+            "role": "user",
+            "content": BATCH_SUBQUESTION_PROMPT.format(
+                topics="\n".join(f"- {topic}" for topic in topics),
+                user_query=state['user_query'],
+                subq_range=subq_range
+            )
+        }
+    ]
+
+def _match_batched_subquestions(parsed: BatchedSubquestions, topics: List[str]) -> Dict[str, List[str]]:
+    """
+    Map the entries of a batched response back to the requested topics.
+    
+    Args:
+        parsed: Parsed batched subquestion response
+        topics: Topics that were requested
+        
+    Returns:
+        Mapping from topic to subquestions; topics the model skipped are omitted
+    """
+    by_name = {entry.topic.strip().lower(): entry.subquestions for entry in parsed.topics}
+    matched = {}
+    for topic in topics:
+        subqs = by_name.get(topic.strip().lower())
+        if subqs:
+            matched[topic] = subqs
+    return matched
+
+def _store_subquestions(state: Dict[str, Any], generated: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Record generated subquestions in topic order.
+    
+    Args:
+        state: Current pipeline state containing topics
+        generated: Mapping from topic to its subquestions
+        
+    Returns:
+        Updated state with subquestions and topic mapping
+    """
+    subq_map = {}
+    all_subqs = []
+    for topic in state["topics"]:
+        subqs = generated.get(topic, [])
         subq_map[topic] = subqs
         all_subqs.extend(subqs)
 
     state["subq_map"] = subq_map
     state["subquestions"] = all_subqs
-    state["messages"].append({
-        "role": "assistant",
-        "content": f"Generated subquestions: {subq_map}"
-    })
+    lineage = state.setdefault("question_lineage", {})
+    for topic, subqs in subq_map.items():
+        for subq in subqs:
+            lineage[subq] = {"topic": topic, "iteration": 1, "parent": None}
+    log_event(state, "subquestions", counts={topic: len(subqs) for topic, subqs in subq_map.items()})
     
     return state
 
@@ -226,6 +518,19 @@ def follow_up_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
     Args:
         state: Current pipeline state containing search results
         
+    Returns:
+        Updated state with follow-up questions for next iteration
+    """
+    return blocking_runner.run(_generate_follow_ups(state, blocking_runner))
+
+async def _generate_follow_ups(state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Generate the next iteration's questions, for follow_up_generator_node and async_follow_up_generator_node.
+    
+    Args:
+        state: Current pipeline state containing search results
+        runner: Runner making the LLM and search calls (see concurrency.py)
+        
     Returns:
         Updated state with follow-up questions for next iteration
     """
@@ -242,65 +547,132 @@ def follow_up_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
         state["all_questions"] = state["subquestions"].copy()
         return state
     
-    # Generate follow-up questions from search results
+    # Generate follow-up questions from the previous iteration's search results
     follow_up_questions = []
+    follow_up_parents = {}
     asked_questions = state.get("all_questions", [])
     
-    for question, search_response in state.get("search_results", {}).items():
-        if not search_response or not search_response.results:
+    parents = []
+    prompts = []
+    for question in state.get("current_questions", []):
+        follow_up_prompt = _follow_up_prompt(main_query, question, state["search_results"].get(question))
+        if follow_up_prompt is not None:
+            parents.append(question)
+            prompts.append(follow_up_prompt)
+    
+    responses = await runner.gather(
+        [
+            runner.call(client.responses.create, client.aresponses.create, model=model, input=prompt, prompt_name="FOLLOW_UP_GENERATION_PROMPT")
+            for prompt in prompts
+        ],
+        max_workers=state.get("max_workers", 4),
+        return_exceptions=True
+    )
+    
+    # Apply novelty filtering in question order
+    for question, response in zip(parents, responses):
+        if isinstance(response, Exception):
+            print(f"Error generating follow-up questions: {response}")
             continue
-            
-        # Combine article content for this question
-        article_content = ""
-        for result in search_response.results:
-            if result.text:
-                article_content += f"\n\nArticle: {result.title}\n{result.text[:1000]}"
+        for follow_up in _add_novel_questions(response.output_text, follow_up_questions, asked_questions):
+            follow_up_parents[follow_up] = question
+    
+    return _store_follow_ups(state, follow_up_questions, asked_questions, follow_up_parents)
+
+def _follow_up_prompt(main_query: str, question: str, search_response: Any) -> Optional[str]:
+    """
+    Build the follow-up generation prompt for one question's search results.
+    
+    Args:
+        main_query: The original research question
+        question: The question that was searched
+        search_response: Search results for the question
         
-        if not article_content.strip():
-            continue
+    Returns:
+        The prompt, or None if the results contain no usable article text
+    """
+    if not search_response or not search_response.results:
+        return None
         
-        # Generate follow-up questions
-        follow_up_prompt = FOLLOW_UP_GENERATION_PROMPT.format(
-            main_query=main_query,
-            article_content=article_content,
-            question=question
-        )
+    # Combine article content for this question
+    article_content = ""
+    for result in search_response.results:
+        if result.text:
+            article_content += f"\n\nArticle: {result.title}\n{select_passages(result.text, question, FOLLOW_UP_ARTICLE_CHARS)}"
+    
+    if not article_content.strip():
+        return None
+    
+    return FOLLOW_UP_GENERATION_PROMPT.format(
+        main_query=main_query,
+        article_content=article_content,
+        question=question
+    )
+
+def _add_novel_questions(output_text: str, follow_up_questions: List[str], asked_questions: List[str]) -> List[str]:
+    """
+    Parse generated follow-up questions and keep only novel ones.
+    
+    Args:
+        output_text: Raw model output, one question per line
+        follow_up_questions: List that novel questions are appended to
+        asked_questions: Every question asked so far; updated in place
         
-        try:
-            response = client.responses.create(
-                model=model,
-                input=follow_up_prompt
-            )
-            
-            generated_questions = response.output_text.strip().split('\n')
-            
-            # Filter and add novel questions
-            for q in generated_questions:
-                q = q.strip()
-
-                # Validate the question
-                if (
-                    q 
-                    and len(q) > 20 
-                    and q.lower() not in [aq.lower() for aq in asked_questions]  # check novelty
-                ):
-                    follow_up_questions.append(q)
-                    asked_questions.append(q)
-
-                        
-        except Exception as e:
-            print(f"Error generating follow-up questions: {e}")
+    Returns:
+        The novel questions that were added
+    """
+    generated_questions = output_text.strip().split('\n')
+    added = []
+    
+    # Filter and add novel questions
+    for q in generated_questions:
+        q = q.strip()
+
+        # Validate the question
+        if (
+            q 
+            and len(q) > 20 
+            and q.lower() not in [aq.lower() for aq in asked_questions]  # check novelty
+        ):
+            follow_up_questions.append(q)
+            asked_questions.append(q)
+            added.append(q)
+    
+    return added
+
+def _store_follow_ups(state: Dict[str, Any], follow_up_questions: List[str], asked_questions: List[str], follow_up_parents: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Select the follow-up questions for the next iteration and record them in the state.
+    
+    Each selected follow-up inherits the topic of the question it was generated
+    from and is added to that topic's questions in subq_map, so its search
+    results are synthesized into the right section.
     
+    Args:
+        state: Current pipeline state
+        follow_up_questions: Novel follow-up questions in generation order
+        asked_questions: Every question asked so far
+        follow_up_parents: Mapping from follow-up question to the question it came from
+        
+    Returns:
+        Updated state with the questions for the next iteration
+    """
+    current_iteration = state.get("current_iteration", 1)
     max_follow_ups = min(len(follow_up_questions), 3)  # Max 3 follow-up questions per iteration
     selected_follow_ups = follow_up_questions[:max_follow_ups]
     
+    lineage = state.setdefault("question_lineage", {})
+    for follow_up in selected_follow_ups:
+        parent = follow_up_parents.get(follow_up)
+        topic = lineage.get(parent, {}).get("topic")
+        lineage[follow_up] = {"topic": topic, "iteration": current_iteration, "parent": parent}
+        if topic is not None:
+            state["subq_map"].setdefault(topic, []).append(follow_up)
+    
     # Update state
     state["current_questions"] = selected_follow_ups
     state["all_questions"] = asked_questions
-    state["messages"].append({
-        "role": "assistant",
-        "content": f"Generated {len(selected_follow_ups)} follow-up questions for iteration {current_iteration}"
-    })
+    log_event(state, "follow_ups", iteration=current_iteration, count=len(selected_follow_ups))
     
     return state
 
@@ -309,7 +681,8 @@ def iteration_controller_node(state: Dict[str, Any]) -> Dict[str, Any]:
     Control the research iteration flow.
     
     This node determines whether to continue with more iterations or move
-    to the synthesis phase based on the configured breadth parameter.
+    to the synthesis phase based on the configured breadth parameter. Iteration
+    also stops early once the research share of the run budget is spent.
     
     Args:
         state: Current pipeline state with iteration information
@@ -322,8 +695,13 @@ def iteration_controller_node(state: Dict[str, Any]) -> Dict[str, Any]:
     
     print(f"\n🔄 Research Iteration {current_iteration}/{max_breadth}")
     
+    stop_reason = get_budget().research_exhausted()
+    
     # Check if we should continue to next iteration
-    if current_iteration < max_breadth:
+    if current_iteration < max_breadth and stop_reason:
+        state["next_node"] = "article_synthesis_with_expansion"
+        print(f"💸 Budget reached ({stop_reason}), moving to synthesis after {current_iteration} iterations")
+    elif current_iteration < max_breadth:
         # Prepare for next iteration
         state["current_iteration"] = current_iteration + 1
         state["next_node"] = "follow_up_generator"
@@ -347,6 +725,154 @@ def route_after_iteration(state: Dict[str, Any]) -> str:
     """
     return state.get("next_node", "article_synthesis_with_expansion")
 
+def _collect_topic_articles(state: Dict[str, Any], topic: str) -> List[Article]:
+    """
+    Gather the articles found for a topic's subquestions.
+    
+    Args:
+        state: Current pipeline state with all search results
+        topic: Topic to collect articles for
+        
+    Returns:
+        Articles in subquestion order
+    """
+    topic_subqs = state["subq_map"].get(topic, [])
+    
+    # Get all search results for this topic's subquestions
+    topic_articles = []
+    for subq in topic_subqs:
+        search_response = state["search_results"].get(subq)
+        if search_response and search_response.results:
+            for result in search_response.results:
+                topic_articles.append(Article.from_result(result, question=subq, subquestion=subq))
+    return topic_articles
+
+def _drop_duplicate_articles(topic_articles: Dict[str, List[Article]], dedup_index: NearDuplicateIndex) -> Dict[str, List[Article]]:
+    """
+    Remove articles whose content was already found under another URL.
+    
+    Articles are indexed in topic order, so the first copy of a story is kept.
+    A URL repeated within one topic is dropped; the same URL may still serve
+    several topics, as it may in expansion searches.
+    
+    Args:
+        topic_articles: Mapping from topic to its articles
+        dedup_index: Index that records every kept article for later expansions
+        
+    Returns:
+        Mapping from topic to its unique articles
+    """
+    unique_articles = {}
+    dropped = 0
+    for topic, articles in topic_articles.items():
+        unique_articles[topic] = drop_duplicate_articles(articles, dedup_index, set())
+        dropped += len(articles) - len(unique_articles[topic])
+    
+    if dropped:
+        print(f"   ♻️  Dropped {dropped} duplicate articles before synthesis")
+    return unique_articles
+
+def create_article_ranker(state: Dict[str, Any]) -> ArticleRanker:
+    """
+    Create the embedding-based article ranker configured for this run.
+    
+    Args:
+        state: Current pipeline state containing ranking configuration
+        
+    Returns:
+        An ArticleRanker instance
+    """
+    return ArticleRanker(
+        model=state.get("embedding_model", DEFAULT_EMBEDDING_MODEL),
+        threshold=state.get("relevance_threshold", DEFAULT_RELEVANCE_THRESHOLD)
+    )
+
+def _create_source_registry(state: Dict[str, Any]) -> SourceRegistry:
+    """
+    Create the source registry shared by all topics of the run.
+    
+    Topics restored from a checkpoint already cite numbers, so the registry
+    saved with them is extended rather than replaced.
+    
+    Args:
+        state: Current pipeline state describing the checkpointed run
+        
+    Returns:
+        The saved registry of the run, or an empty one
+    """
+    checkpoints = get_checkpoint_store(state)
+    source_registry = checkpoints.load_source_registry() if checkpoints is not None else None
+    return source_registry if source_registry is not None else SourceRegistry()
+
+def create_research_agent(state: Dict[str, Any], runner: Any) -> ResearchAgent:
+    """
+    Create the research agent configured for this run.
+    
+    Args:
+        state: Current pipeline state containing synthesis configuration
+        runner: Runner of the calling node; the async runner selects AsyncResearchAgent
+        
+    Returns:
+        A ResearchAgent, or an AsyncResearchAgent for the async pipeline
+    """
+    agent_class = AsyncResearchAgent if runner is async_runner else ResearchAgent
+    return agent_class(
+        model=state.get("summary_model", "gpt-4o"),
+        search_provider=state.get("search_provider", "exa"),
+        max_workers=state.get("max_workers", 4),
+        synthesis_mode=state.get("synthesis_mode", "linear"),
+        search_cache=create_search_cache(state),
+        formatting_mode=state.get("formatting_mode", "per-merge"),
+        dedup_index=NearDuplicateIndex() if state.get("dedup", True) else None,
+        content_mode=state.get("search_content", "text")
+    )
+
+async def _synthesize_topic(state: Dict[str, Any], research_agent: ResearchAgent, topic: str, topic_articles: List[Article], source_registry: SourceRegistry) -> Dict[str, Any]:
+    """
+    Synthesize one topic's articles, restoring the result from a checkpoint if it exists.
+    
+    Args:
+        state: Current pipeline state with synthesis configuration
+        research_agent: Agent that integrates and expands the articles
+        topic: Topic to synthesize
+        topic_articles: The topic's articles, numbered as they are integrated
+        source_registry: Registry shared by all topics
+        
+    Returns:
+        The topic's synthesis result
+    """
+    checkpoints = get_checkpoint_store(state)
+    saved_result = checkpoints.load_topic(topic) if checkpoints is not None else None
+    if saved_result is not None:
+        print(f"   💾 Restored topic from checkpoint: {topic}")
+        return saved_result
+    
+    print(f"   🔄 Processing topic: {topic}")
+    
+    if not topic_articles:
+        return {
+            'synthesized_content': f"No articles found for {topic}.",
+            'all_sources': [],
+            'expansion_rounds': 0
+        }
+    
+    print(f"   📚 Found {len(topic_articles)} articles for {topic}")
+    
+    # Use intelligent synthesis to create cohesive topic section with shared source numbering
+    with usage_labels(topic=topic):
+        synthesis_result = await research_agent.asynthesize_topic_with_articles(
+            topic=topic, 
+            articles=topic_articles, 
+            max_expansions=state.get("max_expansions", 3),
+            source_registry=source_registry
+        )
+    
+    if checkpoints is not None:
+        checkpoints.save_topic(topic, synthesis_result, source_registry)
+    
+    print(f"   ✅ Completed intelligent synthesis for {topic} ({synthesis_result['expansion_rounds']} expansion rounds)")
+    return synthesis_result
+
 def article_synthesis_with_expansion_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Synthesize articles with intelligent integration and recursive research expansion.
@@ -361,135 +887,606 @@ def article_synthesis_with_expansion_node(state: Dict[str, Any]) -> Dict[str, An
     Returns:
         Updated state with synthesized and expanded content
     """
-    model = state.get("summary_model", "gpt-4o")
-    search_provider = state.get("search_provider", "exa")
-    max_expansions = state.get("max_expansions", 3)
-    max_workers = state.get("max_workers", 4)
+    return blocking_runner.run(_synthesize_articles(state, blocking_runner))
+
+async def _synthesize_articles(state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Synthesize and expand every topic, for article_synthesis_with_expansion_node and its async variant.
     
+    Args:
+        state: Current pipeline state with all search results
+        runner: Runner making the LLM and search calls (see concurrency.py)
+        
+    Returns:
+        Updated state with synthesized and expanded content
+    """
     print(f"\n🔬 Synthesizing articles with intelligent integration and expansion...")
     
-    # Initialize research agent with parallel processing
-    research_agent = ResearchAgent(model=model, search_provider=search_provider, max_workers=max_workers)
+    research_agent = create_research_agent(state, runner)
     expanded_sections = {}
     
-    # Create global source mapping to ensure consistent citation numbering
-    global_source_mapping = {}
-    global_source_counter = 1
+    all_topic_articles = {topic: _collect_topic_articles(state, topic) for topic in state["topics"]}
+    if research_agent.dedup_index is not None:
+        all_topic_articles = _drop_duplicate_articles(all_topic_articles, research_agent.dedup_index)
+    if state.get("rank_articles"):
+        try:
+            article_ranker = create_article_ranker(state)
+            all_topic_articles = await runner.call(article_ranker.rank_topics, article_ranker.arank_topics, all_topic_articles)
+        except Exception as e:
+            print(f"   ⚠️  Article ranking failed, synthesizing all articles: {e}")
     
-    # First pass: collect all unique URLs and assign global source numbers
-    all_unique_urls = set()
-    for topic in state["topics"]:
-        topic_subqs = state["subq_map"].get(topic, [])
-        for subq in topic_subqs:
-            search_response = state["search_results"].get(subq)
-            if search_response and search_response.results:
-                for result in search_response.results:
-                    if result.url not in all_unique_urls:
-                        all_unique_urls.add(result.url)
-                        global_source_mapping[result.url] = global_source_counter
-                        global_source_counter += 1
-    
-    print(f"   📊 Created global source mapping with {len(global_source_mapping)} unique sources")
-    
-    # Prepare topic processing tasks for parallel execution
-    def process_topic(topic: str) -> tuple[str, Dict[str, Any]]:
-        """Process a single topic and return (topic, synthesis_result)"""
-        print(f"   🔄 Processing topic: {topic}")
-        topic_subqs = state["subq_map"].get(topic, [])
-        
-        # Get all search results for this topic's subquestions
-        topic_articles = []
-        for subq in topic_subqs:
-            search_response = state["search_results"].get(subq)
-            if search_response and search_response.results:
-                for result in search_response.results:
-                    topic_articles.append({
-                        "subquestion": subq,
-                        "title": result.title,
-                        "url": result.url,
-                        "text": result.text,
-                        "source_id": global_source_mapping.get(result.url, global_source_counter)
-                    })
-        
-        if not topic_articles:
-            return topic, {
-                'synthesized_content': f"No articles found for {topic}.",
-                'all_sources': [],
-                'expansion_rounds': 0.
-            }
-        
-        print(f"   📚 Found {len(topic_articles)} articles for {topic}")
-        
-        # Use intelligent synthesis to create cohesive topic section with global source mapping
-        synthesis_result = research_agent.synthesize_topic_with_articles(
-            topic=topic, 
-            articles=topic_articles, 
-            max_expansions=max_expansions,
-            global_source_mapping=global_source_mapping
-        )
-        
-        print(f"   ✅ Completed intelligent synthesis for {topic} ({synthesis_result['expansion_rounds']} expansion rounds)")
-        return topic, synthesis_result
+    source_registry = _create_source_registry(state)
     
     # Process topics in parallel
-    all_new_sources = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all topic processing tasks
-        future_to_topic = {
-            executor.submit(process_topic, topic): topic 
+    outcomes = await runner.gather(
+        [
+            _synthesize_topic(state, research_agent, topic, all_topic_articles[topic], source_registry)
             for topic in state["topics"]
-        }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_topic):
-            topic = future_to_topic[future]
-            try:
-                topic_name, synthesis_result = future.result()
-                expanded_sections[topic_name] = synthesis_result['synthesized_content']
-                all_new_sources.extend(synthesis_result['all_sources'])
-            except Exception as e:
-                print(f"   ❌ Error processing topic '{topic}': {e}")
-                expanded_sections[topic] = f"Error processing {topic}: {str(e)}"
+        ],
+        max_workers=state.get("max_workers", 4),
+        return_exceptions=True
+    )
+    
+    all_new_sources = []
+    for topic, outcome in zip(state["topics"], outcomes):
+        if isinstance(outcome, Exception):
+            print(f"   ❌ Error processing topic '{topic}': {outcome}")
+            expanded_sections[topic] = f"Error processing {topic}: {str(outcome)}"
+            continue
+        expanded_sections[topic] = outcome['synthesized_content']
+        all_new_sources.extend(outcome['all_sources'])
     
     # Update state
     state["expanded_sections"] = expanded_sections
-    state["global_source_mapping"] = global_source_mapping
+    state["source_registry"] = source_registry
     state["all_new_sources"] = all_new_sources
     print(f"✅ Completed intelligent synthesis for {len(expanded_sections)} topics")
     
     return state
 
+def _topic_state(state: Dict[str, Any], topic: str) -> Dict[str, Any]:
+    """
+    Create the private state of one topic's pipeline.
+    
+    The topic state shares the run configuration but starts with empty research
+    data, so the staged nodes can run on a single topic without touching the
+    state of other topics.
+    
+    Args:
+        state: Current pipeline state
+        topic: Topic the state is for
+        
+    Returns:
+        State containing only this topic
+    """
+    topic_state = {key: value for key, value in state.items() if key not in ("current_questions", "all_questions", "next_node")}
+    topic_state.update({
+        "topics": [topic],
+        "subquestions": [],
+        "subq_map": {},
+        "search_results": {},
+        "question_lineage": {},
+        "events": EventLog(state.get("max_events", DEFAULT_MAX_EVENTS)),
+        "current_iteration": 1,
+        # A batched call only pays off across several topics
+        "subquestion_mode": "parallel"
+    })
+    return topic_state
+
+async def _research_topic(topic_state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Run subquestion generation and every research iteration for one topic.
+    
+    Args:
+        topic_state: State created by _topic_state
+        runner: Runner making the LLM and search calls (see concurrency.py)
+        
+    Returns:
+        The topic state with its search results
+    """
+    with usage_labels(node="generate_subqs"):
+        topic_state = await _generate_subquestions(topic_state, runner)
+    while True:
+        with usage_labels(node="follow_up_generator"):
+            topic_state = await _generate_follow_ups(topic_state, runner)
+        with usage_labels(node="search_node"):
+            topic_state = await _search(topic_state, runner)
+        topic_state = iteration_controller_node(topic_state)
+        if route_after_iteration(topic_state) != "follow_up_generator":
+            return topic_state
+
+def _merge_topic_states(state: Dict[str, Any], outcomes: Dict[str, Any], source_registry: SourceRegistry) -> Dict[str, Any]:
+    """
+    Fold the results of the per-topic pipelines back into the run state.
+    
+    Args:
+        state: Current pipeline state
+        outcomes: Mapping from topic to (topic state, synthesis result), or to the exception it raised;
+            the topic state is None for topics restored from a checkpoint
+        source_registry: Registry shared by all topics
+        
+    Returns:
+        Updated state with research data and synthesized content in topic order
+    """
+    expanded_sections = {}
+    all_new_sources = []
+    for topic in state["topics"]:
+        outcome = outcomes[topic]
+        if isinstance(outcome, Exception):
+            print(f"   ❌ Error processing topic '{topic}': {outcome}")
+            expanded_sections[topic] = f"Error processing {topic}: {str(outcome)}"
+            continue
+        
+        topic_state, synthesis_result = outcome
+        if topic_state is not None:
+            state["subq_map"][topic] = topic_state["subq_map"].get(topic, [])
+            state["subquestions"].extend(topic_state["subquestions"])
+            state.setdefault("all_questions", []).extend(topic_state.get("all_questions", []))
+            state["search_results"].update(topic_state["search_results"])
+            state.setdefault("question_lineage", {}).update(topic_state["question_lineage"])
+            get_event_log(state).extend(topic_state["events"])
+            state["current_iteration"] = max(state.get("current_iteration", 1), topic_state["current_iteration"])
+        expanded_sections[topic] = synthesis_result['synthesized_content']
+        all_new_sources.extend(synthesis_result['all_sources'])
+    
+    state["expanded_sections"] = expanded_sections
+    state["source_registry"] = source_registry
+    state["all_new_sources"] = all_new_sources
+    print(f"✅ Completed pipelined research and synthesis for {len(expanded_sections)} topics")
+    
+    return state
+
+def topic_pipeline_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Research and synthesize every topic as an independent pipeline.
+    
+    Used by the "pipelined" pipeline mode in place of the staged nodes from
+    subquestion generation through synthesis. Each topic generates its
+    subquestions, runs its own research iterations and moves straight on to
+    synthesis and expansion, so a topic whose searches finish early does not
+    wait for the slowest search of another topic.
+    
+    Args:
+        state: Current pipeline state containing topics
+        
+    Returns:
+        Updated state with research data and synthesized content
+    """
+    return blocking_runner.run(_run_topic_pipelines(state, blocking_runner))
+
+async def _run_topic_pipelines(state: Dict[str, Any], runner: Any) -> Dict[str, Any]:
+    """
+    Run every topic from subquestions to synthesis, for topic_pipeline_node and async_topic_pipeline_node.
+    
+    Args:
+        state: Current pipeline state containing topics
+        runner: Runner making the LLM and search calls (see concurrency.py)
+        
+    Returns:
+        Updated state with research data and synthesized content
+    """
+    topics = state["topics"]
+    
+    print(f"\n🚀 Researching {len(topics)} topics as independent pipelines...")
+    
+    research_agent = create_research_agent(state, runner)
+    article_ranker = create_article_ranker(state) if state.get("rank_articles") else None
+    source_registry = _create_source_registry(state)
+    checkpoints = get_checkpoint_store(state)
+    
+    async def run_topic(topic: str) -> tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Run one topic from subquestions to synthesis"""
+        saved_result = checkpoints.load_topic(topic) if checkpoints is not None else None
+        if saved_result is not None:
+            print(f"   💾 Restored topic from checkpoint: {topic}")
+            return None, saved_result
+        
+        topic_state = await _research_topic(_topic_state(state, topic), runner)
+        print(f"   🚦 Research finished for {topic}, starting synthesis")
+        
+        topic_articles = {topic: _collect_topic_articles(topic_state, topic)}
+        if research_agent.dedup_index is not None:
+            topic_articles = _drop_duplicate_articles(topic_articles, research_agent.dedup_index)
+        if article_ranker is not None:
+            try:
+                topic_articles = await runner.call(article_ranker.rank_topics, article_ranker.arank_topics, topic_articles)
+            except Exception as e:
+                print(f"   ⚠️  Article ranking failed, synthesizing all articles: {e}")
+        
+        with usage_labels(node="article_synthesis_with_expansion"):
+            return topic_state, await _synthesize_topic(state, research_agent, topic, topic_articles[topic], source_registry)
+    
+    outcomes = await runner.gather(
+        [run_topic(topic) for topic in topics],
+        max_workers=state.get("max_workers", 4),
+        return_exceptions=True
+    )
+    return _merge_topic_states(state, dict(zip(topics, outcomes)), source_registry)
+
+# Async variants of the pipeline nodes. They share their steps with the nodes
+# above but run them on the async runner, so LLM and search calls are coroutines
+# and concurrency is bounded by the single shared budget in concurrency.py
+# instead of thread pools.
+
+async def async_search_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of search_node"""
+    return await _search(state, async_runner)
+
+async def async_topic_extractor_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of topic_extractor_node"""
+    return await _extract_topics(state, async_runner)
+
+async def async_subquestion_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of subquestion_generator_node"""
+    return await _generate_subquestions(state, async_runner)
+
+async def async_follow_up_generator_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of follow_up_generator_node"""
+    return await _generate_follow_ups(state, async_runner)
+
+async def async_article_synthesis_with_expansion_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of article_synthesis_with_expansion_node"""
+    return await _synthesize_articles(state, async_runner)
+
+async def async_topic_pipeline_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of topic_pipeline_node"""
+    return await _run_topic_pipelines(state, async_runner)
+
 State = dict
-graph = StateGraph(State)
-
-# Add nodes
-graph.add_node("extract_topics", topic_extractor_node)
-graph.add_node("generate_subqs", subquestion_generator_node)
-graph.add_node("search_node", search_node)
-graph.add_node("generate_report", generate_report)
-graph.add_node("follow_up_generator", follow_up_generator_node)
-graph.add_node("iteration_controller", iteration_controller_node)
-graph.add_node("article_synthesis_with_expansion", article_synthesis_with_expansion_node)
-
-# Connect nodes
-graph.set_entry_point("extract_topics")
-graph.add_edge("extract_topics", "generate_subqs")
-graph.add_edge("generate_subqs", "follow_up_generator")
-graph.add_edge("follow_up_generator", "search_node")
-graph.add_edge("search_node", "iteration_controller")
-graph.add_conditional_edges(
-    "iteration_controller",
-    route_after_iteration,
-    {
-        "follow_up_generator": "follow_up_generator",
-        "article_synthesis_with_expansion": "article_synthesis_with_expansion"
+
+# Unconditional successor of each node; iteration_controller routes via route_after_iteration
+PIPELINE_EDGES = {
+    "extract_topics": "generate_subqs",
+    "generate_subqs": "follow_up_generator",
+    "follow_up_generator": "search_node",
+    "search_node": "iteration_controller",
+    "article_synthesis_with_expansion": "generate_report",
+}
+
+# Successors in the "pipelined" mode, where topic_pipeline runs each topic end to end
+PIPELINED_EDGES = {
+    "extract_topics": "topic_pipeline",
+    "topic_pipeline": "generate_report",
+}
+
+def next_pipeline_node(node: str, state: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the node that runs after the given one.
+    
+    Args:
+        node: Name of a completed node
+        state: Pipeline state after that node
+        
+    Returns:
+        Name of the next node, or None once the report has been generated
+    """
+    if state.get("pipeline_mode") == "pipelined":
+        return PIPELINED_EDGES.get(node)
+    if node == "iteration_controller":
+        return route_after_iteration(state)
+    return PIPELINE_EDGES.get(node)
+
+def build_graph(use_async: bool = False, entry_point: str = "extract_topics", pipeline_mode: str = "staged") -> Any:
+    """
+    Build and compile the research pipeline graph.
+    
+    Args:
+        use_async: Use the asyncio node variants; the compiled graph must then be
+            run with `ainvoke`
+        entry_point: Node to start from, e.g. when resuming from a checkpoint
+        pipeline_mode: "staged" runs every research stage for all topics before
+            the next stage; "pipelined" runs each topic end to end on its own
+            
+    Returns:
+        The compiled LangGraph application
+    """
+    graph = StateGraph(State)
+    
+    def add_node(name: str, node: Any) -> None:
+        graph.add_node(name, labeled_node(name, checkpointed_node(name, node)))
+
+    if pipeline_mode == "pipelined":
+        add_node("extract_topics", async_topic_extractor_node if use_async else topic_extractor_node)
+        add_node("topic_pipeline", async_topic_pipeline_node if use_async else topic_pipeline_node)
+        add_node("generate_report", agenerate_report if use_async else generate_report)
+        graph.set_entry_point(entry_point)
+        for source, target in PIPELINED_EDGES.items():
+            graph.add_edge(source, target)
+        graph.set_finish_point("generate_report")
+        return graph.compile()
+
+    # Add nodes
+    if use_async:
+        add_node("extract_topics", async_topic_extractor_node)
+        add_node("generate_subqs", async_subquestion_generator_node)
+        add_node("search_node", async_search_node)
+        add_node("generate_report", agenerate_report)
+        add_node("follow_up_generator", async_follow_up_generator_node)
+        add_node("article_synthesis_with_expansion", async_article_synthesis_with_expansion_node)
+    else:
+        add_node("extract_topics", topic_extractor_node)
+        add_node("generate_subqs", subquestion_generator_node)
+        add_node("search_node", search_node)
+        add_node("generate_report", generate_report)
+        add_node("follow_up_generator", follow_up_generator_node)
+        add_node("article_synthesis_with_expansion", article_synthesis_with_expansion_node)
+    add_node("iteration_controller", iteration_controller_node)
+
+    # Connect nodes
+    graph.set_entry_point(entry_point)
+    for source, target in PIPELINE_EDGES.items():
+        graph.add_edge(source, target)
+    graph.add_conditional_edges(
+        "iteration_controller",
+        route_after_iteration,
+        {
+            "follow_up_generator": "follow_up_generator",
+            "article_synthesis_with_expansion": "article_synthesis_with_expansion"
+        }
+    )
+    graph.set_finish_point("generate_report")
+
+    # Compile graph
+    return graph.compile()
+
+app = build_graph()
+async_app = build_graph(use_async=True)
+
+def resume_from_checkpoint(run_state: Dict[str, Any], rerun_from: Optional[str] = None) -> tuple[Dict[str, Any], Optional[str]]:
+    """
+    Load the state a resumed run continues from.
+    
+    The research data (query, topics, search results, ...) comes from the checkpoint,
+    while configuration such as models and budgets comes from the current command line.
+    
+    Args:
+        run_state: Freshly built initial state carrying the run id and current configuration
+        rerun_from: Node to run again, discarding its checkpoint and all later ones
+        
+    Returns:
+        The restored state and the node to start from, or None if the run already finished
+        
+    Raises:
+        ValueError: If the run has no checkpoints, or rerun_from never completed
+    """
+    checkpoints = get_checkpoint_store(run_state)
+    if checkpoints is None or not checkpoints.exists():
+        raise ValueError(f"No checkpoints found for run {run_state.get('run_id')}")
+    
+    if rerun_from:
+        state = checkpoints.rewind_to(rerun_from)
+        if rerun_from != "generate_report":
+            # Topic sections depend on everything before the report, so write them again
+            checkpoints.clear_topics()
+        entry_point = rerun_from
+    else:
+        node, state = checkpoints.latest()
+        entry_point = "extract_topics" if node == START_STEP else next_pipeline_node(node, state)
+    
+    research_keys = create_initial_state("").keys()
+    state.update({key: value for key, value in run_state.items() if key not in research_keys})
+    return state, entry_point
+
+
+def configure_request_limits(runs: List[Dict[str, Any]]) -> None:
+    """
+    Set the request rate limits of every search provider and model the runs use.
+    
+    Args:
+        runs: Parsed arguments of each run, with any per-run overrides applied
+    """
+    for run in runs:
+        configure_rate_limit(run["search_provider"], run["search_rps"])
+        if run["llm_rpm"]:
+            for model in (run["topic_model"], run["summary_model"], run["embedding_model"]):
+                configure_rate_limit(f"openai:{model}", run["llm_rpm"] / 60)
+
+def configure_run_budget(args: Dict[str, Any], run: Optional[str] = None) -> None:
+    """
+    Set the budget of a run from its parsed arguments.
+    
+    Args:
+        args: Parsed arguments of the run
+        run: Batch query id the budget applies to, or None for the process-wide budget
+    """
+    configure_budget(
+        max_tokens=args["max_tokens"],
+        max_cost=args["max_cost"],
+        max_seconds=args["max_seconds"],
+        max_topic_tokens=args["max_topic_tokens"],
+        max_topic_seconds=args["max_topic_seconds"],
+        run=run
+    )
+
+def create_run_state(args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create the initial state of a run from its parsed arguments.
+    
+    Args:
+        args: Parsed arguments, as returned by parse_arguments
+        
+    Returns:
+        Initial pipeline state for the query in args
+    """
+    state = create_initial_state(args["query"], args["max_events"])
+    state["topic_model"] = args["topic_model"]
+    state["summary_model"] = args["summary_model"]
+    state["detail"] = args["detail"]
+    state["breadth"] = args["breadth"]
+    state["max_expansions"] = args["max_expansions"]
+    state["max_workers"] = args["max_workers"]
+    state["synthesis_mode"] = args["synthesis_mode"]
+    state["subquestion_mode"] = args["subquestion_mode"]
+    state["formatting_mode"] = args["formatting_mode"]
+    state["dedup"] = args["dedup"]
+    state["rank_articles"] = args["rank_articles"]
+    state["relevance_threshold"] = args["relevance_threshold"]
+    state["embedding_model"] = args["embedding_model"]
+    state["search_provider"] = args["search_provider"]
+    state["search_cache"] = args["search_cache"]
+    state["search_cache_ttl"] = args["search_cache_ttl"]
+    state["search_concurrency"] = args["search_concurrency"]
+    state["search_content"] = args["search_content"]
+    state["legend"] = args["legend"]
+    state["stream_report"] = args["stream_report"]
+    state["pipeline_mode"] = args["pipeline_mode"]
+    state["blob_dir"] = args["blob_dir"]
+    state["max_events"] = args["max_events"]
+    return state
+
+def pipeline_graph(use_async: bool, pipeline_mode: str, entry_point: str = "extract_topics") -> Any:
+    """
+    Return the compiled graph for a run, reusing the prebuilt graphs when possible.
+    
+    Args:
+        use_async: Whether the run uses the asyncio node variants
+        pipeline_mode: "staged" or "pipelined"
+        entry_point: Node to start from
+        
+    Returns:
+        The compiled LangGraph application
+    """
+    if entry_point == "extract_topics" and pipeline_mode == "staged":
+        return async_app if use_async else app
+    return build_graph(use_async=use_async, entry_point=entry_point, pipeline_mode=pipeline_mode)
+
+def _batch_run_state(query: Dict[str, Any], args: Dict[str, Any], batch_id: str) -> Dict[str, Any]:
+    """
+    Create the initial state of one batch query.
+    
+    Args:
+        query: Query entry from load_batch_queries
+        args: Parsed arguments, used for every option the query does not override
+        batch_id: Identifier of the batch, used in report names and run ids
+        
+    Returns:
+        Initial pipeline state for the query
+    """
+    state = create_run_state({**args, **query["overrides"], "query": query["query"]})
+    state["report_name"] = f"research_report_{batch_id}_{query['id']}"
+    if args["checkpoint"]:
+        state["run_id"] = f"{batch_id}_{query['id']}"
+        state["checkpoint_dir"] = args["checkpoint_dir"]
+        get_checkpoint_store(state).save_step(START_STEP, state)
+    return state
+
+def _batch_entry(query: Dict[str, Any], started_at: str, seconds: float, result: Optional[Dict[str, Any]], error: Optional[Exception]) -> Dict[str, Any]:
+    """
+    Build the manifest entry of a finished batch query.
+    
+    Args:
+        query: Query entry from load_batch_queries
+        started_at: ISO timestamp at which the query started
+        seconds: Wall-clock duration of the query
+        result: Final pipeline state, or None if the query failed
+        error: Exception the query failed with, if any
+        
+    Returns:
+        JSON-serializable manifest entry
+    """
+    usage = get_usage_tracker().stats_for("run", query["id"])
+    entry = {
+        "id": query["id"],
+        "query": query["query"],
+        "overrides": query["overrides"],
+        "status": "ok" if error is None else "error",
+        "report": result.get("report_filename") if result else None,
+        "started_at": started_at,
+        "seconds": round(seconds, 3),
+        "llm_calls": usage["calls"],
+        "cached_calls": usage["cached_calls"],
+        "total_tokens": usage["total_tokens"],
+        "cost_usd": round(usage["cost_usd"], 6),
     }
-)
-graph.add_edge("article_synthesis_with_expansion", "generate_report")
-graph.set_finish_point("generate_report")
+    if error is not None:
+        entry["error"] = f"{type(error).__name__}: {error}"
+    return entry
 
-# Compile graph
-app = graph.compile()
+def _run_batch_query(query: Dict[str, Any], args: Dict[str, Any], batch_id: str) -> Dict[str, Any]:
+    """Run one batch query to completion and return its manifest entry"""
+    started_at = datetime.now().isoformat(timespec="seconds")
+    start = time.perf_counter()
+    result, error = None, None
+    with usage_labels(run=query["id"]):
+        configure_run_budget(args, run=query["id"])
+        try:
+            result = pipeline_graph(False, args["pipeline_mode"]).invoke(_batch_run_state(query, args, batch_id))
+        except Exception as e:
+            error = e
+    return _batch_entry(query, started_at, time.perf_counter() - start, result, error)
+
+async def _arun_batch_query(query: Dict[str, Any], args: Dict[str, Any], batch_id: str) -> Dict[str, Any]:
+    """Async variant of _run_batch_query"""
+    started_at = datetime.now().isoformat(timespec="seconds")
+    start = time.perf_counter()
+    result, error = None, None
+    with usage_labels(run=query["id"]):
+        configure_run_budget(args, run=query["id"])
+        try:
+            result = await pipeline_graph(True, args["pipeline_mode"]).ainvoke(_batch_run_state(query, args, batch_id))
+        except Exception as e:
+            error = e
+    return _batch_entry(query, started_at, time.perf_counter() - start, result, error)
+
+def run_batch(args: Dict[str, Any]) -> int:
+    """
+    Run every query of a JSONL query file and write a manifest of the results.
+    
+    Up to batch_parallel queries run at once. They share the process-wide LLM
+    gateway (one OpenAI client and response cache), the search providers and
+    search cache, the search rate limiters and, in async mode, the concurrency
+    budget, so those limits apply to the batch as a whole. Each query gets a
+    token, cost and time budget of its own, whose clock starts with the query.
+    
+    Args:
+        args: Parsed arguments; every option a query does not override applies to it
+        
+    Returns:
+        0 if every query succeeded, 1 otherwise
+    """
+    queries = load_batch_queries(args["batch"])
+    configure_request_limits([{**args, **query["overrides"]} for query in queries])
+    batch_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    manifest_path = args["batch_manifest"] or f"batch_manifest_{batch_id}.jsonl"
+    parallel = max(1, min(args["batch_parallel"], len(queries)))
+    
+    print(f"📦 Running batch {batch_id}: {len(queries)} queries, {parallel} at a time")
+    
+    with BatchManifest(manifest_path) as manifest:
+        def finish(entry: Dict[str, Any]) -> None:
+            manifest.record(entry)
+            status = "✅" if entry["status"] == "ok" else "❌"
+            print(f"{status} [{len(manifest.entries)}/{len(queries)}] {entry['id']} finished in {entry['seconds']:.1f}s"
+                  + (f": {entry['error']}" if entry["status"] != "ok" else f" -> {entry['report']}"))
+        
+        if args["use_async"]:
+            configure_concurrency(args["max_concurrency"])
+            
+            async def run_all() -> None:
+                semaphore = asyncio.Semaphore(parallel)
+                
+                async def run_query(query: Dict[str, Any]) -> None:
+                    async with semaphore:
+                        finish(await _arun_batch_query(query, args, batch_id))
+                
+                await asyncio.gather(*(run_query(query) for query in queries))
+            
+            asyncio.run(run_all())
+        else:
+            with ContextThreadPoolExecutor(max_workers=parallel) as executor:
+                futures = [executor.submit(_run_batch_query, query, args, batch_id) for query in queries]
+                for future in as_completed(futures):
+                    finish(future.result())
+        failures = manifest.failures()
+    
+    usage = get_usage_tracker()
+    totals = usage.totals()
+    usage_filename = usage.export(manifest_path)
+    print(f"\n📦 Batch finished: {len(queries) - len(failures)} succeeded, {len(failures)} failed — manifest saved to: {manifest_path}")
+    print(f"📊 LLM usage: {totals['calls']} calls ({totals['cached_calls']} cached), "
+          f"{totals['total_tokens']} tokens, ~${totals['cost_usd']:.2f} — saved to: {usage_filename}")
+    
+    return 1 if failures else 0
 
 def main() -> int:
     """
@@ -504,25 +1501,62 @@ def main() -> int:
     try:
         # Parse and validate arguments
         args = parse_arguments()
+        configure_clients(max_connections=args["max_connections"], http2=args["http2"])
+        if args["backend"] == "mock":
+            configure_mock_backends(args["mock_config"])
+            # Mock outputs must never be served to a live run from the shared caches,
+            # and cache hits would skip the simulated latencies and failures
+            args["llm_cache"] = "off"
+            args["search_cache"] = False
+            print("🧪 Using the mock LLM and search backends (LLM and search caches disabled)")
+        configure_llm_cache(mode=args["llm_cache"], cache_path=args["llm_cache_path"])
+        configure_scheduler(max_retries=args["max_retries"], max_concurrency=args["max_concurrency"])
+        configure_request_limits([args])
+        configure_run_budget(args)
+        
+        if args["batch"]:
+            return run_batch(args)
         
         # Create initial state with user query and models
-        initial_state = create_initial_state(args["query"])
-        initial_state["topic_model"] = args["topic_model"]
-        initial_state["summary_model"] = args["summary_model"]
-        initial_state["detail"] = args["detail"]
-        initial_state["breadth"] = args["breadth"]
-        initial_state["max_expansions"] = args["max_expansions"]
-        initial_state["max_workers"] = args["max_workers"]
-        initial_state["search_provider"] = args["search_provider"]
-        initial_state["legend"] = args["legend"]
+        initial_state = create_run_state(args)
+        
+        # Checkpoint every node so the run can be resumed with --resume
+        entry_point = "extract_topics"
+        if args["checkpoint"]:
+            initial_state["run_id"] = args["resume"] or datetime.now().strftime("%Y%m%d_%H%M%S")
+            initial_state["checkpoint_dir"] = args["checkpoint_dir"]
+            if args["resume"]:
+                initial_state, entry_point = resume_from_checkpoint(initial_state, args["rerun_from"])
+                if entry_point is None:
+                    print(f"✅ Run {args['resume']} already finished: {initial_state.get('report_filename')}")
+                    print("   Use --rerun-from generate_report to render the report again")
+                    return 0
+                print(f"💾 Resuming run {args['resume']} from {entry_point}")
+            else:
+                get_checkpoint_store(initial_state).save_step(START_STEP, initial_state)
+                print(f"💾 Checkpointing run {initial_state['run_id']} (resume with --resume {initial_state['run_id']})")
         
         # Run the research pipeline
-        result = app.invoke(initial_state)
+        graph = pipeline_graph(args["use_async"], args["pipeline_mode"], entry_point)
+        if args["use_async"]:
+            configure_concurrency(args["max_concurrency"])
+            result = asyncio.run(graph.ainvoke(initial_state))
+        else:
+            result = graph.invoke(initial_state)
         
         # Report is already saved in the generate_report node
         filename = result.get("report_filename", "research_report.md")
         print(f"\n✅ Research report saved to: {filename}")
         
+        usage = get_usage_tracker()
+        totals = usage.totals()
+        usage_filename = usage.export(filename)
+        print(f"📊 LLM usage: {totals['calls']} calls ({totals['cached_calls']} cached), "
+              f"{totals['total_tokens']} tokens, ~${totals['cost_usd']:.2f} — saved to: {usage_filename}")
+        budget = get_budget()
+        if budget.limited:
+            print(f"💸 Budget used: {budget.spent_fraction():.0%} of the run limit in {budget.elapsed():.0f}s")
+        
     except Exception as e:
         print(f"\n❌ Error during research pipeline execution: {e}")
         if args.get("verbose"):
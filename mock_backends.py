@@ -0,0 +1,758 @@
+"""
+Mock Backends Module
+
+This module provides offline stand-ins for the OpenAI and search APIs, so the
+pipeline can run on a laptop without network access or API keys. The mock LLM
+answers the Responses and Embeddings APIs with canned or templated outputs,
+and the mock search backend serves a local corpus ranked with BM25. Both
+sleep for latencies drawn from a configurable distribution and fail at
+configurable rates with the same HTTP errors the real providers send, so the
+gateway, request scheduler, caches and accounting run exactly as they do in a
+live run. Outputs, latencies and failures are derived from the request and a
+seed, which makes runs repeatable and suited to benchmarking the pipeline's
+own overhead and concurrency behavior.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace, UnionType
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel
+from models import SearchResult
+from passage_selector import select_passages
+from clients import get_client_registry
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+DEFAULT_OUTPUT_WORDS = 120
+DEFAULT_LIST_ITEMS = 3
+DEFAULT_EMBEDDING_DIMENSIONS = 64
+DEFAULT_CORPUS_SIZE = 200
+DEFAULT_DOCUMENT_WORDS = 600
+_STREAM_CHUNK_CHARACTERS = 16
+_WORD_RE = re.compile(r"\w+")
+_BULLET_RE = re.compile(r"^- (.+)$", re.MULTILINE)
+_VOCABULARY = (
+    "analysis capacity cost demand deployment efficiency energy evidence growth impact "
+    "industry infrastructure innovation investment market model network performance policy "
+    "production research regulation risk scale storage strategy supply system technology "
+    "trend adoption battery carbon climate data economy emissions grid health labor "
+    "manufacturing materials pricing region security software standards trade transport "
+    "water finance forecast funding governance incentives outcome pilot program survey"
+).split()
+
+# Rules for the prompts the pipeline sends; custom rules from the config are tried first
+_BUILTIN_RULES = [
+    (r"<Specific topic to focus on>\s*(?P<topic>.*?)\s*</Specific topic to focus on>",
+     "How has {topic} changed according to study {id}?\n"
+     "What evidence on {topic} did report {id} find?\n"
+     "Which regions lead in {topic} according to survey {id}?"),
+    (r"(?i)follow-up (?:research )?questions",
+     "What long-term effects did study {id} examine?\n"
+     "Which open problems were raised in report {id}?"),
+    (r"<Current Content>\s*(?P<content>.*?)\s*</Current Content>.*?Source Number: (?P<source>\d+)",
+     "{content}\n\n{words} [{source}]."),
+    (r"<Current Content>\s*(?P<content>.*?)\s*</Current Content>",
+     "{content}\n\n{words}."),
+    (r"<Section A>\s*(?P<first>.*?)\s*</Section A>\s*<Section B>\s*(?P<second>.*?)\s*</Section B>",
+     "{first}\n\n{second}"),
+    (r"<Content>\s*(?P<content>.*?)\s*</Content>",
+     "{content}"),
+]
+
+
+class MockAPIError(Exception):
+    """An HTTP error raised by a mock backend, shaped like the OpenAI SDK's errors."""
+
+    def __init__(self, message: str, status_code: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"{message} (status code {status_code})")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class LatencyDistribution:
+    """
+    A distribution of request latencies.
+
+    `ms` and `spread` mean, per distribution:
+        fixed        always `ms`
+        uniform      between `ms - spread` and `ms + spread`
+        normal       mean `ms`, standard deviation `spread`
+        lognormal    median `ms`, shape (sigma) `spread`
+        exponential  mean `ms`
+    """
+
+    def __init__(self, distribution: str = "fixed", ms: float = 0.0, spread: float = 0.0):
+        """
+        Initialize the distribution.
+
+        Args:
+            distribution: One of LATENCY_DISTRIBUTIONS
+            ms: Location of the distribution in milliseconds
+            spread: Width of the distribution; milliseconds, or sigma for lognormal
+
+        Raises:
+            ValueError: If the distribution is not supported
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unsupported latency distribution: {distribution}")
+        self.distribution = distribution
+        self.ms = max(0.0, ms)
+        self.spread = max(0.0, spread)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "LatencyDistribution":
+        """Create a distribution from its config entry, e.g. {"distribution": "lognormal", "ms": 800, "spread": 0.5}."""
+        return cls(**(config or {}))
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw a latency.
+
+        Args:
+            rng: Random number generator to draw from
+
+        Returns:
+            Latency in seconds
+        """
+        if self.distribution == "uniform":
+            ms = rng.uniform(self.ms - self.spread, self.ms + self.spread)
+        elif self.distribution == "normal":
+            ms = rng.gauss(self.ms, self.spread)
+        elif self.distribution == "lognormal":
+            ms = self.ms * math.exp(rng.gauss(0.0, self.spread))
+        elif self.distribution == "exponential":
+            ms = rng.expovariate(1.0 / self.ms) if self.ms else 0.0
+        else:
+            ms = self.ms
+        return max(0.0, ms) / 1000
+
+
+class FaultModel:
+    """
+    Decides how long a mock request takes and whether it fails.
+
+    Each attempt of a request gets its own random number generator, seeded by
+    the seed, the request and the number of earlier attempts, so a request
+    that failed may succeed when the scheduler retries it and a run is
+    repeatable regardless of scheduling.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after_ms: float = 1000,
+        seed: int = 0
+    ):
+        """
+        Initialize the fault model.
+
+        Args:
+            latency: Latency distribution of successful and failed requests
+            error_rate: Fraction of attempts failing with a 500 server error
+            throttle_rate: Fraction of attempts rejected with a 429 and a Retry-After hint
+            retry_after_ms: Retry-After hint sent with throttled responses
+            seed: Seed making latencies and failures repeatable
+        """
+        self.latency = latency or LatencyDistribution()
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after_ms = retry_after_ms
+        self.seed = seed
+        self._attempts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], seed: int) -> "FaultModel":
+        """Create a fault model from the "llm" or "search" section of a mock config."""
+        return cls(
+            latency=LatencyDistribution.from_config(config.get("latency")),
+            error_rate=config.get("error_rate", 0.0),
+            throttle_rate=config.get("throttle_rate", 0.0),
+            retry_after_ms=config.get("retry_after_ms", 1000),
+            seed=seed
+        )
+
+    def plan(self, request_key: str) -> Tuple[float, Optional[MockAPIError]]:
+        """
+        Decide the outcome of the next attempt of a request.
+
+        Args:
+            request_key: Identity of the request, e.g. a hash of its arguments
+
+        Returns:
+            Tuple of (latency in seconds, error to raise or None)
+        """
+        with self._lock:
+            attempt = self._attempts[request_key]
+            self._attempts[request_key] += 1
+        rng = random.Random(f"{self.seed}:{request_key}:{attempt}")
+        latency = self.latency.sample(rng)
+        draw = rng.random()
+        if draw < self.throttle_rate:
+            return latency, MockAPIError("Mock rate limit reached", 429, {"retry-after-ms": str(self.retry_after_ms)})
+        if draw < self.throttle_rate + self.error_rate:
+            return latency, MockAPIError("Mock server error", 500)
+        return latency, None
+
+    def wait(self, request_key: str) -> None:
+        """Block for the attempt's latency, then raise its error if it fails."""
+        latency, error = self.plan(request_key)
+        time.sleep(latency)
+        if error is not None:
+            raise error
+
+    async def await_(self, request_key: str) -> None:
+        """Async variant of wait."""
+        latency, error = self.plan(request_key)
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+
+
+def _digest(data: Any) -> str:
+    """Return a stable hash of JSON-serializable data."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(_VOCABULARY) for _ in range(count))
+
+
+class _TemplateValues(dict):
+    """Template values that render unknown placeholders as empty strings."""
+
+    def __missing__(self, key: str) -> str:
+        return ""
+
+
+class MockLLM:
+    """
+    Produces responses for the mock OpenAI clients.
+
+    A request's prompt (its instructions and input) is matched against the
+    configured rules in order, then the built-in rules for the pipeline's
+    prompts; the first matching rule's template is filled with the regex's
+    named groups, `{words}` (filler text of `output_words` words), `{id}` (a
+    short hash of the prompt) and `{model}`. Structured outputs are generated
+    from the requested schema.
+    """
+
+    def __init__(
+        self,
+        faults: Optional[FaultModel] = None,
+        rules: Optional[List[Tuple[str, str]]] = None,
+        output_words: int = DEFAULT_OUTPUT_WORDS,
+        list_items: int = DEFAULT_LIST_ITEMS,
+        embedding_dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS,
+        seed: int = 0
+    ):
+        """
+        Initialize the mock LLM.
+
+        Args:
+            faults: Latency and failure model of the requests
+            rules: (regex, template) pairs tried before the built-in rules
+            output_words: Words of filler text in `{words}`
+            list_items: Items generated for list fields of structured outputs
+            embedding_dimensions: Length of embedding vectors
+            seed: Seed making outputs repeatable
+        """
+        self.faults = faults or FaultModel(seed=seed)
+        self.rules = [(re.compile(pattern, re.DOTALL), template) for pattern, template in (rules or []) + _BUILTIN_RULES]
+        self.output_words = output_words
+        self.list_items = list_items
+        self.embedding_dimensions = embedding_dimensions
+        self.seed = seed
+
+    @staticmethod
+    def prompt_text(kwargs: Dict[str, Any]) -> str:
+        """Flatten the instructions and input of a Responses API call into one string."""
+        request_input = kwargs.get("input", "")
+        if isinstance(request_input, list):
+            request_input = "\n\n".join(
+                message.get("content", "") if isinstance(message, dict) else str(message)
+                for message in request_input
+            )
+        return f"{kwargs.get('instructions') or ''}\n\n{request_input}".strip()
+
+    def respond(self, kwargs: Dict[str, Any], text_format: Optional[Type[BaseModel]] = None) -> SimpleNamespace:
+        """
+        Build the response to a Responses API call.
+
+        Args:
+            kwargs: Arguments of the call
+            text_format: Pydantic model of a structured output, if any
+
+        Returns:
+            An object with output_text, output_parsed and usage, like an OpenAI response
+        """
+        prompt = self.prompt_text(kwargs)
+        prompt_id = _digest(prompt)
+        rng = random.Random(f"{self.seed}:{prompt_id}")
+        if text_format is not None:
+            parsed = self._generate(text_format, prompt, rng, subject=None)
+            output_text = parsed.model_dump_json()
+        else:
+            parsed = None
+            output_text = self._render(prompt, rng, prompt_id[:6], kwargs.get("model", ""))
+        usage = SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=max(1, len(output_text) // 4))
+        return SimpleNamespace(output_text=output_text, output_parsed=parsed, usage=usage)
+
+    def embed(self, texts: List[str]) -> SimpleNamespace:
+        """
+        Build the response to an Embeddings API call.
+
+        Words are hashed into a fixed number of dimensions, so texts sharing
+        words get similar vectors.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            An object with data and usage, like an OpenAI embeddings response
+        """
+        data = []
+        for index, text in enumerate(texts):
+            vector = [0.0] * self.embedding_dimensions
+            for word in _WORD_RE.findall(text.lower()):
+                bucket = int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16) % self.embedding_dimensions
+                vector[bucket] += 1.0
+            data.append(SimpleNamespace(index=index, embedding=vector))
+        return SimpleNamespace(data=data, usage=SimpleNamespace(prompt_tokens=sum(len(text) // 4 for text in texts)))
+
+    def _render(self, prompt: str, rng: random.Random, prompt_id: str, model: str) -> str:
+        """Fill the template of the first rule matching the prompt."""
+        for pattern, template in self.rules:
+            match = pattern.search(prompt)
+            if match:
+                break
+        else:
+            match, template = None, "{words}."
+        values = _TemplateValues(match.groupdict() if match else {})
+        values.update(words=_words(rng, self.output_words).capitalize(), id=prompt_id, model=model)
+        return template.format_map(values).strip()
+
+    def _generate(self, model: Type[BaseModel], prompt: str, rng: random.Random, subject: Optional[str]) -> BaseModel:
+        """
+        Generate an instance of a Pydantic model.
+
+        A list of objects gets one object per bulleted line of the prompt, with
+        the line's text as the object's first string field, so a request
+        covering several listed items (e.g. batched subquestions) is answered
+        for each of them.
+        """
+        values = {}
+        subject_field = next((name for name, field in model.model_fields.items() if field.annotation is str), None) if subject else None
+        for name, field in model.model_fields.items():
+            if name == subject_field:
+                values[name] = subject
+            else:
+                values[name] = self._generate_value(field.annotation, name, prompt, rng, subject)
+        return model(**values)
+
+    def _generate_value(self, annotation: Any, name: str, prompt: str, rng: random.Random, subject: Optional[str]) -> Any:
+        """Generate a value of a field's type."""
+        origin = get_origin(annotation)
+        if origin is Union or origin is UnionType:
+            annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+            origin = get_origin(annotation)
+        if origin in (list, List):
+            item_type = (get_args(annotation) or (str,))[0]
+            if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+                subjects = _BULLET_RE.findall(prompt) or [None] * self.list_items
+                return [self._generate(item_type, prompt, rng, item) for item in subjects]
+            return [self._generate_value(item_type, name, prompt, rng, subject) for _ in range(self.list_items)]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self._generate(annotation, prompt, rng, subject)
+        if annotation is bool:
+            return rng.random() < 0.5
+        if annotation is int:
+            return rng.randint(1, 10)
+        if annotation is float:
+            return round(rng.random(), 3)
+        label = name.replace("_", " ").rstrip("s")
+        return f"{label.capitalize()} on {subject or _words(rng, 2)}: {_words(rng, 4)}"
+
+
+class _MockStream:
+    """A Responses API stream of a mock response, usable with `with` and `async with`."""
+
+    def __init__(self, response: SimpleNamespace):
+        self._response = response
+
+    def _events(self) -> List[SimpleNamespace]:
+        text = self._response.output_text
+        events = [
+            SimpleNamespace(type="response.output_text.delta", delta=text[start:start + _STREAM_CHUNK_CHARACTERS])
+            for start in range(0, len(text), _STREAM_CHUNK_CHARACTERS)
+        ]
+        return events + [SimpleNamespace(type="response.completed")]
+
+    def __enter__(self) -> "_MockStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def __iter__(self):
+        return iter(self._events())
+
+    def get_final_response(self) -> SimpleNamespace:
+        return self._response
+
+
+class _AsyncMockStream(_MockStream):
+    async def __aenter__(self) -> "_AsyncMockStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    async def _aiter(self):
+        for event in self._events():
+            await asyncio.sleep(0)
+            yield event
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def get_final_response(self) -> SimpleNamespace:
+        return self._response
+
+
+class _MockResponses:
+    def __init__(self, llm: MockLLM):
+        self._llm = llm
+
+    def create(self, **kwargs: Any) -> SimpleNamespace:
+        self._llm.faults.wait(_digest(kwargs))
+        return self._llm.respond(kwargs)
+
+    def parse(self, text_format: Type[BaseModel], **kwargs: Any) -> SimpleNamespace:
+        self._llm.faults.wait(_digest([text_format.__name__, kwargs]))
+        return self._llm.respond(kwargs, text_format)
+
+    def stream(self, **kwargs: Any) -> _MockStream:
+        self._llm.faults.wait(_digest(kwargs))
+        return _MockStream(self._llm.respond(kwargs))
+
+
+class _AsyncMockResponses:
+    def __init__(self, llm: MockLLM):
+        self._llm = llm
+
+    async def create(self, **kwargs: Any) -> SimpleNamespace:
+        await self._llm.faults.await_(_digest(kwargs))
+        return self._llm.respond(kwargs)
+
+    async def parse(self, text_format: Type[BaseModel], **kwargs: Any) -> SimpleNamespace:
+        await self._llm.faults.await_(_digest([text_format.__name__, kwargs]))
+        return self._llm.respond(kwargs, text_format)
+
+    def stream(self, **kwargs: Any) -> "_DeferredAsyncStream":
+        return _DeferredAsyncStream(self._llm, kwargs)
+
+
+class _DeferredAsyncStream:
+    """Async stream whose latency and failure happen when it is entered, like a real request."""
+
+    def __init__(self, llm: MockLLM, kwargs: Dict[str, Any]):
+        self._llm = llm
+        self._kwargs = kwargs
+
+    async def __aenter__(self) -> _AsyncMockStream:
+        await self._llm.faults.await_(_digest(self._kwargs))
+        return _AsyncMockStream(self._llm.respond(self._kwargs))
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+
+class _MockEmbeddings:
+    def __init__(self, llm: MockLLM):
+        self._llm = llm
+
+    def create(self, model: str, input: List[str]) -> SimpleNamespace:
+        self._llm.faults.wait(_digest([model, input]))
+        return self._llm.embed(input)
+
+
+class _AsyncMockEmbeddings:
+    def __init__(self, llm: MockLLM):
+        self._llm = llm
+
+    async def create(self, model: str, input: List[str]) -> SimpleNamespace:
+        await self._llm.faults.await_(_digest([model, input]))
+        return self._llm.embed(input)
+
+
+class MockOpenAI:
+    """Drop-in for the parts of the OpenAI client the gateway uses, answered by a MockLLM."""
+
+    def __init__(self, llm: MockLLM):
+        self.responses = _MockResponses(llm)
+        self.embeddings = _MockEmbeddings(llm)
+
+
+class MockAsyncOpenAI:
+    """Drop-in for the parts of the AsyncOpenAI client the gateway uses, answered by a MockLLM."""
+
+    def __init__(self, llm: MockLLM):
+        self.responses = _AsyncMockResponses(llm)
+        self.embeddings = _AsyncMockEmbeddings(llm)
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class MockSearchBackend:
+    """
+    Searches a local corpus with BM25.
+
+    The corpus is indexed once; a query scores only the documents sharing a
+    term with it. If fewer documents match than requested, the rest are
+    filled with documents picked deterministically from the query, so every
+    search returns `num_results` results as a live provider would.
+    """
+
+    def __init__(self, documents: List[SearchResult], faults: Optional[FaultModel] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the backend and index the corpus.
+
+        Args:
+            documents: Corpus documents
+            faults: Latency and failure model of the searches
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization strength
+
+        Raises:
+            ValueError: If the corpus is empty
+        """
+        if not documents:
+            raise ValueError("The mock search corpus is empty")
+        self.documents = documents
+        self.faults = faults or FaultModel()
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths = []
+        for index, document in enumerate(documents):
+            counts = Counter(_tokens(f"{document.title} {document.text}"))
+            self._lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self._postings[term].append((index, count))
+        self._average_length = max(sum(self._lengths) / len(self._lengths), 1.0)
+
+    @classmethod
+    def from_path(cls, path: str, faults: Optional[FaultModel] = None) -> "MockSearchBackend":
+        """
+        Load a corpus from a JSONL file of {"url", "title", "text"} objects, or
+        from a directory of .txt and .md files whose first line is the title.
+
+        Args:
+            path: Corpus file or directory
+            faults: Latency and failure model of the searches
+
+        Returns:
+            The MockSearchBackend serving the corpus
+        """
+        documents = []
+        if os.path.isdir(path):
+            for root, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    if not name.endswith((".txt", ".md")):
+                        continue
+                    file_path = os.path.join(root, name)
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                    title = next((line.strip("# ").strip() for line in text.splitlines() if line.strip()), name)
+                    documents.append(SearchResult(url=f"file://{os.path.abspath(file_path)}", title=title, text=text))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        documents.append(SearchResult.from_dict(json.loads(line)))
+        return cls(documents, faults)
+
+    @classmethod
+    def synthetic(
+        cls,
+        size: int = DEFAULT_CORPUS_SIZE,
+        document_words: int = DEFAULT_DOCUMENT_WORDS,
+        faults: Optional[FaultModel] = None,
+        seed: int = 0
+    ) -> "MockSearchBackend":
+        """
+        Generate a corpus of filler documents over the mock LLM's vocabulary.
+
+        Args:
+            size: Number of documents
+            document_words: Words per document
+            faults: Latency and failure model of the searches
+            seed: Seed making the corpus repeatable
+
+        Returns:
+            The MockSearchBackend serving the corpus
+        """
+        rng = random.Random(seed)
+        documents = []
+        for index in range(size):
+            paragraphs = [_words(rng, 60).capitalize() + "." for _ in range(max(1, document_words // 60))]
+            documents.append(SearchResult(
+                url=f"https://mock.local/documents/{index}",
+                title=_words(rng, 5).title(),
+                text="\n\n".join(paragraphs)
+            ))
+        return cls(documents, faults)
+
+    def rank(self, query: str, num_results: int) -> List[int]:
+        """
+        Return the indices of the documents best matching a query.
+
+        Args:
+            query: The search query string
+            num_results: Number of documents to return
+
+        Returns:
+            Document indices, best first
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(_tokens(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.documents) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, count in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._average_length)
+                scores[index] += idf * count * (self.k1 + 1) / (count + norm)
+        ranked = heapq.nlargest(num_results, scores, key=lambda index: (scores[index], -index))
+        if len(ranked) < num_results:
+            rng = random.Random(_digest(query))
+            remaining = [index for index in range(len(self.documents)) if index not in scores]
+            ranked.extend(rng.sample(remaining, min(num_results - len(ranked), len(remaining))))
+        return ranked
+
+    def search(self, query: str, num_results: int, max_characters: int, mode: str = "text") -> List[SearchResult]:
+        """
+        Search the corpus.
+
+        Args:
+            query: The search query string
+            num_results: Number of results to return
+            max_characters: Characters of content per result
+            mode: "text" for the beginning of each document, "highlights" for its passages most relevant to the query
+
+        Returns:
+            Normalized search results
+        """
+        self.faults.wait(_digest([query, num_results]))
+        return self._results(query, num_results, max_characters, mode)
+
+    async def asearch(self, query: str, num_results: int, max_characters: int, mode: str = "text") -> List[SearchResult]:
+        """Async variant of search."""
+        await self.faults.await_(_digest([query, num_results]))
+        return self._results(query, num_results, max_characters, mode)
+
+    def _results(self, query: str, num_results: int, max_characters: int, mode: str) -> List[SearchResult]:
+        results = []
+        for index in self.rank(query, num_results):
+            document = self.documents[index]
+            if mode == "highlights":
+                text = select_passages(document.text, query, max_characters)
+            else:
+                text = document.text[:max_characters]
+            results.append(SearchResult(url=document.url, title=document.title, text=text))
+        return results
+
+
+_llm: Optional[MockLLM] = None
+_search_backend: Optional[MockSearchBackend] = None
+_backends_lock = threading.Lock()
+
+
+def load_mock_config(path: Optional[str]) -> Dict[str, Any]:
+    """
+    Read a mock backend configuration file.
+
+    Args:
+        path: JSON file, or None for the defaults
+
+    Returns:
+        The configuration dictionary
+    """
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _create_search_backend(config: Dict[str, Any], seed: int) -> MockSearchBackend:
+    faults = FaultModel.from_config(config, seed)
+    if config.get("corpus"):
+        return MockSearchBackend.from_path(config["corpus"], faults)
+    return MockSearchBackend.synthetic(
+        size=config.get("corpus_size", DEFAULT_CORPUS_SIZE),
+        document_words=config.get("document_words", DEFAULT_DOCUMENT_WORDS),
+        faults=faults,
+        seed=seed
+    )
+
+
+def configure_mock_backends(config_path: Optional[str] = None) -> MockLLM:
+    """
+    Serve every LLM call and "mock" provider search of the process from the mock backends.
+
+    The mock OpenAI clients are installed in the shared client registry, so
+    call this before the first LLM request.
+
+    Args:
+        config_path: JSON file configuring the backends, or None for the defaults
+
+    Returns:
+        The MockLLM answering the calls
+    """
+    global _llm, _search_backend
+    config = load_mock_config(config_path)
+    seed = config.get("seed", 0)
+    llm_config = config.get("llm", {})
+    llm = MockLLM(
+        faults=FaultModel.from_config(llm_config, seed),
+        rules=[(rule["match"], rule["output"]) for rule in llm_config.get("responses", [])],
+        output_words=llm_config.get("output_words", DEFAULT_OUTPUT_WORDS),
+        list_items=llm_config.get("list_items", DEFAULT_LIST_ITEMS),
+        embedding_dimensions=llm_config.get("embedding_dimensions", DEFAULT_EMBEDDING_DIMENSIONS),
+        seed=seed
+    )
+    search_backend = _create_search_backend(config.get("search", {}), seed)
+    with _backends_lock:
+        _llm = llm
+        _search_backend = search_backend
+    get_client_registry().use_clients(MockOpenAI(llm), MockAsyncOpenAI(llm))
+    return llm
+
+
+def get_mock_search_backend() -> MockSearchBackend:
+    """
+    Return the process-wide mock search backend, creating a default one if needed.
+
+    Returns:
+        The shared MockSearchBackend instance
+    """
+    global _search_backend
+    with _backends_lock:
+        if _search_backend is None:
+            _search_backend = _create_search_backend({}, 0)
+        return _search_backend
@@ -0,0 +1,126 @@
+"""
+Models Module
+
+This module defines the compact internal representation of search results and
+the articles built from them. Both use __slots__ instead of per-instance
+dictionaries, and URLs are interned, so the same URL reached through several
+questions, topics or batch runs is stored once. Article text can be supplied
+by a loader that is only called when the text is first read.
+"""
+
+import sys
+from typing import Any, Callable, Dict, Optional
+
+
+class SearchResult:
+    """A single search result normalized across providers."""
+
+    __slots__ = ("url", "title", "text")
+
+    def __init__(self, url: str = "", title: str = "", text: str = ""):
+        """
+        Initialize the result.
+
+        Args:
+            url: Result URL
+            title: Page title
+            text: Page content returned by the provider
+        """
+        self.url = sys.intern(url)
+        self.title = title
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"SearchResult(url={self.url!r}, title={self.title!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation of the result."""
+        return {"url": self.url, "title": self.title, "text": self.text}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        """Rebuild a result from its dictionary representation."""
+        return cls(url=data.get("url", ""), title=data.get("title", ""), text=data.get("text", ""))
+
+
+class Article:
+    """
+    A search result in the context of the research that found it.
+
+    `question` is the search query the article was found for. `subquestion`
+    is the research subquestion for articles found by the research iterations,
+    and None for articles found while expanding a section. `source_id` is the
+    article's citation number once it has been integrated, and `relevance` its
+    ranking score when articles were ranked.
+    """
+
+    __slots__ = ("url", "title", "question", "subquestion", "source_id", "relevance", "_text", "_text_loader")
+
+    def __init__(
+        self,
+        url: str,
+        title: str,
+        text: Optional[str] = None,
+        question: str = "",
+        subquestion: Optional[str] = None,
+        source_id: Optional[int] = None,
+        relevance: Optional[float] = None,
+        text_loader: Optional[Callable[[], str]] = None
+    ):
+        """
+        Initialize the article.
+
+        Args:
+            url: Article URL
+            title: Article title
+            text: Article text; may be omitted when text_loader is given
+            question: Search query the article was found for
+            subquestion: Research subquestion the article belongs to, if any
+            source_id: Citation number, if already registered
+            relevance: Ranking score, if the article was ranked
+            text_loader: Function returning the text, called on first access
+        """
+        self.url = sys.intern(url or "")
+        self.title = title or ""
+        self.question = question
+        self.subquestion = subquestion
+        self.source_id = source_id
+        self.relevance = relevance
+        self._text = text
+        self._text_loader = text_loader if text is None else None
+
+    @classmethod
+    def from_result(cls, result: SearchResult, question: str, subquestion: Optional[str] = None) -> "Article":
+        """
+        Create an article from a search result.
+
+        Args:
+            result: The search result
+            question: Search query the result was returned for
+            subquestion: Research subquestion the query belongs to, if any
+
+        Returns:
+            The new Article
+        """
+        return cls(url=result.url, title=result.title, text=result.text, question=question, subquestion=subquestion)
+
+    @property
+    def text(self) -> str:
+        """The article text, loaded on first access if a loader was given."""
+        if self._text is None:
+            self._text = self._text_loader() if self._text_loader is not None else ""
+            self._text_loader = None
+        return self._text
+
+    def __repr__(self) -> str:
+        return f"Article(url={self.url!r}, title={self.title!r}, source_id={self.source_id!r})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Checkpoints store the text itself rather than the loader
+        return {
+            "url": self.url, "title": self.title, "text": self.text, "question": self.question,
+            "subquestion": self.subquestion, "source_id": self.source_id, "relevance": self.relevance
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
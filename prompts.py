@@ -25,6 +25,17 @@ Given the topic "{topic}", write {subq_range} insightful and specific subquestio
 Generate subquestions that will help thoroughly investigate this topic.
 """
 
+BATCH_SUBQUESTION_PROMPT = """
+For each of the topics below, write {subq_range} insightful and specific subquestions related to this broader research question:
+"{user_query}"
+
+<Topics>
+{topics}
+</Topics>
+
+Generate subquestions that will help thoroughly investigate each topic. Return one entry per topic, using the topic text exactly as given.
+"""
+
 # Fact Extraction Prompts
 FACT_EXTRACTION_PROMPT = """
 You are a fact extraction specialist. Given a subquestion and an article, extract only the factual information that could help in answering the question.
@@ -377,6 +388,47 @@ Clean the content by removing any academic formatting and creating a natural, fl
 Return the cleaned content as a natural, flowing narrative without academic formatting, but with all in-text citations preserved. If you need you are allowed to create sub-sections, but they must be topic specific:
 """
 
+MERGE_TOPIC_SECTIONS_PROMPT = """
+You are a research analyst tasked with merging two partial research sections about the same SPECIFIC TOPIC into one cohesive section.
+
+<SPECIFIC TOPIC TO FOCUS ON>
+{topic}
+</SPECIFIC TOPIC TO FOCUS ON>
+
+<Section A>
+{first_section}
+</Section A>
+
+<Section B>
+{second_section}
+</Section B>
+
+<Task>
+Merge Section A and Section B into a single, unified narrative about "{topic}".
+
+Your goal is to:
+
+1. **Combine** the information from both sections into one cohesive narrative
+2. **Remove redundancy** - when both sections state the same fact, keep it once and keep all of its citations
+3. **Order logically** - group related information together so the section reads naturally
+4. **Stay on topic** - keep only information that is directly about "{topic}"
+
+<CITATION REQUIREMENTS - ABSOLUTELY CRITICAL>
+- **Preserve ALL in-text citations like [1], [2], [3], etc. exactly as they appear**
+- **Do not renumber, merge, or invent citation numbers**
+- **Keep each citation attached to the information it supports**
+
+<Requirements>
+- Maintain professional, academic tone
+- Do not drop any information that is relevant to "{topic}"
+- DO NOT include any "References:", "Citations:", or "Sources:" sections
+- DO NOT include any academic formatting like "Abstract:", "Introduction:", "Conclusion:"
+- Write in a natural, flowing style without academic structure
+
+<Output>
+Return only the merged section with all in-text citations preserved:
+"""
+
 # Follow-up Generation Prompt (for main pipeline)
 FOLLOW_UP_GENERATION_PROMPT = """
 Based on this article content, what are 2 meaningful follow-up research questions that could deepen understanding of the original topic: '{main_query}'?
@@ -0,0 +1,117 @@
+"""
+Rate Limiter Module
+
+This module provides token-bucket rate limiters keyed by provider or model, so
+that concurrent searches and LLM calls (from threads or asyncio tasks) never
+exceed the request rate a provider allows. The request scheduler in
+scheduler.py waits on them before every request.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket usable from both threads and coroutines.
+
+    Tokens refill continuously at `rate` per second up to `burst`. Each request
+    consumes one token; callers wait until a token is available. A rate of None
+    or 0 disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate: Requests per second, or None/0 for no limit
+            burst: Maximum number of requests allowed back-to-back (default: rate, at least 1)
+        """
+        self.rate = rate or None
+        self.burst = burst or max(1, int(rate or 1))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take a token, possibly going into debt, and return how long to wait for it.
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._lock:
+            now = time.monotonic()
+            paused = max(0.0, self._paused_until - now)
+            if self.rate is None:
+                return paused
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return paused
+            return max(paused, -self._tokens / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every request for a while, e.g. when the provider asks to retry later.
+
+        Args:
+            seconds: How long from now no request may be sent
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait, without blocking the event loop, until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """
+    Return the shared rate limiter for a provider, creating an unlimited one if needed.
+
+    Args:
+        name: Provider or model key, e.g. "exa" or "openai:gpt-4o"
+
+    Returns:
+        The provider's RateLimiter
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter()
+        return _limiters[name]
+
+
+def configure_rate_limit(name: str, rate: Optional[float], burst: Optional[int] = None) -> RateLimiter:
+    """
+    Set the request rate allowed for a provider.
+
+    Args:
+        name: Provider or model key, e.g. "exa" or "openai:gpt-4o"
+        rate: Requests per second, or None/0 for no limit
+        burst: Maximum number of requests allowed back-to-back
+
+    Returns:
+        The provider's new RateLimiter
+    """
+    limiter = RateLimiter(rate, burst)
+    with _limiters_lock:
+        _limiters[name] = limiter
+    return limiter
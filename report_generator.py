@@ -3,62 +3,432 @@ Report Generator Module
 
 This module handles the generation of comprehensive research reports from
 synthesized content, including introduction, conclusion, and source citations.
+In streaming mode the report is appended to its markdown file as the LLM
+generates it, so partial reports can be tailed while generation is running.
 """
 
-from openai import OpenAI
+import asyncio
 import datetime
-from typing import Dict, Any
+import queue
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from prompts import INTRODUCTION_PROMPT, CONCLUSION_PROMPT
+from llm_gateway import get_llm_client
+from accounting import ContextThreadPoolExecutor
+from event_log import log_event
 
 
-def generate_report(state: Dict[str, Any]) -> Dict[str, Any]:
+def generate_report(state: Dict[str, Any], on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     """
     Generate a comprehensive research report from synthesized content.
     
     This function creates a complete research report including introduction,
     topic sections, conclusion, and properly formatted source citations.
-    The report is saved as a markdown file with timestamp.
+    The title, introduction and conclusion only depend on the query and the
+    topic sections, so they are generated concurrently, and each falls back
+    to a default text if its call fails. The report is saved as a markdown
+    file with timestamp. With state["stream_report"] set, the file is written
+    while the introduction is still being generated.
     
     Args:
         state: Pipeline state containing synthesized content, topics, and metadata
+        on_event: Optional callback for streaming progress events (see ReportStream)
         
     Returns:
         Updated state with report content and filename
+    """
+    # Shared LLM gateway (OpenAI client with response caching)
+    client = get_llm_client()
+    
+    model = state.get("summary_model", "gpt-4o")
+    print("\n📝 Generating research report...")
+    
+    topic_content = _collect_topic_content(state)
+    intro_prompt = INTRODUCTION_PROMPT.format(user_query=state['user_query'], topic_content=topic_content)
+    conclusion_prompt = CONCLUSION_PROMPT.format(user_query=state['user_query'], topic_content=topic_content)
+    
+    with ContextThreadPoolExecutor(max_workers=3) as executor:
+        # Generate a proper title based on the user query
+        title_future = executor.submit(_generate_title, client, model, state)
+        conclusion_future = executor.submit(
+            _generate_section, client, model, "conclusion", conclusion_prompt, "CONCLUSION_PROMPT", _fallback_section(state, "conclusion")
+        )
+        
+        if state.get("stream_report"):
+            intro_deltas = _prefetch(executor, client.responses.stream(model=model, input=intro_prompt, prompt_name="INTRODUCTION_PROMPT"))
+            with ReportStream(_report_filename(state), on_event) as stream:
+                report_title = title_future.result()
+                stream.write_section("title", f"# {report_title}\n\n")
+                stream.write_section("legend", _legend_section(state))
+                stream.write("## Introduction\n\n")
+                stream.stream_section("introduction", intro_deltas, _fallback_section(state, "introduction"))
+                stream.write("\n\n")
+                for topic, section in _body_sections(state):
+                    stream.write_section(topic, section)
+                stream.write("\n\n## Conclusion\n\n")
+                stream.write_section("conclusion", conclusion_future.result())
+                stream.write_section("sources", _sources_section(state))
+            return _record_report(state, stream.text, report_title, stream.filename)
         
-    Raises:
-        Exception: If report generation fails due to missing content or API errors
+        # Intro generation using topic sections
+        intro_future = executor.submit(
+            _generate_section, client, model, "introduction", intro_prompt, "INTRODUCTION_PROMPT", _fallback_section(state, "introduction")
+        )
+        report_title = title_future.result()
+        intro = intro_future.result()
+        conclusion = conclusion_future.result()
+
+    report = _assemble_report(state, report_title, intro, conclusion)
+    return _save_report(state, report, report_title)
+
+
+async def agenerate_report(state: Dict[str, Any], on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     """
-    # Initialize OpenAI client
-    client = OpenAI()
+    Async variant of generate_report for the asyncio pipeline.
+    
+    Args:
+        state: Pipeline state containing synthesized content, topics, and metadata
+        on_event: Optional callback for streaming progress events (see ReportStream)
+        
+    Returns:
+        Updated state with report content and filename
+    """
+    client = get_llm_client()
     
     model = state.get("summary_model", "gpt-4o")
-    legend_enabled = state.get("legend", True)
     print("\n📝 Generating research report...")
     
-    # Generate a proper title based on the user query
-    title_prompt = f"""
-Create a concise, professional research report title based on this query: "{state['user_query']}"
+    topic_content = _collect_topic_content(state)
+    intro_prompt = INTRODUCTION_PROMPT.format(user_query=state['user_query'], topic_content=topic_content)
+    conclusion_prompt = CONCLUSION_PROMPT.format(user_query=state['user_query'], topic_content=topic_content)
+    
+    title_task = asyncio.ensure_future(_agenerate_title(client, model, state))
+    conclusion_task = asyncio.ensure_future(_agenerate_section(
+        client, model, "conclusion", conclusion_prompt, "CONCLUSION_PROMPT", _fallback_section(state, "conclusion")
+    ))
+    
+    if state.get("stream_report"):
+        intro_deltas = _aprefetch(client.aresponses.stream(model=model, input=intro_prompt, prompt_name="INTRODUCTION_PROMPT"))
+        with ReportStream(_report_filename(state), on_event) as stream:
+            report_title = await title_task
+            stream.write_section("title", f"# {report_title}\n\n")
+            stream.write_section("legend", _legend_section(state))
+            stream.write("## Introduction\n\n")
+            await stream.astream_section("introduction", intro_deltas, _fallback_section(state, "introduction"))
+            stream.write("\n\n")
+            for topic, section in _body_sections(state):
+                stream.write_section(topic, section)
+            stream.write("\n\n## Conclusion\n\n")
+            stream.write_section("conclusion", await conclusion_task)
+            stream.write_section("sources", _sources_section(state))
+        return _record_report(state, stream.text, report_title, stream.filename)
+    
+    report_title, intro, conclusion = await asyncio.gather(
+        title_task,
+        _agenerate_section(client, model, "introduction", intro_prompt, "INTRODUCTION_PROMPT", _fallback_section(state, "introduction")),
+        conclusion_task
+    )
 
-The title should be:
-- Clear and descriptive
-- Professional in tone
-- Under 100 characters
-- Suitable for academic or business contexts
+    report = _assemble_report(state, report_title, intro, conclusion)
+    return _save_report(state, report, report_title)
 
-Return only the title, no quotes or formatting:
-"""
+
+class ReportStream:
+    """
+    Appends a report to its markdown file piece by piece.
+    
+    Every write is flushed, so the file can be tailed while the report is
+    generated. Progress events are dictionaries with an "event" key
+    ("section_started", "section_completed" or "report_completed"), the
+    "section" name, the "filename" and the "characters" written so far. They
+    are passed to `on_event` if given and summarized on stdout otherwise.
+    """
+    
+    def __init__(self, filename: str, on_event: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize the stream; the file is created when the context is entered.
+        
+        Args:
+            filename: Markdown file to write
+            on_event: Optional callback receiving progress events
+        """
+        self.filename = filename
+        self.on_event = on_event
+        self._parts: List[str] = []
+        self._characters = 0
+        self._file = None
+    
+    def __enter__(self) -> "ReportStream":
+        self._file = open(self.filename, 'w', encoding='utf-8')
+        print(f"   📄 Streaming report to: {self.filename}")
+        return self
+    
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self._file.close()
+        if exc_type is None:
+            self._emit("report_completed")
+    
+    @property
+    def text(self) -> str:
+        """Everything written so far."""
+        return "".join(self._parts)
+    
+    def write(self, text: str) -> None:
+        """Append text to the file and flush it."""
+        if not text:
+            return
+        self._file.write(text)
+        self._file.flush()
+        self._parts.append(text)
+        self._characters += len(text)
+    
+    def write_section(self, name: str, text: str) -> None:
+        """Append a section whose content is already complete."""
+        if not text:
+            return
+        self._emit("section_started", name)
+        self.write(text)
+        self._emit("section_completed", name)
+    
+    def stream_section(self, name: str, deltas: Iterator[str], fallback: str = "") -> str:
+        """
+        Append a section as its text is generated.
+        
+        Args:
+            name: Section name reported in progress events
+            deltas: Text deltas of the section
+            fallback: Text written instead if generation fails before producing any text
+            
+        Returns:
+            The section text as written
+        """
+        self._emit("section_started", name)
+        first_part = len(self._parts)
+        try:
+            for delta in deltas:
+                self.write(delta)
+        except Exception as e:
+            self._write_fallback(name, first_part, fallback, e)
+        self._emit("section_completed", name)
+        return "".join(self._parts[first_part:])
+    
+    async def astream_section(self, name: str, deltas: AsyncIterator[str], fallback: str = "") -> str:
+        """Async variant of stream_section."""
+        self._emit("section_started", name)
+        first_part = len(self._parts)
+        try:
+            async for delta in deltas:
+                self.write(delta)
+        except Exception as e:
+            self._write_fallback(name, first_part, fallback, e)
+        self._emit("section_completed", name)
+        return "".join(self._parts[first_part:])
+    
+    def _write_fallback(self, name: str, first_part: int, fallback: str, error: Exception) -> None:
+        """Handle a failed section; text that was already streamed is kept."""
+        if len(self._parts) == first_part:
+            print(f"Warning: Could not generate {name}, using default: {error}")
+            self.write(fallback)
+        else:
+            print(f"Warning: Generation of {name} stopped early, keeping partial text: {error}")
     
+    def _emit(self, event: str, section: Optional[str] = None) -> None:
+        """Report progress to the callback, or print completed sections."""
+        payload = {"event": event, "section": section, "filename": self.filename, "characters": self._characters}
+        if self.on_event is not None:
+            self.on_event(payload)
+        elif event == "section_completed":
+            print(f"   ✍️  Wrote {section} ({self._characters} characters so far)")
+
+
+_STREAM_END = object()
+
+
+def _prefetch(executor: ContextThreadPoolExecutor, deltas: Iterator[str]) -> Iterator[str]:
+    """
+    Start consuming a stream of text deltas on a worker thread.
+    
+    Args:
+        executor: Executor that runs the stream
+        deltas: Text deltas, e.g. from the gateway's responses.stream
+        
+    Returns:
+        Iterator over the deltas, yielding those already received first and
+        re-raising any error of the stream
+    """
+    received = queue.Queue()
+    
+    def drain() -> None:
+        try:
+            for delta in deltas:
+                received.put(delta)
+        except Exception as e:
+            received.put(e)
+        finally:
+            received.put(_STREAM_END)
+    
+    executor.submit(drain)
+    
+    def read() -> Iterator[str]:
+        while True:
+            item = received.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    
+    return read()
+
+
+def _aprefetch(deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Async variant of _prefetch that consumes the stream in a task."""
+    received = asyncio.Queue()
+    
+    async def drain() -> None:
+        try:
+            async for delta in deltas:
+                received.put_nowait(delta)
+        except Exception as e:
+            received.put_nowait(e)
+        finally:
+            received.put_nowait(_STREAM_END)
+    
+    task = asyncio.ensure_future(drain())
+    
+    async def read() -> AsyncIterator[str]:
+        while True:
+            item = await received.get()
+            if item is _STREAM_END:
+                await task
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    
+    return read()
+
+
+def _generate_title(client: Any, model: str, state: Dict[str, Any]) -> str:
+    """
+    Generate the report title, falling back to a default on errors.
+    
+    Args:
+        client: LLM gateway
+        model: Model name
+        state: Pipeline state containing the user query
+        
+    Returns:
+        The report title
+    """
     try:
         title_response = client.responses.create(
             model=model,
-            input=title_prompt
+            input=_title_prompt(state['user_query']),
+            prompt_name="TITLE_PROMPT"
         )
         # Access the content from the responses.create API structure
-        report_title = title_response.output_text
+        return title_response.output_text
+    except Exception as e:
+        print(f"Warning: Could not generate title, using default: {e}")
+        return "Research Report"
+
+
+async def _agenerate_title(client: Any, model: str, state: Dict[str, Any]) -> str:
+    """Async variant of _generate_title"""
+    try:
+        title_response = await client.aresponses.create(
+            model=model,
+            input=_title_prompt(state['user_query']),
+            prompt_name="TITLE_PROMPT"
+        )
+        return title_response.output_text
     except Exception as e:
         print(f"Warning: Could not generate title, using default: {e}")
-        report_title = "Research Report"
+        return "Research Report"
+
+
+def _generate_section(client: Any, model: str, name: str, prompt: str, prompt_name: str, fallback: str) -> str:
+    """
+    Generate the introduction or conclusion, falling back to a default on errors.
     
+    Args:
+        client: LLM gateway
+        model: Model name
+        name: Section name used in warnings
+        prompt: Formatted prompt
+        prompt_name: Prompt template name for usage accounting
+        fallback: Text used if the call fails
+        
+    Returns:
+        The section text
+    """
+    try:
+        response = client.responses.create(model=model, input=prompt, prompt_name=prompt_name)
+        return response.output_text
+    except Exception as e:
+        print(f"Warning: Could not generate {name}, using default: {e}")
+        return fallback
+
+
+async def _agenerate_section(client: Any, model: str, name: str, prompt: str, prompt_name: str, fallback: str) -> str:
+    """Async variant of _generate_section"""
+    try:
+        response = await client.aresponses.create(model=model, input=prompt, prompt_name=prompt_name)
+        return response.output_text
+    except Exception as e:
+        print(f"Warning: Could not generate {name}, using default: {e}")
+        return fallback
+
+
+def _fallback_section(state: Dict[str, Any], name: str) -> str:
+    """
+    Default text for an introduction or conclusion that could not be generated.
+    
+    Args:
+        state: Pipeline state containing the query and topics
+        name: Either "introduction" or "conclusion"
+        
+    Returns:
+        A short placeholder paragraph
+    """
+    if name == "introduction":
+        return f"This report examines \"{state['user_query']}\" across the following topics: {', '.join(state['topics'])}."
+    return f"The sections above summarize the findings on \"{state['user_query']}\"."
+
+
+def _title_prompt(user_query: str) -> str:
+    """
+    Build the prompt for generating the report title.
+    
+    Args:
+        user_query: The research question
+        
+    Returns:
+        Title generation prompt
+    """
+    return f"""
+Create a concise, professional research report title based on this query: "{user_query}"
+
+The title should be:
+- Clear and descriptive
+- Professional in tone
+- Under 100 characters
+- Suitable for academic or business contexts
+
+Return only the title, no quotes or formatting:
+"""
+
+
+def _collect_topic_content(state: Dict[str, Any]) -> str:
+    """
+    Concatenate topic sections as context for the introduction and conclusion.
+    
+    Args:
+        state: Pipeline state containing topic sections
+        
+    Returns:
+        Topic sections rendered as plain text
+    """
     # Use expanded sections for the report (new architecture)
     topic_content = ""
     if "expanded_sections" in state:
@@ -71,41 +441,64 @@ Return only the title, no quotes or formatting:
         for topic in state["topics"]:
             section = state["topic_sections"].get(topic, f"No information available for {topic}.")
             topic_content += f"\nTopic: {topic}\nSection: {section}\n"
+    return topic_content
+
+
+def _assemble_report(state: Dict[str, Any], report_title: str, intro: str, conclusion: str) -> str:
+    """
+    Assemble the final markdown report.
     
-    # Intro generation using topic sections
-    intro_prompt = INTRODUCTION_PROMPT.format(
-        user_query=state['user_query'], 
-        topic_content=topic_content
-    )
-    intro_response = client.responses.create(
-        model=model,
-        input=intro_prompt
-    )
-    intro = intro_response.output_text
+    Args:
+        state: Pipeline state containing topic sections and sources
+        report_title: Title of the report
+        intro: Introduction text
+        conclusion: Conclusion text
+        
+    Returns:
+        The complete report as markdown
+    """
+    body = "".join(section for _, section in _body_sections(state))
+
+    # Final report assembly with dynamic title
+    return f"# {report_title}\n\n{_legend_section(state)}## Introduction\n\n{intro}\n\n{body}\n\n## Conclusion\n\n{conclusion}{_sources_section(state)}"
 
-    # Conclusion generation using topic sections
-    conclusion_prompt = CONCLUSION_PROMPT.format(
-        user_query=state['user_query'], 
-        topic_content=topic_content
-    )
-    conclusion_response = client.responses.create(
-        model=model,
-        input=conclusion_prompt
-    )
-    conclusion = conclusion_response.output_text
 
+def _body_sections(state: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Render each topic section of the report body.
+    
+    Args:
+        state: Pipeline state containing topic sections
+        
+    Returns:
+        (topic, markdown) pairs in topic order
+    """
     # Body formatting using expanded sections
-    body = ""
+    sections = []
     if "expanded_sections" in state:
         # Use the new expanded sections
         for topic in state["topics"]:
             section = state["expanded_sections"].get(topic, f"No information available for {topic}.")
-            body += f"\n## {topic}\n\n{section}\n"
+            sections.append((topic, f"\n## {topic}\n\n{section}\n"))
     else:
         # Fallback to old topic sections
         for topic in state["topics"]:
             section = state["topic_sections"].get(topic, f"No information available for {topic}.")
-            body += f"\n## {topic}\n\n{section}\n"
+            sections.append((topic, f"\n## {topic}\n\n{section}\n"))
+    return sections
+
+
+def _legend_section(state: Dict[str, Any]) -> str:
+    """
+    Render the table of contents, if enabled.
+    
+    Args:
+        state: Pipeline state containing topics and the legend setting
+        
+    Returns:
+        The table of contents as markdown, or an empty string
+    """
+    legend_enabled = state.get("legend", True)
 
     # Create legend (table of contents) if enabled
     legend_section = ""
@@ -118,35 +511,43 @@ Return only the title, no quotes or formatting:
             legend_section += f"{i}. [{topic}](#{anchor})\n"
         legend_section += f"{len(state['topics']) + 2}. [Conclusion](#conclusion)\n"
         legend_section += f"{len(state['topics']) + 3}. [Sources](#sources)\n\n"
+    return legend_section
+
 
+def _sources_section(state: Dict[str, Any]) -> str:
+    """
+    Render the list of cited sources.
+    
+    Args:
+        state: Pipeline state containing the integrated sources and the source registry
+        
+    Returns:
+        The sources section as markdown, or an empty string if there are none
+    """
     # Collect all sources from research agent expansion
     sources_section = ""
     all_sources = {}
     
-    # Use global source mapping if available
-    if state.get("global_source_mapping"):
-        global_mapping = state["global_source_mapping"]
-        
-        # Add sources from research agent expansion with global numbering
-        if state.get("all_new_sources"):
-            for new_source in state["all_new_sources"]:
-                source_id = global_mapping.get(new_source['url'])
-                if source_id and new_source['url'] not in [s['url'] for s in all_sources.values()]:
-                    all_sources[source_id] = {
-                        'id': source_id,
-                        'url': new_source['url'],
-                        'title': new_source['title']
-                    }
+    # Use the shared source registry if available
+    source_registry = state.get("source_registry")
+    if source_registry is not None:
+        # Add sources from research agent expansion with registry numbering
+        for new_source in state.get("all_new_sources", []):
+            source_id = source_registry.get(new_source.url)
+            if source_id and source_id not in all_sources:
+                all_sources[source_id] = source_registry.source(source_id)
     else:
-        # Fallback to old method
-        if state.get("all_new_sources"):
-            for i, new_source in enumerate(state["all_new_sources"], 1):
-                if new_source['url'] not in [s['url'] for s in all_sources.values()]:
-                    all_sources[i] = {
-                        'id': i,
-                        'url': new_source['url'],
-                        'title': new_source['title']
-                    }
+        # Fallback to numbering sources in the order they were integrated
+        seen_urls = set()
+        for new_source in state.get("all_new_sources", []):
+            if new_source.url not in seen_urls:
+                seen_urls.add(new_source.url)
+                source_id = len(all_sources) + 1
+                all_sources[source_id] = {
+                    'id': source_id,
+                    'url': new_source.url,
+                    'title': new_source.title
+                }
 
     # Sort by ID and create sources section
     if all_sources:
@@ -154,26 +555,57 @@ Return only the title, no quotes or formatting:
         for source_id in sorted(all_sources.keys()):
             source = all_sources[source_id]
             sources_section += f"[{source['id']}] {source['title']} - {source['url']}\n\n"
+    return sources_section
 
-    # Final report assembly with dynamic title
-    report = f"# {report_title}\n\n{legend_section}## Introduction\n\n{intro}\n\n{body}\n\n## Conclusion\n\n{conclusion}{sources_section}"
+
+def _save_report(state: Dict[str, Any], report: str, report_title: str) -> Dict[str, Any]:
+    """
+    Save the report to a timestamped markdown file and record it in the state.
     
+    Args:
+        state: Pipeline state to update
+        report: The complete report as markdown
+        report_title: Title of the report
+        
+    Returns:
+        Updated state with report content and filename
+    """
     # Save report to markdown file
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"research_report_{timestamp}.md"
+    filename = _report_filename(state)
 
     with open(filename, 'w', encoding='utf-8') as f:
         f.write(report)
 
+    return _record_report(state, report, report_title, filename)
+
+
+def _report_filename(state: Dict[str, Any]) -> str:
+    """Return the markdown filename for a new report: the run's report_name if set, else a timestamped name."""
+    if state.get("report_name"):
+        return f"{state['report_name']}.md"
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"research_report_{timestamp}.md"
+
+
+def _record_report(state: Dict[str, Any], report: str, report_title: str, filename: str) -> Dict[str, Any]:
+    """
+    Record a saved report in the state.
+    
+    Args:
+        state: Pipeline state to update
+        report: The complete report as markdown
+        report_title: Title of the report
+        filename: File the report was written to
+        
+    Returns:
+        Updated state with report content and filename
+    """
     print(f"✅ Report generated and saved to: {filename}")
 
     # Update state
     state["report"] = report
     state["report_filename"] = filename
     state["report_title"] = report_title
-    state["messages"].append({
-        "role": "assistant",
-        "content": f"[Report Generation] Complete report saved to {filename}\n\n{report}"
-    })
+    log_event(state, "report", filename=filename, title=report_title, characters=len(report))
     
     return state 
\ No newline at end of file
@@ -1,55 +1,126 @@
-from openai import OpenAI
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 import json
-from search_provider import SearchProvider
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from search_provider import ContentBudget, get_search_provider
+from llm_gateway import get_llm_client
+from budget import BudgetExceeded, get_budget
+from concurrency import async_runner, blocking_runner
+from format_cleanup import clean_academic_formatting_local
+from models import Article
+from passage_selector import SELECTION_POOL_FACTOR, select_passages
+from source_registry import SourceRegistry
+from dedup import drop_duplicate_articles
 from prompts import (
     FOLLOW_UP_QUESTIONS_PROMPT,
     INTEGRATE_NEW_INFORMATION_PROMPT,
     INTEGRATE_ARTICLE_WITH_SOURCES_PROMPT,
     FOLLOW_UP_QUESTIONS_FOR_TOPIC_PROMPT,
-    CLEAN_ACADEMIC_FORMATTING_PROMPT
+    CLEAN_ACADEMIC_FORMATTING_PROMPT,
+    MERGE_TOPIC_SECTIONS_PROMPT
 )
 
+# Characters of article text embedded in each prompt. Searches fetch a few times
+# more than their consumers use, and the passages most relevant to the question are kept
+ARTICLE_CONTENT_CHARS = 1500
+NEW_ARTICLE_CONTENT_CHARS = 1000
+FOLLOW_UP_CONTENT_CHARS = 3000
+
 class ResearchAgent:
-    """An LLM agent equipped with search tools for recursive research expansion"""
+    """
+    An LLM agent equipped with search tools for recursive research expansion
+    
+    The research steps are coroutines that make their LLM and search calls through
+    `runner` (see concurrency.py). ResearchAgent runs them with blocking calls and
+    thread pools; AsyncResearchAgent only swaps the runner. Pipeline code that is
+    itself shared between both paths awaits the a-prefixed coroutines directly.
+    """
+    
+    runner = blocking_runner
     
-    def __init__(self, model="gpt-4o", search_provider="exa", max_workers=4):
-        self.client = OpenAI()
+    def __init__(self, model="gpt-4o", search_provider="exa", max_workers=4, synthesis_mode="linear", search_cache=None, formatting_mode="per-merge", dedup_index=None, content_mode="text"):
+        self.client = get_llm_client()
         self.model = model
-        self.search_provider = SearchProvider(search_provider)
+        self.search_provider = get_search_provider(search_provider, cache=search_cache)
+        # Expansion articles are only embedded in integration prompts
+        self.search_budget = ContentBudget(
+            max(ARTICLE_CONTENT_CHARS, NEW_ARTICLE_CONTENT_CHARS) * SELECTION_POOL_FACTOR,
+            mode=content_mode
+        )
         self.max_workers = max_workers
+        self.synthesis_mode = synthesis_mode
+        self.formatting_mode = formatting_mode
+        # Shared NearDuplicateIndex; articles whose content is already known are skipped
+        self.dedup_index = dedup_index
         self.conversation_history = []
         
-    def search_and_expand_article(self, article: Dict[str, Any], max_expansions: int = 3) -> Dict[str, Any]:
+    def search_and_expand_article(self, article: Article, max_expansions: int = 3) -> Dict[str, Any]:
         """
         Recursively search and expand an article with additional research
         
         Args:
-            article: Dictionary containing article info (title, url, text, subquestion)
+            article: The article to expand
             max_expansions: Maximum number of recursive expansions
             
         Returns:
             Dictionary with expanded content and new sources
         """
-        print(f"    🔍 Starting recursive expansion for: {article['title'][:50]}...")
+        return self.runner.run(self.asearch_and_expand_article(article, max_expansions))
+    
+    def search_parallel(self, questions: List[str], seen_urls: Optional[Set[str]] = None) -> List[Article]:
+        """Search for multiple questions in parallel, dropping articles the topic already has (seen_urls)"""
+        return self.runner.run(self.asearch_parallel(questions, seen_urls))
+    
+    def synthesize_topic_with_articles(self, topic: str, articles: List[Article], max_expansions: int = 3, source_registry: Optional[SourceRegistry] = None) -> Dict[str, Any]:
+        """
+        Intelligently synthesize multiple articles into a cohesive topic section
+        
+        Args:
+            topic: The main topic being researched
+            articles: List of articles to synthesize
+            max_expansions: Maximum number of recursive expansions
+            source_registry: Registry shared by all topics for consistent citation numbers
+            
+        Returns:
+            Dictionary with synthesized content and all sources
+        """
+        return self.runner.run(self.asynthesize_topic_with_articles(topic, articles, max_expansions, source_registry))
+    
+    async def _complete(self, prompt: str, prompt_name: str) -> str:
+        """Run one prompt through the runner's LLM client and return the stripped output text"""
+        response = await self.runner.call(
+            self.client.responses.create,
+            self.client.aresponses.create,
+            model=self.model,
+            input=prompt,
+            prompt_name=prompt_name
+        )
+        return response.output_text.strip()
+    
+    async def asearch_and_expand_article(self, article: Article, max_expansions: int) -> Dict[str, Any]:
+        """Coroutine form of search_and_expand_article, run by the agent's runner"""
+        print(f"    🔍 Starting recursive expansion for: {article.title[:50]}...")
         
         # Initialize expansion state
-        expanded_content = article['text']
+        expanded_content = article.text
         new_sources = []
+        seen_urls = {article.url}
         expansion_count = 0
         
         # Start the recursive expansion process
         while expansion_count < max_expansions:
+            stop_reason = self._budget_stop()
+            if stop_reason:
+                print(f"      💸 Budget reached ({stop_reason}), ending expansion early")
+                break
+            
             # Generate follow-up questions based on current content
-            follow_up_questions = self.generate_follow_up_questions(expanded_content, article['subquestion'])
+            follow_up_questions = await self._generate_follow_up_questions(expanded_content, article.subquestion)
             
             if not follow_up_questions:
                 print(f"      ⏹️  No more follow-up questions generated, stopping expansion")
                 break
             
             # Search for additional information in parallel
-            new_articles = self.search_parallel(follow_up_questions)
+            new_articles = await self.asearch_parallel(follow_up_questions, seen_urls)
             
             print(f"        📊 Found {len(new_articles)} total new articles for expansion")
             
@@ -58,12 +129,15 @@ class ResearchAgent:
                 break
             
             # Integrate new information into the content
-            expanded_content = self.integrate_new_information(expanded_content, new_articles)
+            expanded_content = await self._integrate_new_information(expanded_content, new_articles)
             new_sources.extend(new_articles)
             
             expansion_count += 1
             print(f"      ✅ Completed expansion round {expansion_count}/{max_expansions}")
         
+        if expansion_count:
+            expanded_content = await self._finalize_formatting(expanded_content)
+        
         return {
             'original_article': article,
             'expanded_content': expanded_content,
@@ -71,207 +145,223 @@ class ResearchAgent:
             'expansion_rounds': expansion_count
         }
     
-    def search_parallel(self, questions: List[str]) -> List[Dict]:
-        """Search for multiple questions in parallel"""
+    async def asearch_parallel(self, questions: List[str], seen_urls: Optional[Set[str]]) -> List[Article]:
+        """Coroutine form of search_parallel, run by the agent's runner"""
         new_articles = []
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all search tasks
-            future_to_question = {
-                executor.submit(self.search_single_question, question): question 
-                for question in questions
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_question):
-                question = future_to_question[future]
-                try:
-                    articles = future.result()
-                    new_articles.extend(articles)
-                    print(f"        🔍 Found {len(articles)} articles for question: {question[:50]}...")
-                except Exception as e:
-                    print(f"        ⚠️  Search error for question '{question}': {e}")
+        results = await self.runner.gather(
+            [self._search_single_question(question) for question in questions],
+            max_workers=self.max_workers,
+            return_exceptions=True
+        )
+        
+        for question, articles in zip(questions, results):
+            if isinstance(articles, Exception):
+                print(f"        ⚠️  Search error for question '{question}': {articles}")
+                continue
+            new_articles.extend(articles)
+            print(f"        🔍 Found {len(articles)} articles for question: {question[:50]}...")
         
-        return new_articles
+        return self._drop_duplicates(new_articles, seen_urls)
     
-    def search_single_question(self, question: str) -> List[Dict]:
+    async def _search_single_question(self, question: str) -> List[Article]:
         """Search for a single question and return articles"""
         try:
-            search_results = self.search_provider.search(question, num_results=2)
-            if search_results and search_results.results:
-                articles = []
-                for result in search_results.results:
-                    articles.append({
-                        'title': result.title,
-                        'url': result.url,
-                        'text': result.text,
-                        'question': question
-                    })
-                return articles
-            return []
+            search_results = await self.runner.call(
+                self.search_provider.search,
+                self.search_provider.asearch,
+                question,
+                num_results=2,
+                budget=self.search_budget
+            )
+            return self._articles_from_results(question, search_results)
         except Exception as e:
             print(f"        ⚠️  Search error for question '{question}': {e}")
             return []
     
-    def generate_follow_up_questions(self, content: str, original_question: str) -> List[str]:
+    def _articles_from_results(self, question: str, search_results: Any) -> List[Article]:
+        """Convert search results for a question into articles"""
+        if not search_results or not search_results.results:
+            return []
+        
+        return [Article.from_result(result, question) for result in search_results.results]
+    
+    def _drop_duplicates(self, articles: List[Article], seen_urls: Optional[Set[str]]) -> List[Article]:
+        """Drop duplicate articles by the same rule as before synthesis, see dedup.drop_duplicate_articles"""
+        if self.dedup_index is None:
+            return articles
+        kept = drop_duplicate_articles(articles, self.dedup_index, seen_urls if seen_urls is not None else set())
+        if len(kept) < len(articles):
+            print(f"        ♻️  Skipped {len(articles) - len(kept)} duplicate articles")
+        return kept
+    
+    async def _generate_follow_up_questions(self, content: str, original_question: str) -> List[str]:
         """Generate follow-up research questions based on content analysis"""
         
         prompt = FOLLOW_UP_QUESTIONS_PROMPT.format(
-            content=content[:3000],
+            content=select_passages(content, original_question, FOLLOW_UP_CONTENT_CHARS),
             original_question=original_question
         )
         
         try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt
-            )
-            
-            questions = response.output_text.strip().split('\n')
-            # Clean up questions
-            cleaned_questions = []
-            for q in questions:
-                q = q.strip()
-                if q and len(q) > 20 and not q.startswith(('1.', '2.', '3.', '-')):
-                    cleaned_questions.append(q)
-            
-            return cleaned_questions[:3]  # Limit to 3 questions
-            
+            output_text = await self._complete(prompt, "FOLLOW_UP_QUESTIONS_PROMPT")
+            return self._parse_follow_up_questions(output_text)
+        
         except Exception as e:
             print(f"      ⚠️  Error generating follow-up questions: {e}")
             return []
     
-    def integrate_new_information(self, current_content: str, new_articles: List[Dict]) -> str:
-        """Integrate new articles into the existing content"""
+    def _parse_follow_up_questions(self, output_text: str) -> List[str]:
+        """Extract up to three usable follow-up questions from a model response"""
+        questions = output_text.strip().split('\n')
+        # Clean up questions
+        cleaned_questions = []
+        for q in questions:
+            q = q.strip()
+            if q and len(q) > 20 and not q.startswith(('1.', '2.', '3.', '-')):
+                cleaned_questions.append(q)
         
-        # Prepare new article information with source numbers
-        new_articles_text = ""
-        for i, article in enumerate(new_articles, 1):
-            new_articles_text += f"""
-<New Article {i}>
-Title: {article['title']}
-URL: {article['url']}
-Content: {article['text'][:1000]}
-Related Question: {article['question']}
-Source Number: {i}
-</New Article {i}>
-"""
+        return cleaned_questions[:3]  # Limit to 3 questions
+    
+    async def _integrate_new_information(self, current_content: str, new_articles: List[Article]) -> str:
+        """Integrate new articles into the existing content"""
         
         prompt = INTEGRATE_NEW_INFORMATION_PROMPT.format(
             current_content=current_content,
-            new_articles_text=new_articles_text
+            new_articles_text=self._format_new_articles(new_articles)
         )
         
         try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt
-            )
-            
-            integrated_content = response.output_text.strip()
+            integrated_content = await self._complete(prompt, "INTEGRATE_NEW_INFORMATION_PROMPT")
             
             # Clean any academic formatting that might have been introduced
-            integrated_content = self.clean_academic_formatting(integrated_content)
+            integrated_content = await self._cleanup_after_merge(integrated_content)
             
             print(f"          ✅ Integration completed successfully")
             return integrated_content
             
+        except BudgetExceeded as e:
+            print(f"      💸 Budget reached ({e}), new information not integrated")
+            return current_content
         except Exception as e:
             print(f"      ⚠️  Error integrating new information: {e}")
             return current_content
     
-    def synthesize_topic_with_articles(self, topic: str, articles: List[Dict], max_expansions: int = 3, global_source_mapping: Dict[str, int] = None) -> Dict[str, Any]:
-        """
-        Intelligently synthesize multiple articles into a cohesive topic section
-        
-        Args:
-            topic: The main topic being researched
-            articles: List of articles to synthesize
-            max_expansions: Maximum number of recursive expansions
-            global_source_mapping: Global source mapping from URL to source number
-            
-        Returns:
-            Dictionary with synthesized content and all sources
-        """
+    def _format_new_articles(self, new_articles: List[Article]) -> str:
+        """Render new articles with their source numbers for the integration prompt"""
+        new_articles_text = ""
+        for i, article in enumerate(new_articles, 1):
+            new_articles_text += f"""
+<New Article {i}>
+Title: {article.title}
+URL: {article.url}
+Content: {select_passages(article.text, article.question, NEW_ARTICLE_CONTENT_CHARS)}
+Related Question: {article.question}
+Source Number: {i}
+</New Article {i}>
+"""
+        return new_articles_text
+    
+    async def asynthesize_topic_with_articles(self, topic: str, articles: List[Article], max_expansions: int, source_registry: Optional[SourceRegistry]) -> Dict[str, Any]:
+        """Coroutine form of synthesize_topic_with_articles, run by the agent's runner"""
         print(f"    🔬 Starting intelligent synthesis for topic: {topic}")
+        get_budget().start_topic(topic)
         
         # Initialize with the first article as the base
         if not articles:
-            return {
-                'topic': topic,
-                'synthesized_content': f"No articles found for {topic}.",
-                'all_sources': [],
-                'expansion_rounds': 0
-            }
-        
-        # Start with the first article as the foundation
-        current_content = articles[0]['text']
+            return self._empty_synthesis(topic)
         
-        # Clean the initial content of any academic formatting
-        current_content = self.clean_academic_formatting(current_content)
-        
-        # Initialize source tracking
-        all_sources = [articles[0]]
-        
-        # Use global source mapping if provided, otherwise create local one
-        if global_source_mapping is None:
-            source_mapping = {articles[0]['url']: 1}
-        else:
-            source_mapping = global_source_mapping
+        # Use the shared registry if provided, otherwise number sources locally
+        if source_registry is None:
+            source_registry = SourceRegistry()
         
         expansion_count = 0
         
-        # Integrate remaining articles into the content
-        for i, article in enumerate(articles[1:], 1):
-            print(f"      🔄 Integrating article {i+1}/{len(articles)}: {article['title'][:50]}...")
-            
-            # Add new source to mapping if not using global mapping
-            if global_source_mapping is None:
-                source_mapping[article['url']] = i + 1
-            
-            # Integrate this article into the current content
-            current_content = self.integrate_article_into_content_with_sources(current_content, article, topic, source_mapping)
-            all_sources.append(article)
+        if self.synthesis_mode == "tree":
+            print(f"      🌳 Tree-integrating {len(articles)} articles...")
+            current_content, all_sources = await self._tree_integrate_articles(articles, topic, source_registry)
+            if not current_content:
+                current_content = await self._cleanup_after_merge(self._article_excerpt(articles[0], topic))
+                all_sources = [articles[0]]
+                self._register_source(articles[0], source_registry)
+        else:
+            # Start with the first article as the foundation
+            current_content = self._article_excerpt(articles[0], topic)
+            
+            # Clean the initial content of any academic formatting
+            current_content = await self._cleanup_after_merge(current_content)
+            
+            # Initialize source tracking
+            all_sources = [articles[0]]
+            self._register_source(articles[0], source_registry)
+            
+            # Integrate remaining articles into the content
+            for i, article in enumerate(articles[1:], 1):
+                stop_reason = self._budget_stop(topic)
+                if stop_reason:
+                    print(f"      💸 Budget reached ({stop_reason}), skipping {len(articles) - i} remaining articles")
+                    break
+                
+                print(f"      🔄 Integrating article {i+1}/{len(articles)}: {article.title[:50]}...")
+                
+                # Integrate this article into the current content
+                try:
+                    integrated_content = await self._integrate_article_into_content_with_sources(current_content, article, topic, source_registry)
+                except BudgetExceeded as e:
+                    print(f"      💸 Budget reached ({e}), skipping {len(articles) - i} remaining articles")
+                    break
+                # Only articles that made it into the content are listed as sources
+                if integrated_content is not None:
+                    current_content = integrated_content
+                    all_sources.append(article)
         
         # Now do recursive expansion on the synthesized content
         print(f"      🚀 Starting recursive expansion on synthesized content...")
+        seen_urls = {article.url for article in articles}
         
         while expansion_count < max_expansions:
+            stop_reason = self._budget_stop(topic)
+            if stop_reason:
+                print(f"      💸 Budget reached ({stop_reason}), ending expansion early")
+                break
+            
             # Generate follow-up questions based on the synthesized content
-            follow_up_questions = self.generate_follow_up_questions_for_topic(current_content, topic)
+            follow_up_questions = await self._generate_follow_up_questions_for_topic(current_content, topic)
             
             if not follow_up_questions:
                 break
             
             # Search for additional information in parallel
-            new_articles = self.search_parallel(follow_up_questions)
+            new_articles = await self.asearch_parallel(follow_up_questions, seen_urls)
             
             if not new_articles:
                 break
             
             # Integrate new information into the synthesized content
-            for new_article in new_articles:
-                print(f"        🔄 Integrating expansion article: {new_article['title'][:50]}...")
-                
-                # Add new source to mapping (handle both global and local cases)
-                if global_source_mapping is not None:
-                    # For global mapping, we need to add new URLs to the global mapping
-                    if new_article['url'] not in source_mapping:
-                        # This is a new URL found during expansion
-                        new_source_number = max(source_mapping.values()) + 1 if source_mapping else 1
-                        source_mapping[new_article['url']] = new_source_number
-                        global_source_mapping[new_article['url']] = new_source_number
-                else:
-                    # Local mapping case - always assign a new source number
-                    source_mapping[new_article['url']] = len(source_mapping) + 1
-                
-                current_content = self.integrate_article_into_content_with_sources(current_content, new_article, topic, source_mapping)
-                all_sources.append(new_article)
-                print(f"        ✅ Completed integration of expansion article")
+            if self.synthesis_mode == "tree":
+                print(f"        🌳 Tree-integrating {len(new_articles)} expansion articles...")
+                current_content, integrated_articles = await self._tree_integrate_articles(new_articles, topic, source_registry, base_content=current_content)
+                all_sources.extend(integrated_articles)
+            else:
+                for new_article in new_articles:
+                    if self._budget_stop(topic):
+                        break
+                    print(f"        🔄 Integrating expansion article: {new_article.title[:50]}...")
+                    try:
+                        integrated_content = await self._integrate_article_into_content_with_sources(current_content, new_article, topic, source_registry)
+                    except BudgetExceeded as e:
+                        print(f"        💸 Budget reached ({e}), skipping remaining expansion articles")
+                        break
+                    if integrated_content is not None:
+                        current_content = integrated_content
+                        all_sources.append(new_article)
+                        print(f"        ✅ Completed integration of expansion article")
             
             expansion_count += 1
             print(f"        ✅ Completed expansion round {expansion_count}/{max_expansions}")
         
+        current_content = await self._finalize_formatting(current_content)
+        
         return {
             'topic': topic,
             'synthesized_content': current_content,
@@ -279,40 +369,152 @@ Source Number: {i}
             'expansion_rounds': expansion_count
         }
     
-    def integrate_article_into_content_with_sources(self, current_content: str, new_article: Dict, topic: str, source_mapping: Dict[str, int]) -> str:
-        """Intelligently integrate a new article into existing content with source citations"""
+    def _budget_stop(self, topic: str = None) -> Optional[str]:
+        """Return why the run or topic budget requires synthesis to stop, or None"""
+        return get_budget().topic_exhausted(topic)
+    
+    def _empty_synthesis(self, topic: str) -> Dict[str, Any]:
+        """Synthesis result for a topic without any articles"""
+        return {
+            'topic': topic,
+            'synthesized_content': f"No articles found for {topic}.",
+            'all_sources': [],
+            'expansion_rounds': 0
+        }
+    
+    def _register_source(self, article: Article, source_registry: SourceRegistry) -> None:
+        """Give an article that is part of the content its citation number; known sources keep theirs"""
+        article.source_id = source_registry.register(article.url, article.title)
+    
+    async def _integrate_article_into_content_with_sources(self, current_content: str, new_article: Article, topic: str, source_registry: SourceRegistry) -> Optional[str]:
+        """
+        Intelligently integrate a new article into existing content with source citations
+        
+        The article's citation number is reserved for the call and only kept when
+        the integration succeeds.
+        
+        Returns:
+            The updated content, or None if the article could not be integrated
+            
+        Raises:
+            BudgetExceeded: If the budget cannot cover the integration
+        """
 
-        # Get the source number for this article
-        source_number = source_mapping.get(new_article['url'], len(source_mapping))
+        prompt = self._integration_prompt(current_content, new_article, topic, source_registry)
         
-        prompt = INTEGRATE_ARTICLE_WITH_SOURCES_PROMPT.format(
+        try:
+            integrated_content = await self._complete(prompt, "INTEGRATE_ARTICLE_WITH_SOURCES_PROMPT")
+        
+        except BudgetExceeded:
+            source_registry.release(new_article.url)
+            raise
+        except Exception as e:
+            print(f"          ❌ Error integrating article: {e}")
+            source_registry.release(new_article.url)
+            return None
+        
+        if not integrated_content:
+            source_registry.release(new_article.url)
+            return None
+        self._register_source(new_article, source_registry)
+        
+        # Clean any academic formatting that might have been introduced
+        integrated_content = await self._cleanup_after_merge(integrated_content)
+        
+        print(f"          ✅ Integration completed successfully")
+        return integrated_content
+    
+    def _article_excerpt(self, article: Article, topic: str) -> str:
+        """Select the passages of an article most relevant to its topic and question"""
+        return select_passages(article.text, f"{topic} {article.question}", ARTICLE_CONTENT_CHARS)
+    
+    def _integration_prompt(self, current_content: str, new_article: Article, topic: str, source_registry: SourceRegistry) -> str:
+        """Build the prompt that integrates one article into a topic section"""
+        
+        # Reserve the source number for this article until it is integrated
+        source_number = source_registry.reserve(new_article.url, new_article.title)
+        
+        return INTEGRATE_ARTICLE_WITH_SOURCES_PROMPT.format(
             topic=topic,
             current_content=current_content,
-            article_title=new_article['title'],
-            article_url=new_article['url'],
-            article_content=new_article['text'][:1500],
+            article_title=new_article.title,
+            article_url=new_article.url,
+            article_content=self._article_excerpt(new_article, topic),
             source_number=source_number
         )
+    
+    async def _tree_integrate_articles(self, articles: List[Article], topic: str, source_registry: SourceRegistry, base_content: str = "") -> Tuple[str, List[Article]]:
+        """
+        Integrate articles with a map/reduce tree instead of a sequential fold
         
-        try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt
-            )
-            
-            integrated_content = response.output_text.strip()
-            
-            # Clean any academic formatting that might have been introduced
-            integrated_content = self.clean_academic_formatting(integrated_content)
+        Every article is first written up as its own cited section in parallel, then
+        sections are merged pairwise, level by level, until one remains. The number of
+        sequential LLM round-trips therefore grows with log2(N) instead of N. Citation
+        numbers come from source_registry, which keeps those of the articles whose
+        section was written. Articles reached after the budget runs out are skipped.
+        
+        Args:
+            articles: Articles to integrate
+            topic: The main topic being researched
+            source_registry: Registry holding the articles' citation numbers
+            base_content: Existing section to merge the new articles into, if any
             
-            print(f"          ✅ Integration completed successfully")
-            return integrated_content
+        Returns:
+            The merged section, or an empty string if nothing relevant was found,
+            and the articles it was written from
+        """
+        # Map: one independent section per article
+        sections = await self.runner.gather(
+            [self._integrate_section(article, topic, source_registry) for article in articles],
+            max_workers=self.max_workers
+        )
+        integrated_articles = [article for article, section in zip(articles, sections) if section.strip()]
+        sections = [section for section in sections if section.strip()]
+        if base_content.strip():
+            sections.insert(0, base_content)
+        
+        # Reduce: merge neighbouring sections until a single one remains; an odd
+        # section out moves up to the next level unchanged
+        while len(sections) > 1:
+            merged = await self.runner.gather(
+                [self._merge_sections(first, second, topic) for first, second in zip(sections[0::2], sections[1::2])],
+                max_workers=self.max_workers
+            )
+            sections = merged + sections[2 * len(merged):]
+        
+        return (sections[0] if sections else ""), integrated_articles
+    
+    async def _integrate_section(self, article: Article, topic: str, source_registry: SourceRegistry) -> str:
+        """Write one article up as its own cited section, or return an empty string when out of budget"""
+        if self._budget_stop(topic):
+            return ""
+        try:
+            return await self._integrate_article_into_content_with_sources("", article, topic, source_registry) or ""
+        except BudgetExceeded:
+            return ""
+    
+    async def _merge_sections(self, first_section: str, second_section: str, topic: str) -> str:
+        """Merge two partial topic sections while preserving their citations"""
+        
+        prompt = MERGE_TOPIC_SECTIONS_PROMPT.format(
+            topic=topic,
+            first_section=first_section,
+            second_section=second_section
+        )
+        
+        try:
+            merged_content = await self._complete(prompt, "MERGE_TOPIC_SECTIONS_PROMPT")
+            print(f"          ✅ Merge completed successfully")
+            return merged_content
             
+        except BudgetExceeded:
+            # Out of budget: keep both sections as they are
+            return f"{first_section}\n\n{second_section}"
         except Exception as e:
-            print(f"          ❌ Error integrating article: {e}")
-            return current_content
+            print(f"          ❌ Error merging sections: {e}")
+            return f"{first_section}\n\n{second_section}"
     
-    def generate_follow_up_questions_for_topic(self, content: str, topic: str) -> List[str]:
+    async def _generate_follow_up_questions_for_topic(self, content: str, topic: str) -> List[str]:
         """Generate follow-up research questions based on synthesized content analysis"""
         
         prompt = FOLLOW_UP_QUESTIONS_FOR_TOPIC_PROMPT.format(
@@ -321,44 +523,69 @@ Source Number: {i}
         )
         
         try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt
-            )
-            
-            questions = response.output_text.strip().split('\n')
-            # Clean up questions
-            cleaned_questions = []
-            for q in questions:
-                q = q.strip()
-                if q and len(q) > 20 and not q.startswith(('1.', '2.', '3.', '-')):
-                    # Additional topic relevance check
-                    topic_keywords = topic.lower().split()
-                    question_lower = q.lower()
-                    # Check if the question contains topic-related keywords
-                    if any(keyword in question_lower for keyword in topic_keywords):
-                        cleaned_questions.append(q)
-            
-            return cleaned_questions[:3]  # Limit to 3 questions
-            
+            output_text = await self._complete(prompt, "FOLLOW_UP_QUESTIONS_FOR_TOPIC_PROMPT")
+            return self._parse_topic_follow_up_questions(output_text, topic)
+        
         except Exception as e:
             print(f"      ⚠️  Error generating follow-up questions: {e}")
             return []
     
-    def clean_academic_formatting(self, content: str) -> str:
+    def _parse_topic_follow_up_questions(self, output_text: str, topic: str) -> List[str]:
+        """Extract up to three on-topic follow-up questions from a model response"""
+        questions = output_text.strip().split('\n')
+        # Clean up questions
+        cleaned_questions = []
+        for q in questions:
+            q = q.strip()
+            if q and len(q) > 20 and not q.startswith(('1.', '2.', '3.', '-')):
+                # Additional topic relevance check
+                topic_keywords = topic.lower().split()
+                question_lower = q.lower()
+                # Check if the question contains topic-related keywords
+                if any(keyword in question_lower for keyword in topic_keywords):
+                    cleaned_questions.append(q)
+        
+        return cleaned_questions[:3]  # Limit to 3 questions
+    
+    async def _cleanup_after_merge(self, content: str) -> str:
+        """Clean formatting after an integration step, unless cleanup is deferred to the end"""
+        if self.formatting_mode == "per-merge":
+            return await self._clean_academic_formatting(content)
+        return content
+    
+    async def _finalize_formatting(self, content: str) -> str:
+        """Clean formatting once on finished content when cleanup was deferred"""
+        if self.formatting_mode == "final":
+            return await self._clean_academic_formatting(content)
+        if self.formatting_mode == "local":
+            return clean_academic_formatting_local(content)
+        return content
+    
+    async def _clean_academic_formatting(self, content: str) -> str:
         """Clean the content of any academic formatting"""
         
         prompt = CLEAN_ACADEMIC_FORMATTING_PROMPT.format(content=content)
         
         try:
-            response = self.client.responses.create(
-                model=self.model,
-                input=prompt
-            )
-            
-            cleaned_content = response.output_text.strip()
-            return cleaned_content
-            
+            return await self._complete(prompt, "CLEAN_ACADEMIC_FORMATTING_PROMPT")
+        
+        except BudgetExceeded:
+            # Out of budget for the LLM pass, fall back to the rule-based cleanup
+            return clean_academic_formatting_local(content)
         except Exception as e:
             print(f"          ❌ Error cleaning content: {e}")
-            return content 
\ No newline at end of file
+            return content
+
+
+class AsyncResearchAgent(ResearchAgent):
+    """
+    Asyncio variant of ResearchAgent for the async pipeline.
+    
+    The research steps are shared with ResearchAgent; only the runner differs, so
+    the public methods return coroutines. Concurrency comes from asyncio.gather
+    instead of thread pools; the number of in-flight requests is bounded by the
+    shared concurrency budget that the LLM gateway and search provider acquire
+    for each live call.
+    """
+    
+    runner = async_runner
@@ -0,0 +1,383 @@
+"""
+Scheduler Module
+
+This module is the single place where LLM and search requests are paced,
+limited and retried. Every request runs under a key, e.g. "openai:gpt-4o" or
+"exa", and for each key the scheduler
+
+- waits for the key's token-bucket rate limiter (see rate_limiter.py),
+- bounds the number of requests in flight with an AIMD limit that halves when
+  the provider throttles and grows back by about one slot per round of
+  successful requests,
+- retries throttled, timed out and server-failed requests with jittered
+  exponential backoff, honoring Retry-After and rate-limit reset headers and
+  pausing the key's rate limiter for everyone while the provider recovers.
+
+Async requests additionally hold a slot of the process-wide concurrency budget.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+from concurrency import DEFAULT_MAX_CONCURRENCY, get_concurrency_budget
+from rate_limiter import get_rate_limiter
+
+
+DEFAULT_MAX_RETRIES = 4
+_STATUS_RE = re.compile(r"status code (\d{3})")
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_TRANSIENT_ERRORS = {
+    "TimeoutError", "ConnectionError", "APIConnectionError", "APITimeoutError",
+    "TransportError", "Timeout", "ReadTimeout", "ConnectTimeout"
+}
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """
+    Extract the HTTP status code of a failed request.
+
+    Understands OpenAI and httpx errors, which carry the status (or the
+    response), and SDK errors that only mention it in their message.
+
+    Args:
+        error: The exception raised by the request
+
+    Returns:
+        The status code, or None if the error is not an HTTP error
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        match = _STATUS_RE.search(str(error))
+        status = int(match.group(1)) if match else None
+    return status if isinstance(status, int) else None
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Return whether an error means the provider is rate limiting us."""
+    return status_code(error) == 429 or "rate limit" in str(error).lower()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return whether a request that raised this error may succeed if sent again."""
+    if is_throttled(error):
+        return True
+    status = status_code(error)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse a rate-limit reset duration such as "20ms", "1.5s" or "6m0s" into seconds."""
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read how long the provider asked us to wait from the error's response headers.
+
+    Args:
+        error: The exception raised by the request
+
+    Returns:
+        Seconds to wait, or None if the response carries no hint
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                pass
+    resets = [
+        _parse_duration(headers.get(name, ""))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveLimit:
+    """
+    An AIMD concurrency limit shared by threads and coroutines.
+
+    The limit starts at `max_limit`. A throttled request halves it (down to
+    `min_limit`) and every successful one adds 1/limit, so it grows back by
+    about one slot per window of successful requests.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        """
+        Initialize the limit.
+
+        Args:
+            max_limit: Largest number of requests allowed in flight
+            min_limit: Smallest number the limit may shrink to
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._async_waiters: deque = deque()
+
+    def _has_room(self) -> bool:
+        return self._in_flight < int(self.limit)
+
+    def _wake_async_waiters(self) -> None:
+        """Hand free slots to waiting coroutines. Caller holds the condition."""
+        while self._async_waiters and self._has_room():
+            loop, future = self._async_waiters.popleft()
+            self._in_flight += 1
+            loop.call_soon_threadsafe(_grant, future)
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        with self._condition:
+            while not self._has_room():
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def aacquire(self) -> None:
+        """Wait, without blocking the event loop, until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            if self._has_room() and not self._async_waiters:
+                self._in_flight += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._condition:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+                    raise
+            # The slot was granted while we were being cancelled
+            self.release(throttled=False)
+            raise
+
+    def release(self, throttled: bool) -> None:
+        """
+        Free a slot and adapt the limit to the request's outcome.
+
+        Args:
+            throttled: Whether the provider rate limited the request
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(float(self.min_limit), self.limit / 2)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._wake_async_waiters()
+            self._condition.notify_all()
+
+
+class RequestScheduler:
+    """
+    Paces, limits and retries requests per key.
+
+    Use `call`/`acall` for requests that can simply be sent again, and
+    `slot`/`aslot` with `retry_delay` for requests that need their own retry
+    loop, such as streams that may already have produced output.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_retries: Retries per request after the first attempt
+            base_delay: Backoff ceiling in seconds for the first retry; doubles per retry
+            max_delay: Largest backoff in seconds
+            max_concurrency: Largest number of requests in flight per key
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self._limits: Dict[str, AdaptiveLimit] = {}
+        self._lock = threading.Lock()
+
+    def limit_for(self, key: str) -> AdaptiveLimit:
+        """Return the adaptive concurrency limit of a key, creating it if needed."""
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = AdaptiveLimit(self.max_concurrency)
+            return self._limits[key]
+
+    def retry_delay(self, key: str, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Decide whether to retry a failed request and how long to wait first.
+
+        Backoff uses full jitter: a random delay up to base_delay * 2^attempt,
+        but never less than what the provider asked for in its headers.
+
+        Args:
+            key: Scheduler key of the request
+            error: The exception the request raised
+            attempt: Number of the failed attempt, starting at 0
+
+        Returns:
+            Seconds to wait before retrying, or None to give up
+        """
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hint = retry_after(error)
+        if hint is not None:
+            delay = max(delay, min(hint, self.max_delay))
+        reason = "throttled" if is_throttled(error) else f"failed ({type(error).__name__})"
+        print(f"   ⏳ {key} {reason}, retrying in {delay:.1f}s (retry {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def _finish(self, key: str, limit: AdaptiveLimit, error: Optional[BaseException]) -> None:
+        """Release a slot, pausing the key's rate limiter if the provider asked us to back off."""
+        throttled = error is not None and is_throttled(error)
+        limit.release(throttled)
+        if throttled:
+            hint = retry_after(error)
+            if hint:
+                get_rate_limiter(key).pause(min(hint, self.max_delay))
+
+    @contextmanager
+    def slot(self, key: str) -> Iterator[None]:
+        """
+        Hold a rate-limited, concurrency-limited slot for one request attempt.
+
+        Args:
+            key: Scheduler key of the request
+        """
+        get_rate_limiter(key).acquire()
+        limit = self.limit_for(key)
+        limit.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self._finish(key, limit, e)
+            raise
+        self._finish(key, limit, None)
+
+    @asynccontextmanager
+    async def aslot(self, key: str) -> AsyncIterator[None]:
+        """
+        Async variant of slot that also holds a slot of the shared concurrency budget.
+
+        Args:
+            key: Scheduler key of the request
+        """
+        await get_rate_limiter(key).aacquire()
+        limit = self.limit_for(key)
+        await limit.aacquire()
+        try:
+            async with get_concurrency_budget():
+                yield
+        except BaseException as e:
+            self._finish(key, limit, e)
+            raise
+        self._finish(key, limit, None)
+
+    def call(self, key: str, request: Callable[[], Any]) -> Any:
+        """
+        Send a request, retrying it while it fails transiently.
+
+        Args:
+            key: Scheduler key of the request, e.g. "openai:gpt-4o" or "exa"
+            request: Function sending the request
+
+        Returns:
+            The request's result
+
+        Raises:
+            Exception: The last error, once the request is not retryable or out of retries
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.slot(key):
+                    return request()
+            except Exception as e:
+                delay = self.retry_delay(key, e, attempt)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, key: str, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of call.
+
+        Args:
+            key: Scheduler key of the request
+            request: Function returning the request coroutine; called once per attempt
+
+        Returns:
+            The request's result
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.aslot(key):
+                    return await request()
+            except Exception as e:
+                delay = self.retry_delay(key, e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_scheduler = RequestScheduler()
+
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Return the process-wide request scheduler.
+
+    Returns:
+        The shared RequestScheduler instance
+    """
+    return _scheduler
+
+
+def configure_scheduler(max_retries: int = DEFAULT_MAX_RETRIES, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> RequestScheduler:
+    """
+    Replace the process-wide request scheduler.
+
+    Args:
+        max_retries: Retries per request after the first attempt
+        max_concurrency: Largest number of requests in flight per key
+
+    Returns:
+        The new shared RequestScheduler instance
+    """
+    global _scheduler
+    _scheduler = RequestScheduler(max_retries=max_retries, max_concurrency=max_concurrency)
+    return _scheduler
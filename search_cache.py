@@ -0,0 +1,241 @@
+"""
+Search Cache Module
+
+This module provides a persistent, content-addressed cache for search results so
+that repeated queries (across runs, and across topics within a run) are served
+from disk instead of hitting the search provider APIs again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "search")
+
+
+class SearchCache:
+    """
+    A file-backed search result cache with TTL expiry and LRU eviction.
+
+    Each entry is stored as a JSON file named after the SHA-256 hash of its key,
+    so identical requests always map to the same file. File modification times
+    double as access times: reading an entry touches it, and eviction removes
+    the least recently used files first once the entry or size limits are hit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl_hours: float = 168,
+        max_entries: int = 5000,
+        max_bytes: int = 500 * 1024 * 1024
+    ):
+        """
+        Initialize the search cache.
+
+        Args:
+            cache_dir: Directory where cache entries are stored
+            ttl_hours: Hours after which an entry is considered stale
+            max_entries: Maximum number of entries kept on disk
+            max_bytes: Maximum total size of all entries in bytes
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entry_count, self._total_bytes = self._scan_usage()
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize a query so trivially different spellings share an entry.
+
+        Args:
+            query: The raw search query
+
+        Returns:
+            Lowercased query with collapsed whitespace
+        """
+        return " ".join(query.lower().split())
+
+    def make_key(self, provider: str, query: str, num_results: int, content_options: Dict[str, Any]) -> str:
+        """
+        Build the content address for a search request.
+
+        Args:
+            provider: Name of the search provider
+            query: The search query string
+            num_results: Number of results requested
+            content_options: Provider options that change the returned content
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "query": self.normalize_query(query),
+                "num_results": num_results,
+                "content_options": content_options,
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached entry.
+
+        Args:
+            key: Key produced by make_key
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store an entry, evicting least recently used entries if needed.
+
+        Args:
+            key: Key produced by make_key
+            value: JSON-serializable value to store
+        """
+        path = self._path_for(key)
+        data = json.dumps({"created_at": time.time(), "value": value}, ensure_ascii=False)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else None
+
+            # Write atomically so concurrent readers never see a partial entry
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Search cache write error: {e}")
+            return
+
+        with self._lock:
+            if previous_size is None:
+                self._entry_count += 1
+            else:
+                self._total_bytes -= previous_size
+            self._total_bytes += len(data.encode("utf-8"))
+            needs_eviction = self._entry_count > self.max_entries or self._total_bytes > self.max_bytes
+
+        if needs_eviction:
+            self._evict()
+
+    def _path_for(self, key: str) -> str:
+        """Return the file path for a key, sharded by its first two characters."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _list_entries(self):
+        """Yield (path, mtime, size) for every entry on disk."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _scan_usage(self):
+        """Count entries and bytes currently on disk."""
+        count = 0
+        total = 0
+        for _, _, size in self._list_entries():
+            count += 1
+            total += size
+        return count, total
+
+    def _remove(self, path: str) -> None:
+        """Delete an entry file, ignoring races with other writers."""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._entry_count -= 1
+            self._total_bytes -= size
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until usage is 90% of the limits."""
+        with self._lock:
+            entries = sorted(self._list_entries(), key=lambda entry: entry[1])
+            count = len(entries)
+            total = sum(size for _, _, size in entries)
+            target_count = int(self.max_entries * 0.9)
+            target_bytes = int(self.max_bytes * 0.9)
+
+            for path, _, size in entries:
+                if count <= target_count and total <= target_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                count -= 1
+                total -= size
+
+            self._entry_count = count
+            self._total_bytes = total
+
+
+_caches: Dict[tuple, SearchCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(cache_dir: str = DEFAULT_CACHE_DIR, ttl_hours: float = 168) -> SearchCache:
+    """
+    Return the shared cache for a directory and TTL, creating it if needed.
+
+    Sharing one instance keeps the entry and size counters used for eviction
+    consistent between the nodes and runs that write to the same directory,
+    and scans the directory only once per process.
+
+    Args:
+        cache_dir: Directory where cache entries are stored
+        ttl_hours: Hours after which an entry is considered stale
+
+    Returns:
+        The shared SearchCache instance
+    """
+    key = (os.path.abspath(cache_dir), ttl_hours)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = SearchCache(cache_dir=cache_dir, ttl_hours=ttl_hours)
+        return _caches[key]
@@ -1,14 +1,98 @@
 """
 Search Provider Module
 
-This module provides a unified interface for different search providers (Exa, Tavily)
-to abstract away the differences in their APIs and provide consistent search results.
+This module provides a unified interface for different search providers (Exa, Tavily,
+and an offline mock) to abstract away the differences in their APIs and provide
+consistent search results.
 """
 
+import asyncio
 import os
+import threading
 from typing import List, Dict, Any, Optional
 from langchain_exa import ExaSearchResults
 from langchain_tavily import TavilySearch
+from search_cache import SearchCache
+from models import SearchResult
+from scheduler import get_scheduler
+from clients import get_client_registry
+from mock_backends import get_mock_search_backend
+
+
+class SearchResults:
+    """A list of normalized search results, exposing an Exa-compatible `results` attribute."""
+
+    __slots__ = ("results",)
+
+    def __init__(self, results: Optional[List[SearchResult]] = None):
+        self.results = results or []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation of the results."""
+        return {"results": [result.to_dict() for result in self.results]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResults":
+        """Rebuild results from their dictionary representation."""
+        return cls([SearchResult.from_dict(result) for result in data.get("results", [])])
+
+
+CONTENT_MODES = ("text", "highlights")
+DEFAULT_MAX_CHARACTERS = 30000
+# Rough size of one Exa highlight, used to turn a character budget into a highlight count
+_HIGHLIGHT_CHARACTERS = 500
+EXA_SEARCH_URL = "https://api.exa.ai/search"
+
+
+class ContentBudget:
+    """
+    The article content a search caller will actually use.
+    
+    In "text" mode the provider returns at most `max_characters` of each page's
+    text. In "highlights" mode Exa returns the passages most relevant to the
+    query instead, about `max_characters` in total. Whatever the provider
+    returns is cut to `max_characters`.
+    """
+    
+    def __init__(self, max_characters: int = DEFAULT_MAX_CHARACTERS, mode: str = "text"):
+        """
+        Initialize the budget.
+        
+        Args:
+            max_characters: Characters of content needed per result
+            mode: "text" or "highlights"
+            
+        Raises:
+            ValueError: If the mode is not supported
+        """
+        if mode not in CONTENT_MODES:
+            raise ValueError(f"Unsupported content mode: {mode}")
+        self.max_characters = max_characters
+        self.mode = mode
+    
+    def exa_options(self) -> Dict[str, Any]:
+        """Return the content arguments of an Exa search_and_contents request."""
+        if self.mode == "highlights":
+            return {"highlights": {
+                "num_sentences": 3,
+                "highlights_per_url": max(1, self.max_characters // _HIGHLIGHT_CHARACTERS)
+            }}
+        return {"text": {"max_characters": self.max_characters}}
+    
+    def exa_contents(self) -> Dict[str, Any]:
+        """Return the content options of a raw Exa /search request body."""
+        if self.mode == "highlights":
+            return {"highlights": {
+                "numSentences": 3,
+                "highlightsPerUrl": max(1, self.max_characters // _HIGHLIGHT_CHARACTERS)
+            }}
+        return {"text": {"maxCharacters": self.max_characters}}
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """Return the budget as content options for search cache keys."""
+        if self.mode == "highlights":
+            return {"max_characters": self.max_characters, "highlights": True}
+        return {"max_characters": self.max_characters}
 
 
 class SearchProvider:
@@ -19,17 +103,23 @@ class SearchProvider:
     providers like Exa and Tavily, handling their specific APIs and result formats.
     """
     
-    def __init__(self, provider: str = "exa"):
+    def __init__(self, provider: str = "exa", cache: Optional[SearchCache] = None):
         """
         Initialize the search provider.
         
         Args:
-            provider: The search provider to use ("exa" or "tavily")
+            provider: The search provider to use ("exa", "tavily" or "mock")
+            cache: Optional persistent cache for search results
             
         Raises:
             ValueError: If the provider is not supported or API key is missing
         """
         self.provider = provider
+        # The mock corpus and fault model come from the process's mock config, which a
+        # cache key cannot see; cached hits would also skip the simulated latency
+        self.cache = cache if provider != "mock" else None
+        self._tavily_tools: Dict[int, TavilySearch] = {}
+        self._tavily_lock = threading.Lock()
         if provider == "exa":
             if not os.environ.get("EXA_API_KEY"):
                 raise ValueError("EXA_API_KEY environment variable is required for Exa search")
@@ -37,70 +127,217 @@ class SearchProvider:
         elif provider == "tavily":
             if not os.environ.get("TAVILY_API_KEY"):
                 raise ValueError("TAVILY_API_KEY environment variable is required for Tavily search")
-            self.search_tool = TavilySearch(
-                max_results=2,
-                topic="general",
-            )
+            self.search_tool = self._tavily_tool(2)
+        elif provider == "mock":
+            self.search_tool = get_mock_search_backend()
         else:
             raise ValueError(f"Unsupported search provider: {provider}")
     
-    def search(self, query: str, num_results: int = 2) -> Any:
+    def search(self, query: str, num_results: int = 2, budget: Optional[ContentBudget] = None) -> Any:
         """
         Perform a search using the configured provider.
         
         Args:
             query: The search query string
             num_results: Number of results to return (default: 2)
+            budget: Content the caller needs per result (default: up to 30000 characters of text)
             
         Returns:
-            Search results in a consistent format, or None if search fails
+            Search results in a consistent format
             
         Raises:
-            Exception: If the search fails or provider is not configured
-        """
-        try:
-            if self.provider == "exa":
-                results = self.search_tool._run(
-                    query=query,
-                    num_results=2,
-                    text_contents_options={"max_characters": 30000},
-                    livecrawl="never",
+            Exception: If the search still fails after the scheduler's retries
+        """
+        budget = budget or ContentBudget()
+        cache_key, cached = self._cache_lookup(query, num_results, budget)
+        if cached is not None:
+            return cached
+
+        scheduler = get_scheduler()
+        if self.provider == "exa":
+            # Call the Exa client directly: the LangChain tool turns errors into
+            # strings, which would hide throttling from the scheduler
+            results = scheduler.call(self.provider, lambda: self.search_tool.client.search_and_contents(
+                query,
+                num_results=num_results,
+                livecrawl="never",
+                **budget.exa_options()
+            ))
+            results = self._convert_exa_results(results, budget)
+        elif self.provider == "tavily":
+            tool = self._tavily_tool(num_results)
+            results = scheduler.call(self.provider, lambda: tool.invoke(query))
+            # Convert Tavily results to match Exa format
+            results = self._convert_tavily_results(results, budget)
+        elif self.provider == "mock":
+            results = SearchResults(scheduler.call(self.provider, lambda: self.search_tool.search(
+                query, num_results, budget.max_characters, budget.mode
+            )))
+
+        self._cache_store(cache_key, results)
+        return results
+    
+    async def asearch(self, query: str, num_results: int = 2, budget: Optional[ContentBudget] = None) -> Any:
+        """
+        Perform a search asynchronously, bounded by the shared concurrency budget.
+        
+        Args:
+            query: The search query string
+            num_results: Number of results to return (default: 2)
+            budget: Content the caller needs per result (default: up to 30000 characters of text)
+            
+        Returns:
+            Search results in a consistent format
+            
+        Raises:
+            Exception: If the search still fails after the scheduler's retries
+        """
+        budget = budget or ContentBudget()
+        cache_key, cached = None, None
+        if self.cache is not None:
+            # The file cache reads and writes disk, which must not stall the event loop
+            cache_key, cached = await asyncio.to_thread(self._cache_lookup, query, num_results, budget)
+        if cached is not None:
+            return cached
+
+        scheduler = get_scheduler()
+        if self.provider == "exa":
+            results = await scheduler.acall(self.provider, lambda: self._aexa_search(query, num_results, budget))
+            results = self._convert_exa_results(results, budget)
+        elif self.provider == "tavily":
+            tool = self._tavily_tool(num_results)
+            results = await scheduler.acall(self.provider, lambda: tool.ainvoke(query))
+            results = self._convert_tavily_results(results, budget)
+        elif self.provider == "mock":
+            results = SearchResults(await scheduler.acall(self.provider, lambda: self.search_tool.asearch(
+                query, num_results, budget.max_characters, budget.mode
+            )))
+
+        if cache_key is not None:
+            await asyncio.to_thread(self._cache_store, cache_key, results)
+        return results
+    
+    async def _aexa_search(self, query: str, num_results: int, budget: ContentBudget) -> Dict[str, Any]:
+        """
+        Call the Exa search API on the pooled async HTTP client.
+        
+        exa_py's AsyncExa opens a client of its own, so the request is sent
+        directly; HTTP errors are raised for the scheduler to retry.
+        
+        Args:
+            query: The search query string
+            num_results: Number of results to return
+            budget: Content requested per result
+            
+        Returns:
+            The decoded JSON response
+        """
+        response = await get_client_registry().async_http("exa").post(
+            EXA_SEARCH_URL,
+            headers={"x-api-key": os.environ["EXA_API_KEY"]},
+            json={
+                "query": query,
+                "numResults": num_results,
+                "contents": {"livecrawl": "never", **budget.exa_contents()}
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def _tavily_tool(self, num_results: int) -> TavilySearch:
+        """Return a Tavily tool returning num_results results; Tavily fixes the count per tool."""
+        with self._tavily_lock:
+            if num_results not in self._tavily_tools:
+                self._tavily_tools[num_results] = TavilySearch(
+                    max_results=num_results,
+                    topic="general",
                 )
-                return results
-            elif self.provider == "tavily":
-                results = self.search_tool.invoke(query)
-                # Convert Tavily results to match Exa format
-                return self._convert_tavily_results(results)
-        except Exception as e:
-            print(f"Search error on '{query}' with {self.provider}: {e}")
-            return None
+            return self._tavily_tools[num_results]
     
-    def _convert_tavily_results(self, tavily_results: Dict[str, Any]) -> Any:
+    def _cache_lookup(self, query: str, num_results: int, budget: ContentBudget) -> tuple[Optional[str], Optional[SearchResults]]:
         """
-        Convert Tavily results to match Exa format for consistency.
+        Look up a search in the cache.
         
         Args:
-            tavily_results: Raw results from Tavily search API
+            query: The search query string
+            num_results: Number of results requested
+            budget: Content requested per result
             
         Returns:
-            Wrapper object with results in Exa-compatible format
-        """
-        class TavilyResultWrapper:
-            """Wrapper class to provide Exa-compatible result format for Tavily results."""
-            def __init__(self, tavily_results: Dict[str, Any]):
-                self.results = []
-                if tavily_results and 'results' in tavily_results:
-                    for result in tavily_results['results']:
-                        self.results.append(TavilyResultItem(result))
+            Tuple of (cache key or None if caching is disabled, cached results or None)
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.make_key(self.provider, query, num_results, self._content_options(budget))
+        cached = self.cache.get(cache_key)
+        return cache_key, SearchResults.from_dict(cached) if cached is not None else None
+    
+    def _cache_store(self, cache_key: Optional[str], results: SearchResults) -> None:
+        """Store fresh results in the cache; empty result sets are often transient, so skip them."""
+        if cache_key is not None and results.results:
+            self.cache.set(cache_key, results.to_dict())
+    
+    def _content_options(self, budget: ContentBudget) -> Dict[str, Any]:
+        """
+        Return the provider options that affect result content, for cache keys.
+        
+        Args:
+            budget: Content requested per result
+            
+        Returns:
+            Dictionary of content-affecting request options
+        """
+        if self.provider == "exa":
+            return {**budget.cache_options(), "livecrawl": "never"}
+        return {**budget.cache_options(), "topic": "general"}
+    
+    def _convert_exa_results(self, exa_results: Any, budget: ContentBudget) -> SearchResults:
+        """
+        Convert Exa results into normalized search results.
         
-        class TavilyResultItem:
-            """Individual result item wrapper for Tavily results."""
-            def __init__(self, result: Dict[str, Any]):
-                self.url = result.get('url', '')
-                self.title = result.get('title', '')
-                self.text = result.get('content', '')
+        Args:
+            exa_results: Response from the Exa client, or the decoded JSON of a raw request
+            budget: Content requested per result
+            
+        Returns:
+            Normalized search results
+        """
+        if isinstance(exa_results, dict):
+            raw_results = exa_results.get('results') or []
+        else:
+            raw_results = getattr(exa_results, 'results', None) or []
+        results = []
+        for result in raw_results:
+            if not isinstance(result, dict):
+                result = vars(result)
+            text = result.get('text') or "\n\n".join(result.get('highlights') or [])
+            results.append(SearchResult(
+                url=result.get('url') or '',
+                title=result.get('title') or '',
+                text=text[:budget.max_characters]
+            ))
+        return SearchResults(results)
+    
+    def _convert_tavily_results(self, tavily_results: Dict[str, Any], budget: ContentBudget) -> SearchResults:
+        """
+        Convert Tavily results to match Exa format for consistency.
         
-        return TavilyResultWrapper(tavily_results)
+        Args:
+            tavily_results: Raw results from Tavily search API
+            budget: Content requested per result
+            
+        Returns:
+            Normalized search results
+        """
+        results = []
+        if tavily_results and 'results' in tavily_results:
+            for result in tavily_results['results']:
+                results.append(SearchResult(
+                    url=result.get('url', ''),
+                    title=result.get('title', ''),
+                    text=result.get('content', '')[:budget.max_characters]
+                ))
+        return SearchResults(results)
     
     def get_provider_name(self) -> str:
         """
@@ -109,4 +346,31 @@ class SearchProvider:
         Returns:
             Name of the configured search provider
         """
-        return self.provider 
\ No newline at end of file
+        return self.provider 
+
+_providers: Dict[tuple, SearchProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_search_provider(provider: str = "exa", cache: Optional[SearchCache] = None) -> SearchProvider:
+    """
+    Return the shared search provider for a provider name and cache.
+    
+    Nodes, agents and concurrent runs share one instance, and with it the
+    provider client's HTTP connections.
+    
+    Args:
+        provider: The search provider to use ("exa", "tavily" or "mock")
+        cache: Optional persistent cache for search results
+        
+    Returns:
+        The shared SearchProvider instance
+        
+    Raises:
+        ValueError: If the provider is not supported or API key is missing
+    """
+    key = (provider, cache)
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = SearchProvider(provider, cache=cache)
+        return _providers[key]
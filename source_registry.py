@@ -0,0 +1,227 @@
+"""
+Source Registry Module
+
+This module assigns the citation numbers used throughout a report. Every URL
+is normalized first, so the same page reached through tracking links or with
+a trailing slash is cited once, and numbers are allocated atomically, so
+topics synthesized in parallel threads never hand two URLs the same number.
+A number can be reserved for an integration that is still in flight and is
+only kept once the integration succeeds, so articles that are never cited do
+not take up numbers or appear among the sources.
+"""
+
+import heapq
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that identify a campaign or referrer rather than content
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_hsenc", "_hsmi", "ref", "ref_src", "spm"
+}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Reduce a URL to the form used to recognize the same source.
+
+    The scheme and host are lowercased, default ports, fragments, tracking
+    parameters (utm_* and the TRACKING_PARAMS) and trailing slashes are
+    removed, and the remaining query parameters are sorted.
+
+    Args:
+        url: URL as returned by the search provider
+
+    Returns:
+        Normalized URL, or the stripped input if it is not an absolute URL
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+class SourceRegistry:
+    """
+    Thread-safe mapping from sources to citation numbers.
+
+    Numbers start at 1 and are handed out in registration order; numbers of
+    released reservations are handed out again first. Each source keeps the
+    URL and title it was first registered with, plus any metadata. The
+    registry is picklable, so it can be stored in checkpoints and in the
+    pipeline state; reservations still in flight are not stored.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._ids: Dict[str, int] = {}
+        self._sources: List[Optional[Dict[str, Any]]] = []
+        # Reserved numbers not committed yet, with the number of reservations holding them
+        self._pending: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ids": {key: source_id for key, source_id in self._ids.items() if source_id not in self._pending},
+                "sources": [
+                    None if source is None or source["id"] in self._pending else dict(source)
+                    for source in self._sources
+                ]
+            }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._ids = state["ids"]
+        self._sources = state["sources"]
+        self._pending = {}
+        self._free = [index + 1 for index, source in enumerate(self._sources) if source is None]
+        self._lock = threading.Lock()
+        self._trim()
+
+    def __len__(self) -> int:
+        return len(self.sources())
+
+    def __contains__(self, url: str) -> bool:
+        return normalize_url(url) in self._ids
+
+    def register(self, url: str, title: str = "", **metadata: Any) -> int:
+        """
+        Return the citation number of a source, allocating one if it is new.
+
+        Args:
+            url: Source URL
+            title: Source title, stored the first time the source is seen
+            **metadata: Extra fields stored with a new source
+
+        Returns:
+            The source's citation number
+        """
+        with self._lock:
+            source_id = self._allocate(url, title, metadata)
+            self._pending.pop(source_id, None)
+            return source_id
+
+    def reserve(self, url: str, title: str = "", **metadata: Any) -> int:
+        """
+        Return the citation number of a source about to be cited.
+
+        A number allocated by the reservation is kept only once the source is
+        committed; release it if the source ends up not being cited.
+
+        Args:
+            url: Source URL
+            title: Source title, stored the first time the source is seen
+            **metadata: Extra fields stored with a new source
+
+        Returns:
+            The source's citation number
+        """
+        with self._lock:
+            source_id = self._allocate(url, title, metadata)
+            if source_id in self._pending:
+                self._pending[source_id] += 1
+            return source_id
+
+    def commit(self, url: str) -> None:
+        """
+        Keep the number reserved for a source that is now cited.
+
+        Args:
+            url: Source URL passed to reserve
+        """
+        with self._lock:
+            source_id = self._ids.get(normalize_url(url))
+            if source_id is not None:
+                self._pending.pop(source_id, None)
+
+    def release(self, url: str) -> None:
+        """
+        Give up a reservation; the number is freed once no reservation holds it.
+
+        Numbers of committed sources are never freed.
+
+        Args:
+            url: Source URL passed to reserve
+        """
+        key = normalize_url(url)
+        with self._lock:
+            source_id = self._ids.get(key)
+            if source_id not in self._pending:
+                return
+            self._pending[source_id] -= 1
+            if self._pending[source_id] == 0:
+                del self._pending[source_id]
+                del self._ids[key]
+                self._sources[source_id - 1] = None
+                heapq.heappush(self._free, source_id)
+                self._trim()
+
+    def _allocate(self, url: str, title: str, metadata: Dict[str, Any]) -> int:
+        """Return the number of a source, allocating a pending one if it is new. Caller holds the lock."""
+        key = normalize_url(url)
+        source_id = self._ids.get(key)
+        if source_id is None:
+            source = {**metadata, "url": url, "title": title}
+            if self._free:
+                source_id = heapq.heappop(self._free)
+                self._sources[source_id - 1] = {**source, "id": source_id}
+            else:
+                source_id = len(self._sources) + 1
+                self._sources.append({**source, "id": source_id})
+            self._ids[key] = source_id
+            self._pending[source_id] = 0
+        return source_id
+
+    def _trim(self) -> None:
+        """Drop freed numbers at the end, so they are not left as gaps. Caller holds the lock."""
+        while self._sources and self._sources[-1] is None:
+            self._sources.pop()
+            self._free.remove(len(self._sources) + 1)
+        heapq.heapify(self._free)
+
+    def get(self, url: str) -> Optional[int]:
+        """
+        Return the citation number of a registered source.
+
+        Args:
+            url: Source URL
+
+        Returns:
+            The citation number, or None if the source is unknown
+        """
+        return self._ids.get(normalize_url(url))
+
+    def source(self, source_id: int) -> Dict[str, Any]:
+        """
+        Return the stored record of a source.
+
+        Args:
+            source_id: Citation number
+
+        Returns:
+            Dictionary with "id", "url", "title" and any metadata
+        """
+        return self._sources[source_id - 1]
+
+    def sources(self) -> List[Dict[str, Any]]:
+        """Return all committed source records in citation order."""
+        with self._lock:
+            return [source for source in self._sources if source is not None and source["id"] not in self._pending]
@@ -1,12 +1,17 @@
 import re
+import sys
 import json
 from typing import Dict, List, Any, Tuple
 from datetime import datetime
-from openai import OpenAI
 import argparse
 from pathlib import Path
 from pydantic import BaseModel
 
+# Make the pipeline modules importable when running from the tests directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from llm_gateway import get_llm_client, configure_llm_cache, CACHE_MODES
+from accounting import get_usage_tracker, usage_labels
+
 class EvaluationCriteria(BaseModel):
     score: int
     explanation: str
@@ -23,7 +28,7 @@ class ResearchReportEvaluator:
     """Evaluates the quality of generated research reports"""
     
     def __init__(self, model="gpt-4o"):
-        self.client = OpenAI()
+        self.client = get_llm_client()
         self.model = model
         
     def evaluate_report(self, report_path: str) -> Dict[str, Any]:
@@ -45,11 +50,14 @@ class ResearchReportEvaluator:
         sections = self._parse_report_sections(report_content)
         
         # Run narrative coherence evaluation
+        with usage_labels(node="evaluator"):
+            narrative_coherence = self._evaluate_narrative_coherence(report_content)
         results = {
             'report_path': report_path,
             'evaluation_date': datetime.now().isoformat(),
-            'narrative_coherence': self._evaluate_narrative_coherence(report_content),
-            'overall_score': 0.0
+            'narrative_coherence': narrative_coherence,
+            'overall_score': 0.0,
+            'usage': get_usage_tracker().summary()
         }
         
         # Calculate overall score
@@ -158,7 +166,8 @@ Provide a brief explanation for each score and an overall coherence assessment.
                             "content": prompt
                         }
                     ],
-                    text_format=SectionEvaluation
+                    text_format=SectionEvaluation,
+                    prompt_name="SECTION_EVALUATION_PROMPT"
                 )
                 
                 result = response.output_parsed
@@ -242,8 +251,10 @@ def main():
     parser.add_argument("--output", "-o", help="Output path for evaluation results")
     parser.add_argument("--model", "-m", default="gpt-4o", help="OpenAI model to use for LLM evaluations")
     parser.add_argument("--no-save", action="store_true", help="Don't save evaluation results")
+    parser.add_argument("--llm-cache", choices=CACHE_MODES, default="readwrite", help="LLM response cache mode")
     
     args = parser.parse_args()
+    configure_llm_cache(mode=args.llm_cache)
     
     # Initialize evaluator
     evaluator = ResearchReportEvaluator(model=args.model)